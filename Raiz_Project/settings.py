@@ -106,6 +106,22 @@ DATABASES = {
 }
 
 
+# Backend de autenticación: ModelBackend con permisos leídos del snapshot cacheado (app_User/permisos.py)
+AUTHENTICATION_BACKENDS = [
+    'app_User.backends.SnapshotModelBackend',
+]
+
+# Caché del snapshot de grupos y permisos por usuario (ver app_User/permisos.py).
+# La clave incluye la versión del usuario guardada en la base (VersionPermisos), que las
+# señales incrementan en cada cambio: con LocMem (sin CACHES configurado) cada worker
+# reconstruye su propio snapshot, pero ninguno sigue usando uno revocado. Una caché
+# compartida en CACHES solo evita esas reconstrucciones repetidas.
+PERMISOS_CACHE = {
+    'ALIAS': os.getenv('PERMISOS_CACHE_ALIAS', 'default'),
+    'TIMEOUT': int(os.getenv('PERMISOS_CACHE_TIMEOUT', '3600')),
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -150,7 +166,10 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # Django REST Framework configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        # TokenAuthentication + resolución del tenant (perfil y empresa) en una sola consulta
+        'app_User.authentication.TenantTokenAuthentication',
+        # Tokens de acceso firmados (Authorization: Bearer ...), ver SIGNED_ACCESS_TOKENS
+        'app_User.authentication.SignedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',  # Por defecto permitir acceso anónimo, luego restringir en ViewSets
@@ -165,6 +184,60 @@ REST_FRAMEWORK = {
         'rest_framework.parsers.FormParser',
         'rest_framework.parsers.MultiPartParser',
     ],
+    # Límites para login/registro (ver app_User/throttling.py)
+    'DEFAULT_THROTTLE_RATES': {
+        'login_ip': os.getenv('THROTTLE_LOGIN_IP', '30/min'),
+        'login_email': os.getenv('THROTTLE_LOGIN_EMAIL', '5/min'),
+        'registro_ip': os.getenv('THROTTLE_REGISTRO_IP', '10/hour'),
+        'registro_email': os.getenv('THROTTLE_REGISTRO_EMAIL', '3/hour'),
+    },
+    # Proxies de confianza delante de la app. Sin este valor DRF toma la IP de
+    # X-Forwarded-For tal como la envía el cliente y los límites por IP se evaden;
+    # con 0 se usa REMOTE_ADDR (ajustar al número de proxies del despliegue)
+    'NUM_PROXIES': int(os.getenv('DRF_NUM_PROXIES', '0')),
+}
+
+# Caché usada por el throttling de login/registro (LocMem por defecto; usar una
+# caché compartida en CACHES para aplicar los límites entre todos los workers)
+AUTH_THROTTLE_CACHE_ALIAS = os.getenv('AUTH_THROTTLE_CACHE_ALIAS', 'default')
+
+# Caché de autenticación por token (token -> usuario + perfil + empresa)
+# 'shared': usa CACHES[ALIAS] (p. ej. Redis) y se invalida en todos los workers (por defecto;
+#           con la LocMem de Django, sin CACHES configurado, sigue siendo por proceso)
+# 'local': LRU en memoria de cada worker (el logout en otro worker tarda hasta TIMEOUT en propagarse)
+# 'none': sin caché
+TOKEN_AUTH_CACHE = {
+    'BACKEND': os.getenv('TOKEN_AUTH_CACHE_BACKEND', 'shared'),
+    'ALIAS': os.getenv('TOKEN_AUTH_CACHE_ALIAS', 'default'),
+    'TIMEOUT': int(os.getenv('TOKEN_AUTH_CACHE_TIMEOUT', '300')),
+    'MAX_ENTRIES': int(os.getenv('TOKEN_AUTH_CACHE_MAX_ENTRIES', '10000')),
+}
+
+# Expiración de los tokens de authtoken (segundos, 0 = sin expiración, por defecto).
+# Es opcional: al activarla (p. ej. AUTH_TOKEN_TTL=2592000 para 30 días) todos los
+# tokens más antiguos que el TTL se rechazan con 401 desde el primer request, es decir,
+# esos usuarios deben volver a iniciar sesión.
+# El login rota los vencidos; `python manage.py purgar_tokens` los elimina por lotes.
+AUTH_TOKEN_EXPIRY = {
+    'TTL': int(os.getenv('AUTH_TOKEN_TTL', '0')),
+    'BATCH_SIZE': int(os.getenv('AUTH_TOKEN_PURGE_BATCH_SIZE', '1000')),
+}
+
+# Tokens de acceso firmados (HMAC con SECRET_KEY) y de vida corta, opcionales.
+# Si está habilitado, el login devuelve además un access_token que se verifica sin
+# consultar la base de datos; el token de authtoken queda como token de renovación.
+SIGNED_ACCESS_TOKENS = {
+    'ENABLED': os.getenv('SIGNED_ACCESS_TOKENS_ENABLED', 'False') == 'True',
+    'LIFETIME': int(os.getenv('SIGNED_ACCESS_TOKENS_LIFETIME', '900')),
+}
+
+# Cola de revisión de créditos: duración de la reserva de un analista (segundos),
+# máximo de créditos por reclamo y si aprobar/rechazar exige tener la reserva vigente
+# (con 'False' solo se impide revisar créditos reservados por otro analista)
+CREDITO_COLA_REVISION = {
+    'LEASE': int(os.getenv('CREDITO_REVISION_LEASE', '900')),
+    'MAX_RECLAMO': int(os.getenv('CREDITO_REVISION_MAX_RECLAMO', '50')),
+    'REQUERIR_RESERVA': os.getenv('CREDITO_REVISION_REQUERIR_RESERVA', 'True') == 'True',
 }
 
 # CORS Configuration - Configuración específica para frontend
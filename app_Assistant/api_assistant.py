@@ -7,6 +7,7 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.db.models import Q
 from app_User.models import Perfiluser
+from app_User.tenant import get_tenant_perfil
 from .models import Conversacion, Mensaje
 from .serializers import (
     ConversacionSerializer, ConversacionListSerializer,
@@ -22,7 +23,7 @@ class AssistantViewSet(viewsets.ViewSet):
     def get_perfil_and_empresa(self, user):
         """Obtiene perfil y empresa del usuario"""
         try:
-            perfil = Perfiluser.objects.get(usuario=user)
+            perfil = get_tenant_perfil(self.request)
             return perfil, perfil.empresa
         except Perfiluser.DoesNotExist:
             return None, None
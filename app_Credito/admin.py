@@ -47,7 +47,8 @@ class CreditoAdmin(admin.ModelAdmin):
 
 @admin.register(Ganancia_Credito)
 class GananciaCreditoAdmin(admin.ModelAdmin):
-    list_display = ('id', 'credito_id', 'cliente_nombre', 'monto_prestado', 'tasa_interes', 'duracion_meses')
+    list_display = ('id', 'credito_id', 'cliente_nombre', 'monto_prestado', 'tasa_interes', 'duracion_meses', 'ganacia_esperada')
+    list_select_related = ('Credito', 'Cliente')
     list_filter = ('tasa_interes', 'duracion_meses')
     search_fields = ('Cliente__nombre', 'Cliente__apellido', 'Credito__id')
     
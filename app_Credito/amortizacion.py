@@ -0,0 +1,393 @@
+"""
+Cronogramas de amortización (sistema francés, alemán y plano) vectorizados con NumPy.
+
+Todos los importes se manejan en centavos enteros (int64): los redondeos se hacen una
+vez por cuota y la suma de capital de cada crédito es exactamente el monto prestado
+(la última cuota absorbe la diferencia de redondeo).
+
+Las cuotas de muchos créditos se calculan en una sola pasada sobre arreglos "planos":
+cada crédito ocupa Numero_Cuotas posiciones consecutivas y las operaciones por crédito
+(totales, saldos acumulados) se resuelven con repeat / cumsum / reduceat, sin bucles
+de Python por crédito ni por cuota.
+
+Tasa_Interes es la tasa nominal anual en porcentaje; la tasa de cada cuota es
+tasa / 100 / 12 (cuotas mensuales). En el sistema francés el interés de cada cuota se
+calcula sobre el saldo teórico con la cuota sin redondear (valor actual de las cuotas
+restantes), no sobre el saldo ya redondeado de la cuota anterior: cada fila se redondea
+por separado y la última cuota corrige a lo sumo unos centavos por cuota.
+Las tasas se acotan a 0..MAX_TASA (el rango de Tasa_Interes); una tasa negativa se
+calcula como crédito sin interés.
+"""
+from decimal import Decimal
+import numpy as np
+
+
+SISTEMAS = ('frances', 'aleman', 'plano')
+# Tope de cuotas por crédito: acota la memoria del cálculo (una fila por cuota)
+MAX_CUOTAS = 360
+# Mayor Tasa_Interes representable (DecimalField(5, 2)), en porcentaje anual
+MAX_TASA = 999.99
+# Créditos por lote en cronograma_cartera: a lo sumo LOTE_CARTERA x MAX_CUOTAS filas en memoria
+LOTE_CARTERA = 2000
+# Máximo de créditos con resumen individual (?detalle=1) en una respuesta
+MAX_CREDITOS_DETALLE = 500
+CAMPOS_CARTERA = ('id', 'Monto_Solicitado', 'Tasa_Interes', 'Numero_Cuotas', 'Fecha_Desembolso', 'fecha_creacion')
+
+
+class Cronogramas:
+    """
+    Resultado de calcular_cronogramas: arreglos planos (una fila por cuota) más los
+    índices de inicio de cada crédito
+    """
+
+    def __init__(self, cuotas_por_credito, inicio, numero, fecha, cuota, capital, interes, saldo):
+        self.cuotas_por_credito = cuotas_por_credito
+        self.inicio = inicio
+        self.numero = numero
+        self.fecha = fecha
+        self.cuota = cuota
+        self.capital = capital
+        self.interes = interes
+        self.saldo = saldo
+
+    def __len__(self):
+        return len(self.cuotas_por_credito)
+
+    def totales(self):
+        """Totales por crédito (centavos): cuota inicial, interés total y total a pagar"""
+        if not len(self.cuota):
+            vacio = np.zeros(len(self), dtype=np.int64)
+            return {'primera_cuota': vacio, 'total_interes': vacio, 'total_pagar': vacio}
+        return {
+            'primera_cuota': self.cuota[self.inicio],
+            'total_interes': np.add.reduceat(self.interes, self.inicio),
+            'total_pagar': np.add.reduceat(self.cuota, self.inicio),
+        }
+
+    def flujo_mensual(self):
+        """Suma de cuota, capital e interés por mes de vencimiento (toda la cartera)"""
+        return formatear_flujo(acumular_flujo({}, self))
+
+    def detalle(self, posicion):
+        """Cuotas del crédito en la posición indicada, como lista de dicts"""
+        desde = self.inicio[posicion]
+        hasta = desde + self.cuotas_por_credito[posicion]
+        return [
+            {
+                'numero': int(self.numero[i]),
+                'fecha_vencimiento': str(self.fecha[i]),
+                'cuota': centavos_a_texto(self.cuota[i]),
+                'capital': centavos_a_texto(self.capital[i]),
+                'interes': centavos_a_texto(self.interes[i]),
+                'saldo': centavos_a_texto(self.saldo[i]),
+            }
+            for i in range(desde, hasta)
+        ]
+
+
+def acumular_flujo(flujo, cronogramas):
+    """Sumar a `flujo` (mes -> [cuota, capital, interés] en centavos) las cuotas de `cronogramas`"""
+    if not len(cronogramas.cuota):
+        return flujo
+    meses = cronogramas.fecha.astype('datetime64[M]')
+    unicos, posicion = np.unique(meses, return_inverse=True)
+    sumas = zip(
+        unicos,
+        np.bincount(posicion, weights=cronogramas.cuota, minlength=len(unicos)).astype(np.int64),
+        np.bincount(posicion, weights=cronogramas.capital, minlength=len(unicos)).astype(np.int64),
+        np.bincount(posicion, weights=cronogramas.interes, minlength=len(unicos)).astype(np.int64),
+    )
+    for mes, cuota, capital, interes in sumas:
+        total = flujo.setdefault(str(mes), [0, 0, 0])
+        total[0] += int(cuota)
+        total[1] += int(capital)
+        total[2] += int(interes)
+    return flujo
+
+
+def formatear_flujo(flujo):
+    return [
+        {
+            'mes': mes,
+            'cuota': centavos_a_texto(cuota),
+            'capital': centavos_a_texto(capital),
+            'interes': centavos_a_texto(interes),
+        }
+        for mes, (cuota, capital, interes) in sorted(flujo.items())
+    ]
+
+
+def a_centavos(valor):
+    """Decimal/str/int -> centavos enteros (redondeo bancario a 2 decimales)"""
+    return int((Decimal(str(valor)) * 100).quantize(Decimal('1')))
+
+
+def centavos_a_texto(centavos):
+    return str(Decimal(int(centavos)).scaleb(-2))
+
+
+def segmentos(cuotas_por_credito):
+    """Índice de inicio de cada crédito y, por cuota, el índice del crédito y el número de cuota (1..n)"""
+    inicio = np.cumsum(cuotas_por_credito) - cuotas_por_credito
+    credito = np.repeat(np.arange(len(cuotas_por_credito)), cuotas_por_credito)
+    numero = np.arange(int(cuotas_por_credito.sum()), dtype=np.int64) - inicio[credito] + 1
+    return inicio, credito, numero
+
+
+def sumas_segmentadas(valores, inicio, credito):
+    """Suma acumulada que se reinicia al comienzo de cada crédito"""
+    acumulado = np.cumsum(valores)
+    base = acumulado[inicio] - valores[inicio]
+    return acumulado - base[credito]
+
+
+def fechas_vencimiento(fecha_inicio, credito, numero):
+    """
+    Fecha de cada cuota: mismo día del mes que fecha_inicio, `numero` meses después
+    (ajustado al último día si el mes es más corto)
+    """
+    inicio = np.asarray(fecha_inicio, dtype='datetime64[D]')
+    mes_inicio = inicio.astype('datetime64[M]')
+    dia = (inicio - mes_inicio.astype('datetime64[D]')).astype(np.int64)
+    if not len(numero):
+        return np.empty(0, dtype='datetime64[D]')
+    # Meses como enteros; el primer día y el largo de cada mes salen de una tabla
+    # del rango de meses involucrado (unos pocos cientos de filas)
+    mes = mes_inicio.astype(np.int64)[credito] + numero
+    primero = int(mes.min())
+    meses = np.arange(primero, int(mes.max()) + 2).astype('datetime64[M]').astype('datetime64[D]')
+    largo_mes = np.diff(meses).astype(np.int64)
+    posicion = mes - primero
+    desplazamiento = np.minimum(dia[credito], largo_mes[posicion] - 1)
+    return meses[posicion] + desplazamiento.astype('timedelta64[D]')
+
+
+def anualidad(tasas, cuotas):
+    """
+    Valor actual de `cuotas` pagos de 1 a la tasa por período: (1 - (1+r)^-m) / r; sin interés, m.
+    expm1/log1p evitan restar números casi iguales con tasas chicas y ningún término crece
+    con (1+r)^m, por lo que no se pierde precisión con tasas altas ni plazos largos.
+    """
+    con_tasa = tasas > 0
+    return np.where(con_tasa, -np.expm1(-cuotas * np.log1p(tasas)) / np.where(con_tasa, tasas, 1), cuotas)
+
+
+def calcular_cronogramas(montos, tasas, cuotas, fechas_inicio, sistema='frances'):
+    """
+    Calcular los cronogramas de muchos créditos en una pasada vectorizada
+
+    Args:
+        montos: Montos prestados en centavos (enteros)
+        tasas: Tasas nominales anuales en porcentaje
+        cuotas: Número de cuotas de cada crédito (entre 1 y MAX_CUOTAS)
+        fechas_inicio: Fecha de desembolso (o de creación) de cada crédito
+        sistema: 'frances' (cuota fija), 'aleman' (capital fijo) o 'plano' (interés sobre el monto original)
+
+    Returns:
+        Cronogramas
+    """
+    if sistema not in SISTEMAS:
+        raise ValueError(f"Sistema de amortización inválido: {sistema}. Opciones: {', '.join(SISTEMAS)}")
+
+    montos = np.asarray(montos, dtype=np.int64)
+    tasas = np.clip(np.asarray(tasas, dtype=np.float64), 0, MAX_TASA) / 100 / 12
+    cuotas = np.asarray(cuotas, dtype=np.int64)
+    if (cuotas <= 0).any() or (cuotas > MAX_CUOTAS).any():
+        raise ValueError(f"Numero_Cuotas debe estar entre 1 y {MAX_CUOTAS}")
+
+    inicio, credito, numero = segmentos(cuotas)
+    fin = inicio + cuotas - 1
+    monto = montos[credito]
+    tasa = tasas[credito]
+
+    if sistema == 'frances':
+        # Cuota fija sin redondear: M / anualidad(r, n)
+        cuota_exacta = (montos / anualidad(tasas, cuotas.astype(np.float64)))[credito]
+        # Saldo antes de la cuota k: valor actual de las n - k + 1 cuotas restantes
+        restantes = (cuotas[credito] - numero + 1).astype(np.float64)
+        saldo_previo = cuota_exacta * anualidad(tasa, restantes)
+        interes = np.rint(saldo_previo * tasa).astype(np.int64)
+        capital = np.rint(cuota_exacta).astype(np.int64) - interes
+    else:
+        amortizacion = (montos // cuotas)[credito]
+        capital = amortizacion.copy()
+        if sistema == 'aleman':
+            saldo_previo = monto - amortizacion * (numero - 1)
+            interes = np.rint(saldo_previo * tasa).astype(np.int64)
+        else:
+            interes = np.rint(monto * tasa).astype(np.int64)
+
+    # La última cuota cancela el saldo restante (absorbe los redondeos)
+    pagado_antes = sumas_segmentadas(capital, inicio, credito)[fin] - capital[fin]
+    capital[fin] = montos - pagado_antes
+    cuota = capital + interes
+    saldo = monto - sumas_segmentadas(capital, inicio, credito)
+
+    return Cronogramas(
+        cuotas_por_credito=cuotas,
+        inicio=inicio,
+        numero=numero,
+        fecha=fechas_vencimiento(fechas_inicio, credito, numero),
+        cuota=cuota,
+        capital=capital,
+        interes=interes,
+        saldo=saldo,
+    )
+
+
+def fecha_inicio_credito(fecha_desembolso, fecha_creacion):
+    return fecha_desembolso or fecha_creacion.date()
+
+
+def cronograma_credito(credito, sistema='frances'):
+    """Cronograma de un crédito: resumen y cuotas"""
+    cronogramas = calcular_cronogramas(
+        [a_centavos(credito.Monto_Solicitado)],
+        [float(credito.Tasa_Interes)],
+        [credito.Numero_Cuotas],
+        [fecha_inicio_credito(credito.Fecha_Desembolso, credito.fecha_creacion)],
+        sistema,
+    )
+    totales = cronogramas.totales()
+    return {
+        'credito_id': credito.id,
+        'sistema': sistema,
+        'monto': centavos_a_texto(a_centavos(credito.Monto_Solicitado)),
+        'tasa_interes_anual': str(credito.Tasa_Interes),
+        'numero_cuotas': credito.Numero_Cuotas,
+        'primera_cuota': centavos_a_texto(totales['primera_cuota'][0]),
+        'total_interes': centavos_a_texto(totales['total_interes'][0]),
+        'total_pagar': centavos_a_texto(totales['total_pagar'][0]),
+        'cuotas': cronogramas.detalle(0),
+    }
+
+
+def cronograma_cartera(creditos, sistema='frances', detalle=False, batch_size=LOTE_CARTERA):
+    """
+    Cronogramas de una cartera, por lotes de `batch_size` créditos ordenados por id
+
+    Cada lote es una consulta de values_list y un cálculo vectorizado; de cada uno solo
+    se conservan los totales y el flujo por mes, por lo que la memoria no crece con la
+    cartera. El resumen por crédito (detalle) lo acota el llamador (MAX_CREDITOS_DETALLE).
+
+    Args:
+        creditos: QuerySet de Credito
+        sistema: Sistema de amortización
+        detalle: Incluir el resumen por crédito además del flujo mensual
+
+    Returns:
+        Dict con totales, flujo mensual proyectado y (opcional) resumen por crédito.
+        Los créditos con Numero_Cuotas fuera de 1..MAX_CUOTAS se omiten y se informan
+        en 'omitidos'.
+    """
+    omitidos = list(
+        creditos
+        .exclude(Numero_Cuotas__gt=0, Numero_Cuotas__lte=MAX_CUOTAS)
+        .order_by('id')
+        .values_list('id', flat=True)
+    )
+    validos = creditos.filter(Numero_Cuotas__gt=0, Numero_Cuotas__lte=MAX_CUOTAS)
+
+    cantidad = cuotas = capital = interes = total_pagar = 0
+    flujo = {}
+    resumenes = []
+    ultimo_id = 0
+    while True:
+        filas = list(
+            validos.filter(id__gt=ultimo_id)
+            .order_by('id')
+            .values_list(*CAMPOS_CARTERA)[:batch_size]
+        )
+        if not filas:
+            break
+        cronogramas = calcular_cronogramas(
+            np.fromiter((a_centavos(fila[1]) for fila in filas), dtype=np.int64, count=len(filas)),
+            np.fromiter((float(fila[2]) for fila in filas), dtype=np.float64, count=len(filas)),
+            np.fromiter((fila[3] for fila in filas), dtype=np.int64, count=len(filas)),
+            [fecha_inicio_credito(fila[4], fila[5]) for fila in filas],
+            sistema,
+        )
+        cantidad += len(filas)
+        cuotas += int(cronogramas.cuotas_por_credito.sum())
+        capital += int(cronogramas.capital.sum())
+        interes += int(cronogramas.interes.sum())
+        total_pagar += int(cronogramas.cuota.sum())
+        acumular_flujo(flujo, cronogramas)
+        if detalle:
+            totales = cronogramas.totales()
+            resumenes.extend(
+                {
+                    'credito_id': fila[0],
+                    'primera_cuota': centavos_a_texto(primera),
+                    'total_interes': centavos_a_texto(interes_credito),
+                    'total_pagar': centavos_a_texto(total),
+                }
+                for fila, primera, interes_credito, total in zip(
+                    filas, totales['primera_cuota'], totales['total_interes'], totales['total_pagar']
+                )
+            )
+        ultimo_id = filas[-1][0]
+
+    resultado = {
+        'sistema': sistema,
+        'creditos': cantidad,
+        'omitidos': omitidos,
+        'totales': {
+            'cuotas': cuotas,
+            'capital': centavos_a_texto(capital),
+            'interes': centavos_a_texto(interes),
+            'total_pagar': centavos_a_texto(total_pagar),
+        },
+        'flujo_mensual': formatear_flujo(flujo),
+    }
+    if detalle:
+        resultado['detalle'] = resumenes
+    return resultado
+
+
+def simular_cotizaciones(montos, cuotas, tasas, sistema='frances', fecha_inicio=None):
+    """
+    Cotizar todas las combinaciones montos x cuotas x tasas en un único cálculo vectorizado
+
+    Args:
+        montos: Montos (Decimal)
+        cuotas: Números de cuotas
+        tasas: Tasas nominales anuales en porcentaje (Decimal)
+
+    Returns:
+        Lista de cotizaciones ordenada por monto, cuotas y tasa
+    """
+    centavos = np.array([a_centavos(monto) for monto in montos], dtype=np.int64)
+    tasas_float = np.array([float(tasa) for tasa in tasas], dtype=np.float64)
+    grilla_montos, grilla_cuotas, grilla_tasas = (
+        eje.ravel() for eje in np.meshgrid(
+            np.arange(len(montos)), np.asarray(cuotas, dtype=np.int64), np.arange(len(tasas)), indexing='ij'
+        )
+    )
+    # Ordenar por monto, cuotas y tasa (lexsort: la última clave es la principal)
+    orden = np.lexsort((tasas_float[grilla_tasas], grilla_cuotas, centavos[grilla_montos]))
+    grilla_montos, grilla_cuotas, grilla_tasas = grilla_montos[orden], grilla_cuotas[orden], grilla_tasas[orden]
+    cronogramas = calcular_cronogramas(
+        centavos[grilla_montos],
+        tasas_float[grilla_tasas],
+        grilla_cuotas,
+        np.full(len(grilla_cuotas), np.datetime64(fecha_inicio or 'today', 'D')),
+        sistema,
+    )
+    totales = cronogramas.totales()
+    ultima_cuota = cronogramas.cuota[cronogramas.inicio + cronogramas.cuotas_por_credito - 1]
+    return [
+        {
+            'monto': centavos_a_texto(centavos[m]),
+            'cuotas': int(n),
+            'tasa_interes_anual': str(tasas[t]),
+            'primera_cuota': centavos_a_texto(primera),
+            'ultima_cuota': centavos_a_texto(ultima),
+            'total_interes': centavos_a_texto(interes),
+            'total_pagar': centavos_a_texto(total),
+        }
+        for m, n, t, primera, ultima, interes, total in zip(
+            grilla_montos, grilla_cuotas, grilla_tasas, totales['primera_cuota'], ultima_cuota,
+            totales['total_interes'], totales['total_pagar'],
+        )
+    ]
@@ -2,8 +2,11 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import permissions, status
 from app_Cliente.models import Documentacion
-from app_Credito.models import Credito
+from app_Credito.models import Credito, Tipo_Credito
+from app_Credito.serializers import SimularCreditoSerializer
+from app_Credito.amortizacion import simular_cotizaciones
 from app_User.models import Perfiluser
+from app_User.tenant import get_tenant_perfil
 
 
 class HistorialCreditoView(APIView):
@@ -11,7 +14,7 @@ class HistorialCreditoView(APIView):
 
     def get(self, request):
         try:
-            perfil = Perfiluser.objects.get(usuario=request.user)
+            perfil = get_tenant_perfil(request)
         except Perfiluser.DoesNotExist:
             return Response({'error': 'Sin empresa'}, status=status.HTTP_403_FORBIDDEN)
         
@@ -55,7 +58,7 @@ class HistorialCreditoCIView(APIView):
 
     def get(self, request, ci):
         try:
-            perfil = Perfiluser.objects.get(usuario=request.user)
+            perfil = get_tenant_perfil(request)
         except Perfiluser.DoesNotExist:
             return Response({'error': 'Sin empresa'}, status=status.HTTP_403_FORBIDDEN)
         
@@ -102,7 +105,7 @@ class EstadoCreditoCIView(APIView):
 
     def get(self, request, ci):
         try:
-            perfil = Perfiluser.objects.get(usuario=request.user)
+            perfil = get_tenant_perfil(request)
         except Perfiluser.DoesNotExist:
             return Response({'error': 'Sin empresa'}, status=status.HTTP_403_FORBIDDEN)
         
@@ -127,3 +130,47 @@ class EstadoCreditoCIView(APIView):
             'moneda': c.Moneda,
             'fecha_aprobacion': c.Fecha_Aprobacion,
         }])
+
+
+class SimularCreditoView(APIView):
+    """
+    Cotizador: todas las combinaciones de montos x cuotas x tasas en un cálculo vectorizado
+
+    POST /api/Creditos/simular/
+    {"tipo_credito": 1, "montos": [1000, 5000], "cuotas": [6, 12], "tasas": [10, 12.5], "sistema": "frances"}
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        try:
+            perfil = get_tenant_perfil(request)
+        except Perfiluser.DoesNotExist:
+            return Response({'error': 'Sin empresa'}, status=status.HTTP_403_FORBIDDEN)
+
+        serializer = SimularCreditoSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        datos = serializer.validated_data
+
+        try:
+            tipo = Tipo_Credito.objects.get(id=datos['tipo_credito'], empresa=perfil.empresa)
+        except Tipo_Credito.DoesNotExist:
+            return Response({'error': 'Tipo de crédito no encontrado'}, status=status.HTTP_404_NOT_FOUND)
+
+        fuera_de_rango = [
+            str(monto) for monto in datos['montos']
+            if monto < tipo.monto_minimo or monto > tipo.monto_maximo
+        ]
+        if fuera_de_rango:
+            return Response({
+                'error': f'Montos fuera del rango del tipo de crédito ({tipo.monto_minimo} - {tipo.monto_maximo})',
+                'montos': fuera_de_rango,
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        cotizaciones = simular_cotizaciones(datos['montos'], datos['cuotas'], datos['tasas'], datos['sistema'])
+        return Response({
+            'tipo_credito': tipo.id,
+            'sistema': datos['sistema'],
+            'cantidad': len(cotizaciones),
+            'cotizaciones': cotizaciones,
+        })
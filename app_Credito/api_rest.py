@@ -1,17 +1,61 @@
-from .models import Credito, Tipo_Credito, HistoricoCredito
+from .models import Credito, Tipo_Credito, SaldoCredito
 from .serializers import (
-    CreditoSerializer, TipoCreditoSerializer, HistoricoreditoSerializer,
-    CreditoWorkflowSerializer, AgregarDocumentacionSerializer
+    CreditoSerializer, TipoCreditoSerializer, BulkTransicionSerializer, ColaRevisionReclamarSerializer,
+    ColaRevisionIdsSerializer, SaldoCreditoSerializer, PagoCreditoSerializer, RegistrarPagoSerializer
 )
-from .workflow import cambiar_fase, validar_fase_secuencial, obtener_linea_tiempo, obtener_estado_actual
+from .workflow import (
+    ConflictoFase, obtener_linea_tiempo, obtener_estado_actual, construir_estado_actual, RELACIONES_ESTADO,
+    consultas_linea_tiempo, formatear_evento, mezclar_eventos
+)
+from .maquina_estados import ejecutar_transicion, transiciones_disponibles, aplicar_transiciones_masivas
+from .pipeline import obtener_resumen
+from .amortizacion import SISTEMAS, MAX_CUOTAS, MAX_CREDITOS_DETALLE, cronograma_credito, cronograma_cartera
+from .ganancias import recalcular_ganancias
+from .pagos import registrar_pago, saldo_cartera, proximos_vencimientos
+from .cola_revision import FASE_REVISION, ReservaOcupada, SinReserva, reclamar, renovar, liberar, resumen
 from app_User.models import Perfiluser
-from app_Cliente.models import Documentacion, Trabajo, Domicilio, Garante
+from app_User.tenant import get_tenant_perfil
+from app_User.pagination import KeysetPagination
 from rest_framework import viewsets, permissions, status
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from rest_framework.exceptions import ValidationError
+from django.db import transaction
 from django.utils import timezone
-import datetime
+from django.utils.dateparse import parse_date, parse_datetime
+
+
+class LineaTiempoPagination(KeysetPagination):
+    """
+    Paginación keyset sobre (fecha_cambio, id) del histórico de un crédito.
+    Recibe las consultas de la tabla activa y del archivo; cada una aporta a lo sumo
+    una página (más una fila) y se mezclan en memoria.
+    """
+    campo = 'fecha_cambio'
+    page_size = 100
+
+    def paginate_queryset(self, querysets, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+
+        filas = mezclar_eventos(*(
+            self.aplicar_cursor(queryset.order_by(f'-{self.campo}', '-pk'), cursor)[:page_size + 1]
+            for queryset in querysets
+        ))
+
+        self.has_next = len(filas) > page_size
+        self.page = filas[:page_size]
+        return self.page
+
+
+class PagosPagination(KeysetPagination):
+    """Paginación keyset sobre (fecha_pago, id) del libro de pagos de un crédito"""
+    campo = 'fecha_pago'
+    page_size = 100
+
+    def leer_valor(self, valor):
+        return parse_date(valor)
 
 
 class TipoCreditoViewSet(viewsets.ModelViewSet):
@@ -20,9 +64,8 @@ class TipoCreditoViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         """Filtrar tipos de crédito por empresa del usuario"""
-        user = self.request.user
         try:
-            perfil = Perfiluser.objects.get(usuario=user)
+            perfil = get_tenant_perfil(self.request)
             return Tipo_Credito.objects.filter(empresa=perfil.empresa)
         except Perfiluser.DoesNotExist:
             return Tipo_Credito.objects.none()
@@ -30,7 +73,7 @@ class TipoCreditoViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         """Auto-asignar empresa al crear tipo de crédito"""
         try:
-            perfil = Perfiluser.objects.get(usuario=self.request.user)
+            perfil = get_tenant_perfil(self.request)
             serializer.save(empresa=perfil.empresa)
         except Perfiluser.DoesNotExist:
             raise ValidationError("No se encontró el perfil de usuario. Contacta al administrador.")
@@ -41,372 +84,400 @@ class CreditoViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        user = self.request.user
         try:
-            perfil = Perfiluser.objects.get(usuario=user)
-            return Credito.objects.filter(empresa=perfil.empresa)
+            perfil = get_tenant_perfil(self.request)
+            queryset = Credito.objects.filter(empresa=perfil.empresa)
+            if self.action == 'estado_actual':
+                # Crédito + cliente + documentación + trabajo + domicilio + garante en un JOIN
+                queryset = queryset.select_related(*RELACIONES_ESTADO)
+            return queryset
         except Perfiluser.DoesNotExist:
             return Credito.objects.none()
 
     def perform_create(self, serializer):
         try:
-            perfil = Perfiluser.objects.get(usuario=self.request.user)
-            serializer.save(empresa=perfil.empresa, usuario=self.request.user)
+            perfil = get_tenant_perfil(self.request)
+            # El alta y los contadores del pipeline (signals.py) se confirman juntos
+            with transaction.atomic():
+                serializer.save(empresa=perfil.empresa, usuario=self.request.user)
         except Perfiluser.DoesNotExist:
             pass
 
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+
     @action(detail=True, methods=['get'], url_path='linea-tiempo')
     def linea_tiempo(self, request, pk=None):
-        """Obtiene la línea de tiempo completa del crédito"""
+        """
+        Obtiene la línea de tiempo del crédito (del evento más reciente al más antiguo)
+        
+        ?since=<ISO 8601> devuelve solo los eventos posteriores a esa fecha.
+        Paginación keyset si se envía ?page_size=<n> (y luego ?cursor=...); sin esos
+        parámetros se devuelve la línea completa como antes.
+        """
         try:
             credito = self.get_object()
-            linea = obtener_linea_tiempo(credito)
+        except Credito.DoesNotExist:
+            return Response({'error': 'Crédito no encontrado'}, status=status.HTTP_404_NOT_FOUND)
+        
+        desde = request.query_params.get('since')
+        if desde:
+            try:
+                desde = parse_datetime(desde)
+            except ValueError:
+                desde = None
+            if desde is None:
+                return Response({'error': "Parámetro 'since' inválido (ISO 8601)"}, status=status.HTTP_400_BAD_REQUEST)
+            if timezone.is_naive(desde):
+                desde = timezone.make_aware(desde)
+        else:
+            desde = None
+        
+        if 'cursor' not in request.query_params and 'page_size' not in request.query_params:
+            linea = obtener_linea_tiempo(credito, desde)
             return Response({
                 'credito_id': credito.id,
                 'linea_tiempo': linea,
                 'total_cambios': len(linea),
             })
-        except Credito.DoesNotExist:
-            return Response({'error': 'Crédito no encontrado'}, status=status.HTTP_404_NOT_FOUND)
+        
+        paginator = LineaTiempoPagination()
+        pagina = paginator.paginate_queryset(consultas_linea_tiempo(credito, desde), request, view=self)
+        return Response({
+            'credito_id': credito.id,
+            'next': paginator.get_next_link(),
+            'linea_tiempo': [formatear_evento(evento) for evento in pagina],
+        })
 
     @action(detail=True, methods=['get'], url_path='estado-actual')
     def estado_actual(self, request, pk=None):
         """Obtiene el estado actual del crédito con información detallada"""
         try:
             credito = self.get_object()
-            estado = obtener_estado_actual(credito)
+            estado = construir_estado_actual(credito)
             return Response(estado)
         except Credito.DoesNotExist:
             return Response({'error': 'Crédito no encontrado'}, status=status.HTTP_404_NOT_FOUND)
 
-    @action(detail=True, methods=['patch'], url_path='agregar-documentacion')
-    def agregar_documentacion(self, request, pk=None):
-        """Agrega documentación y avanza a FASE_2"""
+    def aplicar_transicion(self, request, nombre):
+        """Ejecuta una transición de la máquina de estados y arma la respuesta"""
         try:
-            credito = self.get_object()
-            
-            # Validar que está en FASE_1
-            if credito.fase_actual != 'FASE_1_SOLICITUD':
-                raise ValidationError(f"Debe estar en FASE_1_SOLICITUD, actualmente está en {credito.fase_actual}")
-            
-            # Extraer datos
-            ci = request.data.get('ci')
-            documento_url = request.data.get('documento_url')
-            
-            if not all([ci, documento_url]):
-                raise ValidationError("ci y documento_url son requeridos")
-            
-            # Crear o actualizar documentación
-            doc, created = Documentacion.objects.update_or_create(
-                id_cliente=credito.cliente,
-                defaults={
-                    'ci': ci,
-                    'documento_url': documento_url,
-                    'empresa': credito.empresa,
-                }
-            )
-            
-            # Cambiar fase
-            cambiar_fase(
-                credito=credito,
-                fase_nueva='FASE_2_DOCUMENTACION',
-                usuario=request.user,
-                descripcion='Documentación personal agregada',
-                datos_agregados={'ci': ci, 'documento_url': documento_url}
-            )
+            with transaction.atomic():
+                credito = self.get_object()
+                transicion, historico = ejecutar_transicion(credito, nombre, request.data, request.user)
             
             estado = obtener_estado_actual(credito)
-            return Response({
-                'mensaje': 'Documentación agregada exitosamente',
+            respuesta = {
+                'mensaje': transicion.mensaje,
+                'transicion': transicion.nombre,
                 'fase_nueva': credito.fase_actual,
+                'estado_actual': credito.enum_estado,
                 'estado': estado,
-            }, status=status.HTTP_200_OK)
+                'transiciones_disponibles': transiciones_disponibles(credito),
+            }
+            for campo in transicion.respuesta:
+                respuesta[campo.lower()] = getattr(credito, campo)
+            return Response(respuesta, status=status.HTTP_200_OK)
             
         except Credito.DoesNotExist:
             return Response({'error': 'Crédito no encontrado'}, status=status.HTTP_404_NOT_FOUND)
         except ValidationError as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        except (ConflictoFase, ReservaOcupada, SinReserva) as e:
+            return Response({'error': str(e.detail)}, status=status.HTTP_409_CONFLICT)
 
-    @action(detail=True, methods=['patch'], url_path='agregar-laboral')
-    def agregar_laboral(self, request, pk=None):
-        """Agrega información laboral y avanza a FASE_3"""
+    @action(detail=False, methods=['get'], url_path='pipeline')
+    def pipeline(self, request):
+        """Totales del pipeline de la empresa por fase y estado (contadores precalculados)"""
         try:
-            credito = self.get_object()
-            
-            # Validar que está en FASE_2
-            if credito.fase_actual != 'FASE_2_DOCUMENTACION':
-                raise ValidationError(f"Debe completar FASE_2 primero, actualmente está en {credito.fase_actual}")
-            
-            # Extraer datos
-            cargo = request.data.get('cargo')
-            empresa = request.data.get('empresa')
-            salario = request.data.get('salario')
-            extracto_url = request.data.get('extracto_url')
-            
-            if not all([cargo, empresa, salario, extracto_url]):
-                raise ValidationError("cargo, empresa, salario y extracto_url son requeridos")
-            
-            # Crear o actualizar trabajo
-            trabajo, created = Trabajo.objects.update_or_create(
-                id_cliente=credito.cliente,
-                defaults={
-                    'cargo': cargo,
-                    'empresa': empresa,
-                    'salario': salario,
-                    'extracto_url': extracto_url,
-                    'empresa_rel': credito.empresa,
-                }
+            perfil = get_tenant_perfil(request)
+        except Perfiluser.DoesNotExist:
+            return Response({'error': 'Usuario no tiene perfil asociado'}, status=status.HTTP_403_FORBIDDEN)
+        return Response(obtener_resumen(perfil.empresa_id))
+
+    @action(detail=True, methods=['get'], url_path='cronograma')
+    def cronograma(self, request, pk=None):
+        """Cronograma de cuotas del crédito (?sistema=frances|aleman|plano)"""
+        sistema = request.query_params.get('sistema', 'frances')
+        if sistema not in SISTEMAS:
+            return Response(
+                {'error': f"Sistema inválido. Opciones: {', '.join(SISTEMAS)}"},
+                status=status.HTTP_400_BAD_REQUEST
             )
-            
-            # Cambiar fase
-            cambiar_fase(
-                credito=credito,
-                fase_nueva='FASE_3_LABORAL',
-                usuario=request.user,
-                descripcion='Información laboral agregada',
-                datos_agregados={'cargo': cargo, 'empresa': empresa, 'salario': str(salario)}
+        credito = self.get_object()
+        if not credito.Numero_Cuotas or not 0 < credito.Numero_Cuotas <= MAX_CUOTAS:
+            return Response(
+                {'error': f'El crédito no tiene un número de cuotas válido (1 a {MAX_CUOTAS})'},
+                status=status.HTTP_400_BAD_REQUEST
             )
-            
-            estado = obtener_estado_actual(credito)
+        return Response(cronograma_credito(credito, sistema))
+
+    @action(detail=False, methods=['get'], url_path='cronograma-cartera')
+    def cronograma_cartera(self, request):
+        """
+        Flujo de cuotas proyectado de la cartera de la empresa (por lotes de créditos, cada uno
+        con una consulta y un cálculo vectorizado).
+        Filtros opcionales: ?fase=, ?estado=, ?sistema=; ?detalle=1 agrega los totales por crédito
+        si los filtros dejan a lo sumo MAX_CREDITOS_DETALLE créditos.
+        """
+        sistema = request.query_params.get('sistema', 'frances')
+        if sistema not in SISTEMAS:
+            return Response(
+                {'error': f"Sistema inválido. Opciones: {', '.join(SISTEMAS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        creditos = self.get_queryset()
+        if request.query_params.get('fase'):
+            creditos = creditos.filter(fase_actual=request.query_params['fase'])
+        if request.query_params.get('estado'):
+            creditos = creditos.filter(enum_estado=request.query_params['estado'])
+        detalle = request.query_params.get('detalle') in ('1', 'true')
+        if detalle and creditos.count() > MAX_CREDITOS_DETALLE:
+            return Response(
+                {'error': f'El detalle admite hasta {MAX_CREDITOS_DETALLE} créditos; filtre por ?fase= o ?estado='},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(cronograma_cartera(creditos, sistema, detalle))
+
+    @action(detail=False, methods=['post'], url_path='recalcular-ganancias')
+    def recalcular_ganancias(self, request):
+        """
+        Recalcula la ganancia esperada (Ganancia_Credito) de todos los créditos de la empresa.
+        Solo administradores. Body opcional: {"sistema": "frances|aleman|plano"}
+        """
+        if not request.user.is_staff:
+            return Response({'error': 'No autorizado'}, status=status.HTTP_403_FORBIDDEN)
+        try:
+            perfil = get_tenant_perfil(request)
+        except Perfiluser.DoesNotExist:
+            return Response({'error': 'Usuario no tiene perfil asociado'}, status=status.HTTP_403_FORBIDDEN)
+
+        sistema = request.data.get('sistema', 'frances')
+        if sistema not in SISTEMAS:
+            return Response(
+                {'error': f"Sistema inválido. Opciones: {', '.join(SISTEMAS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(recalcular_ganancias(perfil.empresa_id, sistema=sistema))
+
+    @action(detail=True, methods=['get', 'post'], url_path='pagos')
+    def pagos(self, request, pk=None):
+        """
+        GET: estado de cuenta y libro de pagos del crédito, del más reciente al más antiguo
+        (paginado por keyset: ?page_size=<n>, 100 por defecto; luego ?cursor=...)
+        POST: registra un pago {"monto": 150.00, "fecha_pago": "2026-10-16", "referencia": "..."}.
+        Solo administradores (mueve saldos y puede finalizar el crédito).
+        """
+        if request.method == 'POST' and not request.user.is_staff:
+            return Response({'error': 'No autorizado'}, status=status.HTTP_403_FORBIDDEN)
+        credito = self.get_object()
+        if request.method == 'GET':
+            cuenta = SaldoCredito.objects.filter(credito=credito).first()
+            paginator = PagosPagination()
+            pagina = paginator.paginate_queryset(credito.pagos.all(), request, view=self)
             return Response({
-                'mensaje': 'Información laboral agregada exitosamente',
-                'fase_nueva': credito.fase_actual,
-                'estado': estado,
-            }, status=status.HTTP_200_OK)
-            
-        except Credito.DoesNotExist:
-            return Response({'error': 'Crédito no encontrado'}, status=status.HTTP_404_NOT_FOUND)
+                'cuenta': SaldoCreditoSerializer(cuenta).data if cuenta else None,
+                'next': paginator.get_next_link(),
+                'pagos': PagoCreditoSerializer(pagina, many=True).data,
+            })
+
+        serializer = RegistrarPagoSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        datos = serializer.validated_data
+        try:
+            pago, cuenta = registrar_pago(
+                credito, datos['monto'], request.user,
+                fecha_pago=datos.get('fecha_pago'),
+                referencia=datos['referencia'],
+            )
         except ValidationError as e:
-            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            return Response({'error': str(e.detail[0])}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({
+            'pago': PagoCreditoSerializer(pago).data,
+            'cuenta': SaldoCreditoSerializer(cuenta).data,
+        }, status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=['get'], url_path='saldos')
+    def saldos(self, request):
+        """Saldo pendiente de la cartera de la empresa, por moneda"""
+        try:
+            perfil = get_tenant_perfil(request)
+        except Perfiluser.DoesNotExist:
+            return Response({'error': 'Usuario no tiene perfil asociado'}, status=status.HTTP_403_FORBIDDEN)
+        return Response(saldo_cartera(perfil.empresa_id))
+
+    @action(detail=False, methods=['get'], url_path='vencimientos')
+    def vencimientos(self, request):
+        """Créditos con cuota a vencer en los próximos ?dias= días (7 por defecto), incluidas las vencidas"""
+        try:
+            perfil = get_tenant_perfil(request)
+        except Perfiluser.DoesNotExist:
+            return Response({'error': 'Usuario no tiene perfil asociado'}, status=status.HTTP_403_FORBIDDEN)
+        try:
+            dias = int(request.query_params.get('dias', 7))
+        except ValueError:
+            return Response({'error': 'dias debe ser un número entero'}, status=status.HTTP_400_BAD_REQUEST)
+
+        hoy = timezone.now().date()
+        return Response([
+            {
+                'credito_id': cuenta.credito_id,
+                'cliente': f"{cuenta.credito.cliente.nombre} {cuenta.credito.cliente.apellido}",
+                'proximo_vencimiento': cuenta.proximo_vencimiento,
+                'monto_proxima_cuota': cuenta.monto_proxima_cuota,
+                'saldo': cuenta.saldo,
+                'moneda': cuenta.moneda,
+                'vencido': cuenta.proximo_vencimiento < hoy,
+            }
+            for cuenta in proximos_vencimientos(perfil.empresa_id, dias)
+        ])
+
+    @action(detail=False, methods=['get'], url_path='cola-revision')
+    def cola_revision(self, request):
+        """Resumen de la cola de revisión y créditos reservados por el analista"""
+        try:
+            perfil = get_tenant_perfil(request)
+        except Perfiluser.DoesNotExist:
+            return Response({'error': 'Usuario no tiene perfil asociado'}, status=status.HTTP_403_FORBIDDEN)
+        
+        mios = self.get_queryset().filter(
+            fase_actual=FASE_REVISION,
+            revisor_asignado=request.user,
+            reserva_expira__gte=timezone.now()
+        ).order_by('reserva_expira')
+        return Response({
+            **resumen(perfil.empresa_id, request.user),
+            'reservados_por_mi': CreditoSerializer(mios, many=True).data,
+        })
+
+    @action(detail=False, methods=['post'], url_path='cola-revision/reclamar')
+    def reclamar_revision(self, request):
+        """
+        Reserva los siguientes N créditos pendientes de revisión para el analista
+        
+        POST /api/Creditos/creditos/cola-revision/reclamar/ {"cantidad": 5}
+        """
+        serializer = ColaRevisionReclamarSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            perfil = get_tenant_perfil(request)
+        except Perfiluser.DoesNotExist:
+            return Response({'error': 'Usuario no tiene perfil asociado'}, status=status.HTTP_403_FORBIDDEN)
+        
+        ids, expira = reclamar(perfil.empresa_id, request.user, serializer.validated_data['cantidad'])
+        creditos = Credito.objects.filter(pk__in=ids).order_by('fecha_creacion', 'id')
+        return Response({
+            'reserva_expira': expira,
+            'creditos': CreditoSerializer(creditos, many=True).data,
+        }, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['post'], url_path='cola-revision/renovar')
+    def renovar_revision(self, request):
+        """Extiende las reservas vigentes del analista: {"ids": [1, 2]}"""
+        serializer = ColaRevisionIdsSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            perfil = get_tenant_perfil(request)
+        except Perfiluser.DoesNotExist:
+            return Response({'error': 'Usuario no tiene perfil asociado'}, status=status.HTTP_403_FORBIDDEN)
+        
+        renovados = renovar(perfil.empresa_id, request.user, serializer.validated_data.get('ids', []))
+        return Response({'renovados': renovados}, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['post'], url_path='cola-revision/liberar')
+    def liberar_revision(self, request):
+        """Devuelve a la cola las reservas del analista: {"ids": [1, 2]} (sin ids: todas)"""
+        serializer = ColaRevisionIdsSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            perfil = get_tenant_perfil(request)
+        except Perfiluser.DoesNotExist:
+            return Response({'error': 'Usuario no tiene perfil asociado'}, status=status.HTTP_403_FORBIDDEN)
+        
+        liberados = liberar(perfil.empresa_id, request.user, serializer.validated_data.get('ids'))
+        return Response({'liberados': liberados}, status=status.HTTP_200_OK)
+
+    @action(detail=False, methods=['post'], url_path='bulk-transition')
+    def bulk_transition(self, request):
+        """
+        Aplica una transición a muchos créditos en una transacción
+        
+        POST /api/Creditos/creditos/bulk-transition/
+        {"ids": [1, 2, 3], "transicion": "enviar-revision"} o {"ids": [...], "fase_destino": "FASE_6_REVISION"}
+        
+        Los créditos se cargan y bloquean con una sola consulta (filtrada por empresa); los
+        válidos se escriben con bulk_update + bulk_create y se responde el resultado por id.
+        """
+        serializer = BulkTransicionSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        datos = serializer.validated_data
+        ids = datos['ids']
+        with transaction.atomic():
+            creditos = {
+                credito.id: credito
+                for credito in self.get_queryset().filter(pk__in=ids).order_by('pk').select_for_update()
+            }
+            resultados = aplicar_transiciones_masivas(
+                creditos, ids, request.user,
+                nombre=datos.get('transicion'),
+                fase_destino=datos.get('fase_destino'),
+                payload={'razon': datos['razon']},
+            )
+        
+        aplicados = sum(1 for resultado in resultados if resultado['ok'])
+        return Response({
+            'aplicados': aplicados,
+            'rechazados': len(resultados) - aplicados,
+            'resultados': resultados,
+        }, status=status.HTTP_200_OK)
+
+    @action(detail=True, methods=['patch'], url_path='transicion')
+    def transicion(self, request, pk=None):
+        """Endpoint genérico: {"transicion": "<nombre>", ...datos requeridos por la transición}"""
+        return self.aplicar_transicion(request, request.data.get('transicion'))
+
+    @action(detail=True, methods=['patch'], url_path='agregar-documentacion')
+    def agregar_documentacion(self, request, pk=None):
+        """Agrega documentación y avanza a FASE_2"""
+        return self.aplicar_transicion(request, 'agregar-documentacion')
+
+    @action(detail=True, methods=['patch'], url_path='agregar-laboral')
+    def agregar_laboral(self, request, pk=None):
+        """Agrega información laboral y avanza a FASE_3"""
+        return self.aplicar_transicion(request, 'agregar-laboral')
 
     @action(detail=True, methods=['patch'], url_path='agregar-domicilio')
     def agregar_domicilio(self, request, pk=None):
         """Agrega domicilio y avanza a FASE_4"""
-        try:
-            credito = self.get_object()
-            
-            # Validar que está en FASE_3
-            if credito.fase_actual != 'FASE_3_LABORAL':
-                raise ValidationError(f"Debe completar FASE_3 primero, actualmente está en {credito.fase_actual}")
-            
-            # Extraer datos
-            descripcion = request.data.get('descripcion')
-            croquis_url = request.data.get('croquis_url')
-            es_propietario = request.data.get('es_propietario')
-            numero_ref = request.data.get('numero_ref')
-            
-            if not all([descripcion, croquis_url, numero_ref]):
-                raise ValidationError("descripcion, croquis_url y numero_ref son requeridos")
-            
-            # Crear o actualizar domicilio
-            domicilio, created = Domicilio.objects.update_or_create(
-                id_cliente=credito.cliente,
-                defaults={
-                    'descripcion': descripcion,
-                    'croquis_url': croquis_url,
-                    'es_propietario': es_propietario,
-                    'numero_ref': numero_ref,
-                    'empresa': credito.empresa,
-                }
-            )
-            
-            # Cambiar fase
-            cambiar_fase(
-                credito=credito,
-                fase_nueva='FASE_4_DOMICILIO',
-                usuario=request.user,
-                descripcion='Domicilio agregado',
-                datos_agregados={'descripcion': descripcion, 'es_propietario': es_propietario}
-            )
-            
-            estado = obtener_estado_actual(credito)
-            return Response({
-                'mensaje': 'Domicilio agregado exitosamente',
-                'fase_nueva': credito.fase_actual,
-                'estado': estado,
-            }, status=status.HTTP_200_OK)
-            
-        except Credito.DoesNotExist:
-            return Response({'error': 'Crédito no encontrado'}, status=status.HTTP_404_NOT_FOUND)
-        except ValidationError as e:
-            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return self.aplicar_transicion(request, 'agregar-domicilio')
 
     @action(detail=True, methods=['patch'], url_path='agregar-garante')
     def agregar_garante(self, request, pk=None):
         """Agrega datos del garante y avanza a FASE_5"""
-        try:
-            credito = self.get_object()
-            
-            # Validar que está en FASE_4
-            if credito.fase_actual != 'FASE_4_DOMICILIO':
-                raise ValidationError(f"Debe completar FASE_4 primero, actualmente está en {credito.fase_actual}")
-            
-            # Obtener domicilio del cliente
-            try:
-                domicilio = Domicilio.objects.get(id_cliente=credito.cliente)
-            except Domicilio.DoesNotExist:
-                raise ValidationError("Debe completar domicilio antes de agregar garante")
-            
-            # Extraer datos
-            nombrecompleto = request.data.get('nombrecompleto')
-            ci = request.data.get('ci')
-            telefono = request.data.get('telefono')
-            
-            if not all([nombrecompleto, ci, telefono]):
-                raise ValidationError("nombrecompleto, ci y telefono son requeridos")
-            
-            # Crear o actualizar garante
-            garante, created = Garante.objects.update_or_create(
-                id_domicilio=domicilio,
-                defaults={
-                    'nombrecompleto': nombrecompleto,
-                    'ci': ci,
-                    'telefono': telefono,
-                    'empresa': credito.empresa,
-                }
-            )
-            
-            # Cambiar fase
-            cambiar_fase(
-                credito=credito,
-                fase_nueva='FASE_5_GARANTE',
-                usuario=request.user,
-                descripcion='Datos del garante agregados',
-                datos_agregados={'nombrecompleto': nombrecompleto, 'ci': ci, 'telefono': telefono}
-            )
-            
-            estado = obtener_estado_actual(credito)
-            return Response({
-                'mensaje': 'Datos del garante agregados exitosamente',
-                'fase_nueva': credito.fase_actual,
-                'estado': estado,
-            }, status=status.HTTP_200_OK)
-            
-        except Credito.DoesNotExist:
-            return Response({'error': 'Crédito no encontrado'}, status=status.HTTP_404_NOT_FOUND)
-        except ValidationError as e:
-            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return self.aplicar_transicion(request, 'agregar-garante')
 
     @action(detail=True, methods=['patch'], url_path='enviar-revision')
     def enviar_revision(self, request, pk=None):
         """Envía el crédito a revisión (FASE_6)"""
-        try:
-            credito = self.get_object()
-            
-            # Validar que está en FASE_5
-            if credito.fase_actual != 'FASE_5_GARANTE':
-                raise ValidationError(f"Debe completar todas las fases primero, actualmente está en {credito.fase_actual}")
-            
-            # Cambiar fase a revisión
-            cambiar_fase(
-                credito=credito,
-                fase_nueva='FASE_6_REVISION',
-                usuario=request.user,
-                descripcion='Solicitud de crédito enviada a revisión'
-            )
-            
-            estado = obtener_estado_actual(credito)
-            return Response({
-                'mensaje': 'Solicitud enviada a revisión exitosamente',
-                'fase_nueva': credito.fase_actual,
-                'estado': estado,
-            }, status=status.HTTP_200_OK)
-            
-        except Credito.DoesNotExist:
-            return Response({'error': 'Crédito no encontrado'}, status=status.HTTP_404_NOT_FOUND)
-        except ValidationError as e:
-            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return self.aplicar_transicion(request, 'enviar-revision')
 
     @action(detail=True, methods=['patch'], url_path='revisar')
     def revisar_credito(self, request, pk=None):
-        """Analista aprueba o rechaza el crédito (FASE_6)"""
-        try:
-            credito = self.get_object()
-            
-            # Validar que está en FASE_6
-            if credito.fase_actual != 'FASE_6_REVISION':
-                raise ValidationError(f"Solo se puede revisar créditos en FASE_6_REVISION")
-            
-            aprobado = request.data.get('aprobado')
-            razon = request.data.get('razon', '')
-            
-            if aprobado is None:
-                raise ValidationError("Campo 'aprobado' es requerido (true/false)")
-            
-            if aprobado:
-                # Aprobar: cambiar estado y avanzar a FASE_7
-                credito.enum_estado = 'Aprobado'
-                credito.Fecha_Aprobacion = timezone.now().date()
-                
-                cambiar_fase(
-                    credito=credito,
-                    fase_nueva='FASE_7_DESEMBOLSO',
-                    usuario=request.user,
-                    descripcion='Crédito aprobado'
-                )
-                
-                mensaje = 'Crédito aprobado exitosamente'
-            else:
-                # Rechazar: cambiar estado a Rechazado y mantener en FASE_6
-                credito.enum_estado = 'Rechazado'
-                credito.razon_rechazo = razon
-                credito.save()
-                
-                cambiar_fase(
-                    credito=credito,
-                    fase_nueva='FASE_6_REVISION',
-                    usuario=request.user,
-                    descripcion=f'Crédito rechazado: {razon}'
-                )
-                
-                mensaje = 'Crédito rechazado'
-            
-            estado = obtener_estado_actual(credito)
-            return Response({
-                'mensaje': mensaje,
-                'estado_actual': credito.enum_estado,
-                'fase_nueva': credito.fase_actual,
-                'estado': estado,
-            }, status=status.HTTP_200_OK)
-            
-        except Credito.DoesNotExist:
-            return Response({'error': 'Crédito no encontrado'}, status=status.HTTP_404_NOT_FOUND)
-        except ValidationError as e:
-            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        """Analista aprueba (avanza a FASE_7) o rechaza (se mantiene en FASE_6) el crédito"""
+        aprobado = request.data.get('aprobado')
+        if aprobado is None:
+            return Response({'error': str(ValidationError("Campo 'aprobado' es requerido (true/false)"))},
+                            status=status.HTTP_400_BAD_REQUEST)
+        return self.aplicar_transicion(request, 'aprobar' if aprobado else 'rechazar')
 
     @action(detail=True, methods=['patch'], url_path='desembolsar')
     def desembolsar(self, request, pk=None):
         """Realiza el desembolso del crédito (FASE_7)"""
-        try:
-            credito = self.get_object()
-            
-            # Validar que está en FASE_7 y fue aprobado
-            if credito.fase_actual != 'FASE_7_DESEMBOLSO':
-                raise ValidationError(f"Solo se puede desembolsar en FASE_7_DESEMBOLSO")
-            
-            if credito.enum_estado != 'Aprobado':
-                raise ValidationError("El crédito debe estar aprobado para desembolsar")
-            
-            # Actualizar datos de desembolso
-            credito.enum_estado = 'DESENBOLSADO'
-            credito.Fecha_Desembolso = timezone.now().date()
-            
-            cambiar_fase(
-                credito=credito,
-                fase_nueva='FASE_8_FINALIZADO',
-                usuario=request.user,
-                descripcion='Crédito desembolsado exitosamente'
-            )
-            
-            estado = obtener_estado_actual(credito)
-            return Response({
-                'mensaje': 'Crédito desembolsado exitosamente',
-                'estado_actual': credito.enum_estado,
-                'fecha_desembolso': credito.Fecha_Desembolso,
-                'estado': estado,
-            }, status=status.HTTP_200_OK)
-            
-        except Credito.DoesNotExist:
-            return Response({'error': 'Crédito no encontrado'}, status=status.HTTP_404_NOT_FOUND)
-        except ValidationError as e:
-            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return self.aplicar_transicion(request, 'desembolsar')
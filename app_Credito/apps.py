@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class AppCreditoConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'app_Credito'
+
+    def ready(self):
+        from . import signals  # noqa: F401
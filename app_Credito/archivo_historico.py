@@ -0,0 +1,67 @@
+"""
+Archivo del histórico de créditos cerrados.
+
+HistoricoCredito crece con cada cambio de fase (más el JSON de datos_agregados). El
+histórico de los créditos en un estado terminal (FINALIZADO: saldo cancelado, ver
+pagos.py) sin cambios en los últimos N días se mueve por lotes a
+HistoricoCreditoArchivo, de modo que la tabla activa y su índice quedan pequeños. La
+línea de tiempo lee ambas tablas (workflow.consultas_linea_tiempo).
+
+Cada lote copia y borra en la misma transacción, conservando el id original; si un
+lote se reintenta tras un fallo, las filas ya copiadas se ignoran.
+"""
+from datetime import timedelta
+from django.db import transaction
+from django.utils import timezone
+from .models import HistoricoCredito, HistoricoCreditoArchivo
+
+
+# FASE_8_FINALIZADO se alcanza al desembolsar: un crédito en esa fase puede seguir en
+# cobranza, por eso se filtra por estado y no por fase. Rechazado no es terminal: el
+# crédito sigue en FASE_6_REVISION y todavía puede aprobarse.
+ESTADOS_TERMINALES = ('FINALIZADO',)
+CAMPOS = (
+    'id', 'credito_id', 'fase_anterior', 'fase_nueva', 'fecha_cambio',
+    'usuario_cambio_id', 'descripcion', 'datos_agregados',
+)
+
+
+def pendientes_de_archivo(dias):
+    """Histórico de créditos en estado terminal sin cambios desde hace más de `dias` días"""
+    corte = timezone.now() - timedelta(days=dias)
+    return HistoricoCredito.objects.filter(
+        credito__enum_estado__in=ESTADOS_TERMINALES,
+        credito__fecha_actualizacion__lt=corte,
+    )
+
+
+def archivar_lote(dias, batch_size):
+    """Mover un lote; devuelve la cantidad de filas movidas (0 si no quedan)"""
+    with transaction.atomic():
+        filas = list(pendientes_de_archivo(dias).order_by('id').values(*CAMPOS)[:batch_size])
+        if not filas:
+            return 0
+        HistoricoCreditoArchivo.objects.bulk_create(
+            [HistoricoCreditoArchivo(**fila) for fila in filas],
+            ignore_conflicts=True,
+        )
+        HistoricoCredito.objects.filter(id__in=[fila['id'] for fila in filas]).delete()
+    return len(filas)
+
+
+def archivar_historico(dias=90, batch_size=1000, max_lotes=None):
+    """
+    Mover por lotes el histórico de créditos cerrados (finalizados) al archivo
+
+    Returns:
+        Total de filas movidas
+    """
+    total = 0
+    lotes = 0
+    while max_lotes is None or lotes < max_lotes:
+        movidas = archivar_lote(dias, batch_size)
+        if not movidas:
+            break
+        total += movidas
+        lotes += 1
+    return total
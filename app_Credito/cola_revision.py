@@ -0,0 +1,128 @@
+"""
+Cola de trabajo para la revisión de créditos (FASE_6_REVISION).
+
+Cada analista reclama los siguientes N créditos pendientes con
+SELECT ... FOR UPDATE SKIP LOCKED: las filas que otro analista está reclamando en ese
+momento se saltan en lugar de esperar, y las ya reservadas (lease vigente) quedan
+fuera del filtro. La reserva vence sola (settings.CREDITO_COLA_REVISION['LEASE']), por
+lo que un analista que abandona la sesión no bloquea créditos. Solo el analista con
+la reserva vigente puede aprobar o rechazar, y hacerlo libera la reserva (ver
+maquina_estados).
+"""
+from datetime import timedelta
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from .models import Credito
+
+
+DEFAULTS = {
+    'LEASE': 900,  # segundos
+    'MAX_RECLAMO': 50,
+    'REQUERIR_RESERVA': True,
+}
+
+FASE_REVISION = 'FASE_6_REVISION'
+
+
+class ReservaOcupada(APIException):
+    """Otro analista tiene reservado el crédito"""
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'El crédito está reservado por otro analista.'
+    default_code = 'reserva_ocupada'
+
+
+class SinReserva(APIException):
+    """El analista no tiene una reserva vigente sobre el crédito"""
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'Debe reclamar el crédito desde la cola de revisión antes de revisarlo.'
+    default_code = 'sin_reserva'
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'CREDITO_COLA_REVISION', {})}
+
+
+def pendientes(empresa_id, ahora=None):
+    """Créditos en revisión, no rechazados y sin reserva vigente"""
+    ahora = ahora or timezone.now()
+    return (
+        Credito.objects
+        .filter(empresa_id=empresa_id, fase_actual=FASE_REVISION)
+        .exclude(enum_estado='Rechazado')
+        .filter(Q(reserva_expira__isnull=True) | Q(reserva_expira__lt=ahora))
+    )
+
+
+def reserva_vigente(credito, ahora=None):
+    return credito.reserva_expira is not None and credito.reserva_expira >= (ahora or timezone.now())
+
+
+def validar_reserva(credito, usuario):
+    """
+    Lanzar ReservaOcupada si otro analista tiene una reserva vigente sobre el crédito, o
+    SinReserva si el usuario no la tiene (salvo con REQUERIR_RESERVA deshabilitado)
+    """
+    vigente = reserva_vigente(credito)
+    if vigente and credito.revisor_asignado_id != usuario.id:
+        raise ReservaOcupada()
+    if not vigente and get_config()['REQUERIR_RESERVA']:
+        raise SinReserva()
+
+
+def reclamar(empresa_id, usuario, cantidad):
+    """
+    Reservar para el analista los siguientes `cantidad` créditos pendientes (FIFO)
+
+    Returns:
+        (ids reservados, fecha de expiración de la reserva)
+    """
+    cantidad = min(cantidad, get_config()['MAX_RECLAMO'])
+    ahora = timezone.now()
+    expira = ahora + timedelta(seconds=get_config()['LEASE'])
+
+    with transaction.atomic():
+        candidatos = pendientes(empresa_id, ahora).order_by('fecha_creacion', 'id')
+        if connection.features.has_select_for_update_skip_locked:
+            candidatos = candidatos.select_for_update(skip_locked=True)
+        ids = list(candidatos.values_list('id', flat=True)[:cantidad])
+        if ids:
+            Credito.objects.filter(pk__in=ids).update(revisor_asignado=usuario, reserva_expira=expira)
+    return ids, expira
+
+
+def renovar(empresa_id, usuario, ids):
+    """Extender las reservas vigentes del analista; devuelve la cantidad renovada"""
+    ahora = timezone.now()
+    return (
+        Credito.objects
+        .filter(empresa_id=empresa_id, pk__in=ids, revisor_asignado=usuario, reserva_expira__gte=ahora)
+        .update(reserva_expira=ahora + timedelta(seconds=get_config()['LEASE']))
+    )
+
+
+def liberar(empresa_id, usuario, ids=None):
+    """Devolver a la cola las reservas del analista (todas si no se indican ids)"""
+    reservas = Credito.objects.filter(empresa_id=empresa_id, revisor_asignado=usuario)
+    if ids is not None:
+        reservas = reservas.filter(pk__in=ids)
+    return reservas.update(revisor_asignado=None, reserva_expira=None)
+
+
+def resumen(empresa_id, usuario):
+    """Pendientes, reservados (vigentes) y reservados por el analista, en una consulta"""
+    ahora = timezone.now()
+    vigente = Q(reserva_expira__gte=ahora)
+    return (
+        Credito.objects
+        .filter(empresa_id=empresa_id, fase_actual=FASE_REVISION)
+        .exclude(enum_estado='Rechazado')
+        .aggregate(
+            pendientes=Count('id', filter=~vigente | Q(reserva_expira__isnull=True)),
+            reservados=Count('id', filter=vigente),
+            mios=Count('id', filter=vigente & Q(revisor_asignado=usuario)),
+        )
+    )
@@ -0,0 +1,102 @@
+"""
+Recalculo de la ganancia esperada (Ganancia_Credito) a partir de las condiciones de
+cada crédito.
+
+La ganancia esperada es el interés total del cronograma (amortizacion.py), de modo que
+coincide con lo que muestra creditos/{id}/cronograma/. Los créditos se recorren por
+lotes ordenados por id; cada lote es una consulta de values_list, un cálculo vectorizado
+y la escritura con bulk_update (filas existentes) + bulk_create (créditos sin fila).
+
+Los créditos cuyo interés total no entra en ganacia_esperada (DecimalField de 10 dígitos)
+se omiten y se informan, en lugar de abortar el lote con un DataError.
+"""
+from django.db import transaction
+from .amortizacion import MAX_CUOTAS, a_centavos, calcular_cronogramas, centavos_a_texto, fecha_inicio_credito
+from .models import Credito, Ganancia_Credito
+
+
+CAMPOS_CREDITO = (
+    'id', 'cliente_id', 'Monto_Solicitado', 'Tasa_Interes', 'Numero_Cuotas', 'Fecha_Desembolso', 'fecha_creacion',
+)
+CAMPOS_GANANCIA = ('monto_prestado', 'tasa_interes', 'duracion_meses', 'ganacia_esperada', 'Cliente')
+# Mayor ganacia_esperada representable, en centavos (decimal_places=2)
+MAX_GANANCIA_CENTAVOS = 10 ** Ganancia_Credito._meta.get_field('ganacia_esperada').max_digits - 1
+
+
+def recalcular_lote(filas, sistema='frances'):
+    """
+    Recalcular y guardar las ganancias de un lote de créditos
+
+    Args:
+        filas: Tuplas con CAMPOS_CREDITO (créditos con Numero_Cuotas entre 1 y MAX_CUOTAS)
+
+    Returns:
+        (creados, actualizados, ids de los créditos omitidos por desborde)
+    """
+    cronogramas = calcular_cronogramas(
+        [a_centavos(fila[2]) for fila in filas],
+        [float(fila[3]) for fila in filas],
+        [fila[4] for fila in filas],
+        [fecha_inicio_credito(fila[5], fila[6]) for fila in filas],
+        sistema,
+    )
+    intereses = cronogramas.totales()['total_interes']
+
+    # Si un crédito tiene varias filas (cargadas a mano), se actualiza la primera
+    existentes = {}
+    for ganancia_id, credito_id in (
+        Ganancia_Credito.objects
+        .filter(Credito_id__in=[fila[0] for fila in filas])
+        .order_by('-id')
+        .values_list('id', 'Credito_id')
+    ):
+        existentes[credito_id] = ganancia_id
+
+    nuevas, actualizadas, omitidos = [], [], []
+    for fila, interes in zip(filas, intereses):
+        credito_id, cliente_id, monto, tasa, cuotas = fila[:5]
+        if interes > MAX_GANANCIA_CENTAVOS:
+            omitidos.append(credito_id)
+            continue
+        ganancia = Ganancia_Credito(
+            id=existentes.get(credito_id),
+            Credito_id=credito_id,
+            Cliente_id=cliente_id,
+            monto_prestado=monto,
+            tasa_interes=tasa,
+            duracion_meses=cuotas,
+            ganacia_esperada=centavos_a_texto(interes),
+        )
+        (actualizadas if ganancia.id else nuevas).append(ganancia)
+
+    with transaction.atomic():
+        Ganancia_Credito.objects.bulk_create(nuevas)
+        Ganancia_Credito.objects.bulk_update(actualizadas, CAMPOS_GANANCIA)
+    return len(nuevas), len(actualizadas), omitidos
+
+
+def recalcular_ganancias(empresa_id=None, batch_size=2000, sistema='frances'):
+    """
+    Recalcular la ganancia esperada de todos los créditos (de una empresa o de todas)
+
+    Returns:
+        Dict con la cantidad de créditos procesados, filas creadas y actualizadas y los
+        ids de los créditos omitidos porque su ganancia no entra en ganacia_esperada
+    """
+    creditos = Credito.objects.filter(Numero_Cuotas__gt=0, Numero_Cuotas__lte=MAX_CUOTAS)
+    if empresa_id is not None:
+        creditos = creditos.filter(empresa_id=empresa_id)
+
+    resultado = {'creditos': 0, 'creados': 0, 'actualizados': 0, 'omitidos': []}
+    ultimo_id = 0
+    while True:
+        filas = list(creditos.filter(id__gt=ultimo_id).order_by('id').values_list(*CAMPOS_CREDITO)[:batch_size])
+        if not filas:
+            break
+        creados, actualizados, omitidos = recalcular_lote(filas, sistema)
+        resultado['creditos'] += len(filas)
+        resultado['creados'] += creados
+        resultado['actualizados'] += actualizados
+        resultado['omitidos'].extend(omitidos)
+        ultimo_id = filas[-1][0]
+    return resultado
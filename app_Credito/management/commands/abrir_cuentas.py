@@ -0,0 +1,32 @@
+"""
+Abre la cuenta de pagos (SaldoCredito) de los créditos desembolsados que no la tienen,
+por ejemplo los desembolsados antes de existir el libro de pagos (ver pagos.py).
+
+Uso:
+    python manage.py abrir_cuentas [--empresa 3] [--batch-size 1000] [--sistema frances]
+"""
+from django.core.management.base import BaseCommand, CommandError
+from app_Credito.amortizacion import SISTEMAS
+from app_Credito.pagos import abrir_cuentas_pendientes
+
+
+class Command(BaseCommand):
+    help = 'Abre por lotes las cuentas de pagos de los créditos desembolsados sin cuenta'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--empresa', type=int, default=None)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--sistema', choices=SISTEMAS, default='frances')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] <= 0:
+            raise CommandError('--batch-size debe ser mayor que 0')
+
+        resultado = abrir_cuentas_pendientes(options['empresa'], options['batch_size'], options['sistema'])
+        abiertas = resultado['creditos'] - len(resultado['omitidos'])
+        self.stdout.write(self.style.SUCCESS(f"Cuentas abiertas: {abiertas}"))
+        if resultado['omitidos']:
+            self.stdout.write(self.style.WARNING(
+                f"Omitidos (el total a pagar supera total_pagar): {len(resultado['omitidos'])} créditos, "
+                f"ids: {', '.join(map(str, resultado['omitidos']))}"
+            ))
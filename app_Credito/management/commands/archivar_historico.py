@@ -0,0 +1,30 @@
+"""
+Mueve al archivo el histórico de los créditos finalizados (ver archivo_historico.py).
+
+Uso (p. ej. desde cron, fuera de horario pico):
+    python manage.py archivar_historico --dias 90 --batch-size 1000 [--max-lotes 50] [--dry-run]
+"""
+from django.core.management.base import BaseCommand, CommandError
+from app_Credito.archivo_historico import archivar_historico, pendientes_de_archivo
+
+
+class Command(BaseCommand):
+    help = 'Mueve por lotes el histórico de créditos finalizados a la tabla de archivo'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, default=90)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument('--max-lotes', type=int, default=None)
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        if options['dias'] < 0 or options['batch_size'] <= 0:
+            raise CommandError('--dias debe ser >= 0 y --batch-size mayor que 0')
+
+        if options['dry_run']:
+            total = pendientes_de_archivo(options['dias']).count()
+            self.stdout.write(f"Filas a archivar: {total}")
+            return
+
+        total = archivar_historico(options['dias'], options['batch_size'], options['max_lotes'])
+        self.stdout.write(self.style.SUCCESS(f"Filas archivadas: {total}"))
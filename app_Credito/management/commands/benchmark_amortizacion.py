@@ -0,0 +1,92 @@
+"""
+Benchmark del motor de amortización: calcula cronogramas de una cartera sintética con
+el cálculo vectorizado (amortizacion.calcular_cronogramas) y con un bucle de Python
+por cuota, sobre una muestra, para comparar.
+
+Uso:
+    python manage.py benchmark_amortizacion --creditos 100000 --cuotas-max 60 [--muestra 2000] [--sistema frances]
+"""
+import calendar
+import datetime
+import time
+import numpy as np
+from django.core.management.base import BaseCommand, CommandError
+from app_Credito.amortizacion import SISTEMAS, MAX_CUOTAS, calcular_cronogramas
+
+
+def vencimiento(fecha, meses):
+    mes = fecha.month - 1 + meses
+    anio, mes = fecha.year + mes // 12, mes % 12 + 1
+    return datetime.date(anio, mes, min(fecha.day, calendar.monthrange(anio, mes)[1]))
+
+
+def cronograma_bucle(monto, tasa_anual, cuotas, fecha, sistema):
+    """Cronograma cuota por cuota en Python puro (centavos), solo para comparar"""
+    r = tasa_anual / 100 / 12
+    saldo = monto
+    filas = []
+    if sistema == 'frances':
+        cuota_fija = round(monto * r / (1 - (1 + r) ** -cuotas)) if r > 0 else round(monto / cuotas)
+    for numero in range(1, cuotas + 1):
+        if sistema == 'frances':
+            interes = round(saldo * r)
+            capital = cuota_fija - interes
+        else:
+            capital = monto // cuotas
+            interes = round((saldo if sistema == 'aleman' else monto) * r)
+        if numero == cuotas:
+            capital = saldo
+        saldo -= capital
+        filas.append((numero, vencimiento(fecha, numero), capital + interes, capital, interes, saldo))
+    return filas
+
+
+class Command(BaseCommand):
+    help = 'Mide cronogramas/segundo del cálculo vectorizado frente a un bucle de Python'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--creditos', type=int, default=100000)
+        parser.add_argument('--cuotas-max', type=int, default=60)
+        parser.add_argument('--muestra', type=int, default=2000)
+        parser.add_argument('--sistema', choices=SISTEMAS, default='frances')
+        parser.add_argument('--semilla', type=int, default=0)
+
+    def handle(self, *args, **options):
+        total, cuotas_max = options['creditos'], options['cuotas_max']
+        if total <= 0 or not 0 < cuotas_max <= MAX_CUOTAS:
+            raise CommandError(f'--creditos debe ser mayor que 0 y --cuotas-max estar entre 1 y {MAX_CUOTAS}')
+
+        generador = np.random.default_rng(options['semilla'])
+        montos = generador.integers(100_00, 100_000_00, size=total, dtype=np.int64)
+        tasas = generador.integers(0, 9000, size=total) / 100
+        cuotas = generador.integers(1, cuotas_max + 1, size=total, dtype=np.int64)
+        fechas = np.datetime64('2025-01-01') + generador.integers(0, 365, size=total).astype('timedelta64[D]')
+        sistema = options['sistema']
+
+        inicio = time.perf_counter()
+        cronogramas = calcular_cronogramas(montos, tasas, cuotas, fechas, sistema)
+        cronogramas.totales()
+        duracion = time.perf_counter() - inicio
+        self.stdout.write(
+            f"{'vectorial':<10} {total / duracion:12.0f} créditos/s  {duracion * 1000:9.1f} ms  "
+            f"({int(cuotas.sum())} cuotas)"
+        )
+
+        muestra = min(options['muestra'], total)
+        inicio = time.perf_counter()
+        fechas_muestra = fechas[:muestra].tolist()
+        for i in range(muestra):
+            cronograma_bucle(int(montos[i]), float(tasas[i]), int(cuotas[i]), fechas_muestra[i], sistema)
+        duracion_bucle = time.perf_counter() - inicio
+        self.stdout.write(
+            f"{'bucle':<10} {muestra / duracion_bucle:12.0f} créditos/s  "
+            f"{duracion_bucle / muestra * total * 1000:9.1f} ms (estimado para {total})"
+        )
+
+        # Control: el capital de cada crédito suma exactamente el monto
+        capital = np.add.reduceat(cronogramas.capital, cronogramas.inicio)
+        if not np.array_equal(capital, montos):
+            raise CommandError('El capital amortizado no coincide con el monto prestado')
+        self.stdout.write(self.style.SUCCESS(
+            f"Aceleración: x{(duracion_bucle / muestra * total) / duracion:.1f}"
+        ))
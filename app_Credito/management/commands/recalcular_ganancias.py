@@ -0,0 +1,34 @@
+"""
+Recalcula Ganancia_Credito.ganacia_esperada desde las condiciones de los créditos
+(ver ganancias.py).
+
+Uso:
+    python manage.py recalcular_ganancias [--empresa 3] [--batch-size 2000] [--sistema frances]
+"""
+from django.core.management.base import BaseCommand, CommandError
+from app_Credito.amortizacion import SISTEMAS
+from app_Credito.ganancias import recalcular_ganancias
+
+
+class Command(BaseCommand):
+    help = 'Recalcula por lotes la ganancia esperada de los créditos de una empresa (o de todas)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--empresa', type=int, default=None)
+        parser.add_argument('--batch-size', type=int, default=2000)
+        parser.add_argument('--sistema', choices=SISTEMAS, default='frances')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] <= 0:
+            raise CommandError('--batch-size debe ser mayor que 0')
+
+        resultado = recalcular_ganancias(options['empresa'], options['batch_size'], options['sistema'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Créditos: {resultado['creditos']}  creadas: {resultado['creados']}  "
+            f"actualizadas: {resultado['actualizados']}"
+        ))
+        if resultado['omitidos']:
+            self.stdout.write(self.style.WARNING(
+                f"Omitidos (la ganancia supera ganacia_esperada): {len(resultado['omitidos'])} créditos, "
+                f"ids: {', '.join(map(str, resultado['omitidos']))}"
+            ))
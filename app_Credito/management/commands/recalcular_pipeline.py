@@ -0,0 +1,19 @@
+"""
+Reconstruye los contadores del pipeline (ResumenPipeline) desde la tabla de créditos.
+
+Uso:
+    python manage.py recalcular_pipeline [--empresa 3]
+"""
+from django.core.management.base import BaseCommand
+from app_Credito.pipeline import recalcular
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye los contadores del pipeline por empresa, fase y estado'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--empresa', type=int, default=None)
+
+    def handle(self, *args, **options):
+        recalcular(options['empresa'])
+        self.stdout.write(self.style.SUCCESS('Contadores del pipeline recalculados'))
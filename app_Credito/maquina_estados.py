@@ -0,0 +1,405 @@
+"""
+Máquina de estados del workflow de créditos, definida como tabla.
+
+Cada fila de TABLA_TRANSICIONES declara: fase de origen, fase destino, datos
+requeridos/opcionales del payload, estado requerido y el efecto (upsert de los datos
+del cliente y/o campos del crédito a persistir). La tabla se compila al importar en
+diccionarios, por lo que buscar y validar una transición es O(1); agregar una fase o
+transición es agregar una fila, sin nuevos endpoints.
+"""
+from django.core.exceptions import ImproperlyConfigured
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from app_Cliente.models import Documentacion, Trabajo, Domicilio, Garante
+from .models import Credito, HistoricoCredito
+from .workflow import cambiar_fase, POSICION_FASE
+from .pipeline import nuevos_deltas, acumular, aplicar_deltas
+from .cola_revision import ReservaOcupada, SinReserva, validar_reserva
+from .pagos import abrir_cuentas, validar_cuenta
+
+
+class Transicion:
+    """Fila de la tabla de transiciones"""
+
+    def __init__(self, nombre, origen, destino, descripcion, mensaje, requeridos=(), opcionales=None,
+                 efecto=None, estado_requerido=None, error_fase=None, error_estado=None, respuesta=(),
+                 masiva=False, usa_reserva=False, posterior=None, verificacion=None):
+        self.nombre = nombre
+        self.origen = origen
+        self.destino = destino
+        self.descripcion = descripcion
+        self.mensaje = mensaje
+        self.requeridos = tuple(requeridos)
+        self.opcionales = opcionales or {}
+        self.efecto = efecto or sin_efecto
+        self.estado_requerido = estado_requerido
+        self.error_fase = error_fase or 'Debe estar en {origen}, actualmente está en {fase}'
+        self.error_estado = error_estado or 'El crédito debe estar en estado {estado}'
+        self.respuesta = tuple(respuesta)
+        # Solo las transiciones sin upserts de datos del cliente se aplican en lote
+        self.masiva = masiva
+        # Transiciones de la cola de revisión: exigen y liberan la reserva del analista
+        self.usa_reserva = usa_reserva
+        # Acción sobre los créditos ya guardados (recibe una lista; en lote se llama una vez)
+        self.posterior = posterior
+        # Validación adicional del crédito en memoria (lanza ValidationError), antes del efecto
+        self.verificacion = verificacion
+
+    def __repr__(self):
+        return f"<Transicion {self.nombre}: {self.origen} -> {self.destino}>"
+
+    def extraer_datos(self, payload):
+        """Tomar del payload los campos requeridos y opcionales (con sus valores por defecto)"""
+        datos = {campo: payload.get(campo) for campo in self.requeridos}
+        if not all(datos.values()):
+            raise ValidationError(f"{requeridos_texto(self.requeridos)} son requeridos")
+        for campo, defecto in self.opcionales.items():
+            datos[campo] = payload.get(campo, defecto)
+        return datos
+
+    def validar(self, credito, usuario):
+        """Validar fase, estado, reserva y verificación adicional del crédito en memoria"""
+        if credito.fase_actual != self.origen:
+            raise ValidationError(self.error_fase.format(origen=self.origen, fase=credito.fase_actual))
+        if self.estado_requerido is not None and credito.enum_estado != self.estado_requerido:
+            raise ValidationError(self.error_estado.format(estado=self.estado_requerido))
+        if self.usa_reserva:
+            validar_reserva(credito, usuario)
+        if self.verificacion is not None:
+            self.verificacion(credito)
+
+    def aplicar_efecto(self, credito, datos):
+        """Ejecutar el efecto; devuelve (datos_agregados, campos del crédito a guardar)"""
+        datos_agregados, campos = self.efecto(credito, datos)
+        if self.usa_reserva:
+            credito.revisor_asignado = None
+            credito.reserva_expira = None
+            campos = (*campos, 'revisor_asignado', 'reserva_expira')
+        return datos_agregados, campos
+
+
+def requeridos_texto(campos):
+    if len(campos) == 1:
+        return campos[0]
+    return f"{', '.join(campos[:-1])} y {campos[-1]}"
+
+
+# Efectos: reciben el crédito y los datos extraídos; devuelven (datos_agregados, campos del crédito a guardar)
+
+def sin_efecto(credito, datos):
+    return {}, ()
+
+
+def guardar_documentacion(credito, datos):
+    Documentacion.objects.update_or_create(
+        id_cliente_id=credito.cliente_id,
+        defaults={
+            'ci': datos['ci'],
+            'documento_url': datos['documento_url'],
+            'empresa_id': credito.empresa_id,
+        }
+    )
+    return {'ci': datos['ci'], 'documento_url': datos['documento_url']}, ()
+
+
+def guardar_laboral(credito, datos):
+    Trabajo.objects.update_or_create(
+        id_cliente_id=credito.cliente_id,
+        defaults={
+            'cargo': datos['cargo'],
+            'empresa': datos['empresa'],
+            'salario': datos['salario'],
+            'extracto_url': datos['extracto_url'],
+            'empresa_rel_id': credito.empresa_id,
+        }
+    )
+    return {'cargo': datos['cargo'], 'empresa': datos['empresa'], 'salario': str(datos['salario'])}, ()
+
+
+def guardar_domicilio(credito, datos):
+    Domicilio.objects.update_or_create(
+        id_cliente_id=credito.cliente_id,
+        defaults={
+            'descripcion': datos['descripcion'],
+            'croquis_url': datos['croquis_url'],
+            'es_propietario': datos['es_propietario'],
+            'numero_ref': datos['numero_ref'],
+            'empresa_id': credito.empresa_id,
+        }
+    )
+    return {'descripcion': datos['descripcion'], 'es_propietario': datos['es_propietario']}, ()
+
+
+def guardar_garante(credito, datos):
+    domicilio_id = Domicilio.objects.filter(id_cliente_id=credito.cliente_id).values_list('id', flat=True).first()
+    if domicilio_id is None:
+        raise ValidationError("Debe completar domicilio antes de agregar garante")
+    Garante.objects.update_or_create(
+        id_domicilio_id=domicilio_id,
+        defaults={
+            'nombrecompleto': datos['nombrecompleto'],
+            'ci': datos['ci'],
+            'telefono': datos['telefono'],
+            'empresa_id': credito.empresa_id,
+        }
+    )
+    return {'nombrecompleto': datos['nombrecompleto'], 'ci': datos['ci'], 'telefono': datos['telefono']}, ()
+
+
+def aprobar(credito, datos):
+    credito.enum_estado = 'Aprobado'
+    credito.Fecha_Aprobacion = timezone.now().date()
+    return {}, ('enum_estado', 'Fecha_Aprobacion')
+
+
+def rechazar(credito, datos):
+    credito.enum_estado = 'Rechazado'
+    credito.razon_rechazo = datos['razon']
+    return {}, ('enum_estado', 'razon_rechazo')
+
+
+def desembolsar(credito, datos):
+    credito.enum_estado = 'DESENBOLSADO'
+    credito.Fecha_Desembolso = timezone.now().date()
+    return {}, ('enum_estado', 'Fecha_Desembolso')
+
+
+TABLA_TRANSICIONES = (
+    Transicion(
+        'agregar-documentacion', 'FASE_1_SOLICITUD', 'FASE_2_DOCUMENTACION',
+        descripcion='Documentación personal agregada',
+        mensaje='Documentación agregada exitosamente',
+        requeridos=('ci', 'documento_url'),
+        efecto=guardar_documentacion,
+        error_fase='Debe estar en FASE_1_SOLICITUD, actualmente está en {fase}',
+    ),
+    Transicion(
+        'agregar-laboral', 'FASE_2_DOCUMENTACION', 'FASE_3_LABORAL',
+        descripcion='Información laboral agregada',
+        mensaje='Información laboral agregada exitosamente',
+        requeridos=('cargo', 'empresa', 'salario', 'extracto_url'),
+        efecto=guardar_laboral,
+        error_fase='Debe completar FASE_2 primero, actualmente está en {fase}',
+    ),
+    Transicion(
+        'agregar-domicilio', 'FASE_3_LABORAL', 'FASE_4_DOMICILIO',
+        descripcion='Domicilio agregado',
+        mensaje='Domicilio agregado exitosamente',
+        requeridos=('descripcion', 'croquis_url', 'numero_ref'),
+        opcionales={'es_propietario': None},
+        efecto=guardar_domicilio,
+        error_fase='Debe completar FASE_3 primero, actualmente está en {fase}',
+    ),
+    Transicion(
+        'agregar-garante', 'FASE_4_DOMICILIO', 'FASE_5_GARANTE',
+        descripcion='Datos del garante agregados',
+        mensaje='Datos del garante agregados exitosamente',
+        requeridos=('nombrecompleto', 'ci', 'telefono'),
+        efecto=guardar_garante,
+        error_fase='Debe completar FASE_4 primero, actualmente está en {fase}',
+    ),
+    Transicion(
+        'enviar-revision', 'FASE_5_GARANTE', 'FASE_6_REVISION',
+        descripcion='Solicitud de crédito enviada a revisión',
+        mensaje='Solicitud enviada a revisión exitosamente',
+        masiva=True,
+        error_fase='Debe completar todas las fases primero, actualmente está en {fase}',
+    ),
+    Transicion(
+        'aprobar', 'FASE_6_REVISION', 'FASE_7_DESEMBOLSO',
+        descripcion='Crédito aprobado',
+        mensaje='Crédito aprobado exitosamente',
+        efecto=aprobar,
+        masiva=True,
+        usa_reserva=True,
+        error_fase='Solo se puede revisar créditos en FASE_6_REVISION',
+    ),
+    Transicion(
+        'rechazar', 'FASE_6_REVISION', 'FASE_6_REVISION',
+        descripcion='Crédito rechazado: {razon}',
+        mensaje='Crédito rechazado',
+        opcionales={'razon': ''},
+        efecto=rechazar,
+        masiva=True,
+        usa_reserva=True,
+        error_fase='Solo se puede revisar créditos en FASE_6_REVISION',
+    ),
+    Transicion(
+        'desembolsar', 'FASE_7_DESEMBOLSO', 'FASE_8_FINALIZADO',
+        descripcion='Crédito desembolsado exitosamente',
+        mensaje='Crédito desembolsado exitosamente',
+        efecto=desembolsar,
+        estado_requerido='Aprobado',
+        error_fase='Solo se puede desembolsar en FASE_7_DESEMBOLSO',
+        error_estado='El crédito debe estar aprobado para desembolsar',
+        respuesta=('Fecha_Desembolso',),
+        masiva=True,
+        posterior=abrir_cuentas,
+        verificacion=validar_cuenta,
+    ),
+)
+
+
+def compilar(tabla):
+    """Indexar la tabla por nombre, por fase de origen y por (origen, destino), validando las fases"""
+    transiciones = {}
+    salidas = {fase: [] for fase in POSICION_FASE}
+    por_destino = {}
+    for transicion in tabla:
+        for fase in (transicion.origen, transicion.destino):
+            if fase not in POSICION_FASE:
+                raise ImproperlyConfigured(f"{transicion!r}: fase desconocida {fase}")
+        if transicion.nombre in transiciones:
+            raise ImproperlyConfigured(f"Transición duplicada: {transicion.nombre}")
+        transiciones[transicion.nombre] = transicion
+        salidas[transicion.origen].append(transicion.nombre)
+        # Las transiciones que no cambian de fase (rechazar) solo se piden por nombre
+        if transicion.origen != transicion.destino:
+            clave = (transicion.origen, transicion.destino)
+            if clave in por_destino:
+                raise ImproperlyConfigured(f"Más de una transición {clave[0]} -> {clave[1]}")
+            por_destino[clave] = transicion
+    return transiciones, {fase: tuple(nombres) for fase, nombres in salidas.items()}, por_destino
+
+
+TRANSICIONES, SALIDAS_POR_FASE, TRANSICION_POR_DESTINO = compilar(TABLA_TRANSICIONES)
+
+
+def obtener_transicion(nombre):
+    try:
+        return TRANSICIONES[nombre]
+    except (KeyError, TypeError):
+        raise ValidationError(f"Transición desconocida: {nombre}. Opciones: {', '.join(TRANSICIONES)}")
+
+
+def transicion_hacia(fase_actual, fase_destino):
+    try:
+        return TRANSICION_POR_DESTINO[(fase_actual, fase_destino)]
+    except KeyError:
+        raise ValidationError(f"No hay transición de {fase_actual} a {fase_destino}")
+
+
+def transiciones_disponibles(credito):
+    """Nombres de las transiciones que salen de la fase actual del crédito"""
+    return SALIDAS_POR_FASE.get(credito.fase_actual, ())
+
+
+def ejecutar_transicion(credito, nombre, payload, usuario):
+    """
+    Validar y aplicar una transición sobre un crédito (el llamador abre la transacción)
+
+    Returns:
+        (Transicion, HistoricoCredito)
+
+    Raises:
+        ValidationError si la transición no aplica o faltan datos,
+        ReservaOcupada si otro analista tiene reservado el crédito,
+        SinReserva si la transición exige la reserva y el usuario no la tiene,
+        ConflictoFase si otra operación cambió el crédito en paralelo
+    """
+    transicion = obtener_transicion(nombre)
+    transicion.validar(credito, usuario)
+    datos = transicion.extraer_datos(payload)
+    estado_anterior = credito.enum_estado
+    datos_agregados, campos = transicion.aplicar_efecto(credito, datos)
+    historico = cambiar_fase(
+        credito=credito,
+        fase_nueva=transicion.destino,
+        usuario=usuario,
+        descripcion=transicion.descripcion.format_map(datos),
+        datos_agregados=datos_agregados,
+        campos=campos,
+        fase_esperada=transicion.origen,
+        estado_esperado=estado_anterior,
+    )
+    if transicion.posterior:
+        transicion.posterior([credito])
+    return transicion, historico
+
+
+def aplicar_transiciones_masivas(creditos, ids, usuario, nombre=None, fase_destino=None, payload=None):
+    """
+    Aplicar una transición (por nombre o por fase destino) a muchos créditos
+
+    Los créditos llegan ya cargados y bloqueados por el llamador (una sola consulta
+    con select_for_update dentro de su transacción). Cada uno se valida en memoria; los
+    válidos se escriben con un bulk_update de Credito y un bulk_create de HistoricoCredito,
+    y los contadores del pipeline se ajustan con un UPDATE por (fase, estado) afectado.
+
+    Args:
+        creditos: Dict id -> Credito (solo los de la empresa del usuario)
+        ids: Ids solicitados, en el orden de la respuesta
+        usuario: Usuario que realiza el cambio
+        nombre: Nombre de la transición (excluyente con fase_destino)
+        fase_destino: Fase a alcanzar; la transición se resuelve según la fase de cada crédito
+        payload: Datos opcionales de la transición (p. ej. razon)
+
+    Returns:
+        Lista de resultados por id: {'id', 'ok', ...}
+    """
+    payload = payload or {}
+    ahora = timezone.now()
+    resultados = []
+    aplicados = []
+    historicos = []
+    campos = set()
+    deltas = nuevos_deltas()
+    posteriores = {}
+    
+    for credito_id in ids:
+        credito = creditos.get(credito_id)
+        if credito is None:
+            resultados.append({'id': credito_id, 'ok': False, 'error': 'Crédito no encontrado'})
+            continue
+        
+        try:
+            if nombre:
+                transicion = obtener_transicion(nombre)
+            else:
+                transicion = transicion_hacia(credito.fase_actual, fase_destino)
+            if not transicion.masiva:
+                raise ValidationError(f"La transición {transicion.nombre} no admite ejecución masiva")
+            transicion.validar(credito, usuario)
+            datos = transicion.extraer_datos(payload)
+        except ValidationError as e:
+            resultados.append({'id': credito_id, 'ok': False, 'error': str(e.detail[0])})
+            continue
+        except (ReservaOcupada, SinReserva) as e:
+            resultados.append({'id': credito_id, 'ok': False, 'error': str(e.detail)})
+            continue
+        
+        fase_anterior = credito.fase_actual
+        anterior = (credito.empresa_id, credito.fase_actual, credito.enum_estado, credito.Monto_Solicitado)
+        datos_agregados, campos_efecto = transicion.aplicar_efecto(credito, datos)
+        credito.fase_actual = transicion.destino
+        credito.fecha_actualizacion = ahora
+        actual = (credito.empresa_id, credito.fase_actual, credito.enum_estado, credito.Monto_Solicitado)
+        acumular(deltas, anterior, actual)
+        campos.update(campos_efecto)
+        aplicados.append(credito)
+        if transicion.posterior:
+            posteriores.setdefault(transicion.posterior, []).append(credito)
+        historicos.append(HistoricoCredito(
+            credito=credito,
+            fase_anterior=fase_anterior,
+            fase_nueva=transicion.destino,
+            usuario_cambio=usuario,
+            descripcion=transicion.descripcion.format_map(datos),
+            datos_agregados=datos_agregados,
+        ))
+        resultados.append({
+            'id': credito_id,
+            'ok': True,
+            'transicion': transicion.nombre,
+            'fase_nueva': credito.fase_actual,
+            'estado_actual': credito.enum_estado,
+        })
+    
+    if aplicados:
+        Credito.objects.bulk_update(aplicados, ['fase_actual', 'fecha_actualizacion', *sorted(campos)])
+        HistoricoCredito.objects.bulk_create(historicos)
+        aplicar_deltas(deltas)
+        for posterior, creditos_posterior in posteriores.items():
+            posterior(creditos_posterior)
+    
+    return resultados
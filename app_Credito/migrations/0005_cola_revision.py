@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-16 20:43
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_Cliente', '0004_alter_documentacion_documento_url_and_more'),
+        ('app_Credito', '0004_tipo_credito_empresa'),
+        ('app_Empresa', '0002_alter_on_premise_fecha_de_compra'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='credito',
+            name='reserva_expira',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='credito',
+            name='revisor_asignado',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='creditos_en_revision', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='credito',
+            index=models.Index(fields=['empresa', 'fase_actual', 'reserva_expira'], name='credito_cola_revision_idx'),
+        ),
+    ]
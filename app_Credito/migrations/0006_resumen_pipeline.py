@@ -0,0 +1,53 @@
+# Generated by Django 5.2.7 on 2026-10-16 20:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def poblar_resumen(apps, schema_editor):
+    """Contadores iniciales a partir de los créditos existentes"""
+    Credito = apps.get_model('app_Credito', 'Credito')
+    ResumenPipeline = apps.get_model('app_Credito', 'ResumenPipeline')
+    filas = (
+        Credito.objects
+        .values('empresa_id', 'fase_actual', 'enum_estado')
+        .annotate(cantidad=Count('id'), monto_total=Sum('Monto_Solicitado'))
+        .order_by()
+    )
+    ResumenPipeline.objects.bulk_create([
+        ResumenPipeline(
+            empresa_id=fila['empresa_id'],
+            fase=fila['fase_actual'],
+            estado=fila['enum_estado'],
+            cantidad=fila['cantidad'],
+            monto_total=fila['monto_total'] or 0,
+        )
+        for fila in filas
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_Credito', '0005_cola_revision'),
+        ('app_Empresa', '0002_alter_on_premise_fecha_de_compra'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenPipeline',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fase', models.CharField(choices=[('FASE_1_SOLICITUD', 'Datos de la solicitud'), ('FASE_2_DOCUMENTACION', 'Documentación personal'), ('FASE_3_LABORAL', 'Información laboral'), ('FASE_4_DOMICILIO', 'Domicilio'), ('FASE_5_GARANTE', 'Datos del garante'), ('FASE_6_REVISION', 'Revisión y aprobación'), ('FASE_7_DESEMBOLSO', 'Desembolso del crédito'), ('FASE_8_FINALIZADO', 'Crédito finalizado')], max_length=30)),
+                ('estado', models.CharField(choices=[('Pendiente', 'Pendiente'), ('Aprobado', 'Aprobado'), ('Rechazado', 'Rechazado'), ('SOLICITADO', 'SOLICITADO'), ('DESENBOLSADO', 'DESENBOLSADO'), ('FINALIZADO', 'FINALIZADO')], max_length=20)),
+                ('cantidad', models.IntegerField(default=0)),
+                ('monto_total', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('empresa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='resumen_pipeline', to='app_Empresa.empresa')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('empresa', 'fase', 'estado'), name='resumen_pipeline_unico')],
+            },
+        ),
+        migrations.RunPython(poblar_resumen, migrations.RunPython.noop),
+    ]
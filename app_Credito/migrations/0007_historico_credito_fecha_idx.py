@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-16 20:47
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_Credito', '0006_resumen_pipeline'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='historicocredito',
+            index=models.Index(fields=['credito', '-fecha_cambio', '-id'], name='historico_credito_fecha_idx'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.7 on 2026-10-16 20:48
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_Credito', '0007_historico_credito_fecha_idx'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HistoricoCreditoArchivo',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('fase_anterior', models.CharField(blank=True, choices=[('FASE_1_SOLICITUD', 'Datos de la solicitud'), ('FASE_2_DOCUMENTACION', 'Documentación personal'), ('FASE_3_LABORAL', 'Información laboral'), ('FASE_4_DOMICILIO', 'Domicilio'), ('FASE_5_GARANTE', 'Datos del garante'), ('FASE_6_REVISION', 'Revisión y aprobación'), ('FASE_7_DESEMBOLSO', 'Desembolso del crédito'), ('FASE_8_FINALIZADO', 'Crédito finalizado')], max_length=30, null=True)),
+                ('fase_nueva', models.CharField(choices=[('FASE_1_SOLICITUD', 'Datos de la solicitud'), ('FASE_2_DOCUMENTACION', 'Documentación personal'), ('FASE_3_LABORAL', 'Información laboral'), ('FASE_4_DOMICILIO', 'Domicilio'), ('FASE_5_GARANTE', 'Datos del garante'), ('FASE_6_REVISION', 'Revisión y aprobación'), ('FASE_7_DESEMBOLSO', 'Desembolso del crédito'), ('FASE_8_FINALIZADO', 'Crédito finalizado')], max_length=30)),
+                ('fecha_cambio', models.DateTimeField()),
+                ('descripcion', models.TextField(blank=True, null=True)),
+                ('datos_agregados', models.JSONField(blank=True, default=dict)),
+                ('fecha_archivado', models.DateTimeField(auto_now_add=True)),
+                ('credito', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='historico_archivado', to='app_Credito.credito')),
+                ('usuario_cambio', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-fecha_cambio'],
+                'indexes': [models.Index(fields=['credito', '-fecha_cambio', '-id'], name='historico_archivo_fecha_idx')],
+            },
+        ),
+    ]
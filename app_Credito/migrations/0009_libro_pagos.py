@@ -0,0 +1,58 @@
+# Generated by Django 5.2.7 on 2026-10-16 20:54
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Solo esquema: las cuentas de los créditos ya desembolsados se abren con
+# `python manage.py abrir_cuentas` (usa el motor de amortización vigente).
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_Credito', '0008_historico_credito_archivo'),
+        ('app_Empresa', '0002_alter_on_premise_fecha_de_compra'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PagoCredito',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('monto', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('fecha_pago', models.DateField()),
+                ('referencia', models.CharField(blank=True, default='', max_length=100)),
+                ('saldo_resultante', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('cuotas_pagadas', models.IntegerField()),
+                ('proximo_vencimiento', models.DateField(blank=True, null=True)),
+                ('fecha_registro', models.DateTimeField(auto_now_add=True)),
+                ('credito', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pagos', to='app_Credito.credito')),
+                ('empresa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='pagos_credito', to='app_Empresa.empresa')),
+                ('usuario', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['-fecha_pago', '-id'],
+                'indexes': [models.Index(fields=['credito', '-fecha_pago', '-id'], name='pago_credito_fecha_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='SaldoCredito',
+            fields=[
+                ('credito', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='saldo', serialize=False, to='app_Credito.credito')),
+                ('moneda', models.CharField(default='USD', max_length=10)),
+                ('sistema', models.CharField(default='frances', max_length=10)),
+                ('total_pagar', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('total_pagado', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('saldo', models.DecimalField(decimal_places=2, max_digits=12)),
+                ('cuotas_pagadas', models.IntegerField(default=0)),
+                ('proximo_vencimiento', models.DateField(blank=True, null=True)),
+                ('monto_proxima_cuota', models.DecimalField(decimal_places=2, default=0, max_digits=12)),
+                ('fecha_actualizacion', models.DateTimeField(auto_now=True)),
+                ('empresa', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='saldos_credito', to='app_Empresa.empresa')),
+            ],
+            options={
+                'indexes': [models.Index(condition=models.Q(('saldo__gt', 0)), fields=['empresa', 'moneda', 'saldo'], name='saldo_credito_pendiente_idx'), models.Index(condition=models.Q(('saldo__gt', 0)), fields=['empresa', 'proximo_vencimiento'], name='saldo_credito_vencimiento_idx')],
+            },
+        ),
+    ]
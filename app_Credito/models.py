@@ -55,9 +55,25 @@ class Credito(models.Model):
     tipo_credito = models.ForeignKey(Tipo_Credito, on_delete=models.CASCADE)
     fecha_creacion = models.DateTimeField(auto_now_add=True)
     fecha_actualizacion = models.DateTimeField(auto_now=True)
+    # Reserva (lease) de la cola de revisión: analista que lo tomó y hasta cuándo
+    revisor_asignado = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='creditos_en_revision')
+    reserva_expira = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['empresa', 'fase_actual', 'reserva_expira'], name='credito_cola_revision_idx'),
+        ]
 
     def __str__(self):
         return f"Crédito {self.id} - Cliente: {self.cliente.nombre} - Monto Solicitado: {self.Monto_Solicitado} {self.Moneda}"
+
+
+def pipeline_clave(valores):
+    """(empresa_id, fase, estado, monto) de un crédito, o None si no se cargaron esos campos"""
+    try:
+        return (valores['empresa_id'], valores['fase_actual'], valores['enum_estado'], valores['Monto_Solicitado'])
+    except KeyError:
+        return None
     
     
 class HistoricoCredito(models.Model):
@@ -72,10 +88,61 @@ class HistoricoCredito(models.Model):
     
     class Meta:
         ordering = ['-fecha_cambio']
+        indexes = [
+            # Línea de tiempo de un crédito: filtro por crédito + orden/keyset por (fecha_cambio, id)
+            models.Index(fields=['credito', '-fecha_cambio', '-id'], name='historico_credito_fecha_idx'),
+        ]
     
     def __str__(self):
         return f"Crédito {self.credito.id} - {self.fase_anterior} → {self.fase_nueva} - {self.fecha_cambio}"
     
+class HistoricoCreditoArchivo(models.Model):
+    """
+    Archivo (tabla fría) del histórico de créditos finalizados.
+    Conserva el id original para que la línea de tiempo mezcle ambas tablas sin duplicados
+    (ver archivo_historico.py).
+    """
+    id = models.BigIntegerField(primary_key=True)
+    credito = models.ForeignKey(Credito, on_delete=models.CASCADE, related_name='historico_archivado')
+    fase_anterior = models.CharField(max_length=30, choices=ENUM_FASE_CREDITO, null=True, blank=True)
+    fase_nueva = models.CharField(max_length=30, choices=ENUM_FASE_CREDITO)
+    fecha_cambio = models.DateTimeField()
+    usuario_cambio = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    descripcion = models.TextField(null=True, blank=True)
+    datos_agregados = models.JSONField(default=dict, blank=True)
+    fecha_archivado = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-fecha_cambio']
+        indexes = [
+            models.Index(fields=['credito', '-fecha_cambio', '-id'], name='historico_archivo_fecha_idx'),
+        ]
+
+    def __str__(self):
+        return f"Crédito {self.credito_id} - {self.fase_anterior} → {self.fase_nueva} - {self.fecha_cambio} (archivado)"
+
+
+class ResumenPipeline(models.Model):
+    """
+    Contadores del pipeline por empresa, fase y estado (cantidad y monto solicitado).
+    Se mantienen en la misma transacción que cada alta, baja o cambio de fase/estado
+    (ver pipeline.py), para no recorrer la tabla de créditos en los tableros.
+    """
+    empresa = models.ForeignKey(Empresa, on_delete=models.CASCADE, related_name='resumen_pipeline')
+    fase = models.CharField(max_length=30, choices=ENUM_FASE_CREDITO)
+    estado = models.CharField(max_length=20, choices=ENUM_ESTADO_CREDITO)
+    cantidad = models.IntegerField(default=0)
+    monto_total = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['empresa', 'fase', 'estado'], name='resumen_pipeline_unico'),
+        ]
+
+    def __str__(self):
+        return f"{self.empresa_id} - {self.fase} - {self.estado}: {self.cantidad}"
+
+
 class Ganancia_Credito(models.Model):
     monto_prestado = models.DecimalField(max_digits=10, decimal_places=2)
     tasa_interes = models.DecimalField(max_digits=5, decimal_places=2)
@@ -86,6 +153,60 @@ class Ganancia_Credito(models.Model):
 
     def __str__(self):
         return f"Ganancia Crédito {self.Credito.id} - Cliente: {self.Cliente.nombre}"
-       
 
 
+class SaldoCredito(models.Model):
+    """
+    Estado de cuenta actual de un crédito desembolsado: saldo pendiente, cuotas pagadas
+    y próximo vencimiento. Se abre al desembolsar y se actualiza con cada pago (ver
+    pagos.py), de modo que el saldo de la cartera y los vencimientos próximos se
+    consultan sin recorrer PagoCredito.
+    """
+    credito = models.OneToOneField(Credito, on_delete=models.CASCADE, primary_key=True, related_name='saldo')
+    empresa = models.ForeignKey(Empresa, on_delete=models.CASCADE, related_name='saldos_credito')
+    moneda = models.CharField(max_length=10, default='USD')
+    sistema = models.CharField(max_length=10, default='frances')
+    total_pagar = models.DecimalField(max_digits=12, decimal_places=2)
+    total_pagado = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    saldo = models.DecimalField(max_digits=12, decimal_places=2)
+    cuotas_pagadas = models.IntegerField(default=0)
+    proximo_vencimiento = models.DateField(null=True, blank=True)
+    monto_proxima_cuota = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    fecha_actualizacion = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            # Saldo pendiente por empresa (y moneda): solo créditos con saldo
+            models.Index(fields=['empresa', 'moneda', 'saldo'], name='saldo_credito_pendiente_idx',
+                         condition=models.Q(saldo__gt=0)),
+            # Vencimientos de la semana: rango sobre proximo_vencimiento dentro de la empresa
+            models.Index(fields=['empresa', 'proximo_vencimiento'], name='saldo_credito_vencimiento_idx',
+                         condition=models.Q(saldo__gt=0)),
+        ]
+
+    def __str__(self):
+        return f"Crédito {self.credito_id} - Saldo: {self.saldo} {self.moneda}"
+
+
+class PagoCredito(models.Model):
+    """Libro de pagos de un crédito; cada fila guarda el saldo y el próximo vencimiento resultantes"""
+    credito = models.ForeignKey(Credito, on_delete=models.CASCADE, related_name='pagos')
+    empresa = models.ForeignKey(Empresa, on_delete=models.CASCADE, related_name='pagos_credito')
+    monto = models.DecimalField(max_digits=12, decimal_places=2)
+    fecha_pago = models.DateField()
+    referencia = models.CharField(max_length=100, blank=True, default='')
+    saldo_resultante = models.DecimalField(max_digits=12, decimal_places=2)
+    cuotas_pagadas = models.IntegerField()
+    proximo_vencimiento = models.DateField(null=True, blank=True)
+    usuario = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    fecha_registro = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['-fecha_pago', '-id']
+        indexes = [
+            models.Index(fields=['credito', '-fecha_pago', '-id'], name='pago_credito_fecha_idx'),
+        ]
+
+    def __str__(self):
+        return f"Pago {self.id} - Crédito {self.credito_id} - {self.monto} ({self.fecha_pago})"
+
@@ -0,0 +1,197 @@
+"""
+Libro de pagos de créditos desembolsados.
+
+Al desembolsar se abre un SaldoCredito con el total del cronograma (amortizacion.py) y
+el primer vencimiento. Cada pago, dentro de una transacción y con la cuenta bloqueada:
+- descuenta el saldo y recalcula cuántas cuotas quedan cubiertas y el próximo vencimiento,
+- inserta la fila de PagoCredito con el saldo y el vencimiento resultantes,
+- al cancelar el saldo marca el crédito como FINALIZADO.
+
+Los totales por empresa y los vencimientos próximos se leen de SaldoCredito (índices
+parciales sobre saldo > 0), sin recorrer el histórico de pagos.
+
+Los créditos desembolsados antes de existir el libro (o sin cuenta por cualquier motivo)
+se abren con `python manage.py abrir_cuentas`.
+
+Un crédito cuyo total a pagar no entra en total_pagar (DecimalField de 12 dígitos) no se
+puede desembolsar (validar_cuenta, 400); si ya estaba desembolsado, abrir_cuentas lo omite
+y lo informa en lugar de abortar el lote con un DataError.
+"""
+import datetime
+import numpy as np
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+from .amortizacion import MAX_CUOTAS, a_centavos, calcular_cronogramas, centavos_a_texto, fecha_inicio_credito
+from .models import Credito, PagoCredito, SaldoCredito
+
+
+# Mayor total_pagar representable, en centavos (decimal_places=2)
+MAX_SALDO_CENTAVOS = 10 ** SaldoCredito._meta.get_field('total_pagar').max_digits - 1
+
+
+def cronogramas_de(creditos, sistema='frances'):
+    return calcular_cronogramas(
+        [a_centavos(credito.Monto_Solicitado) for credito in creditos],
+        [float(credito.Tasa_Interes) for credito in creditos],
+        [credito.Numero_Cuotas for credito in creditos],
+        [fecha_inicio_credito(credito.Fecha_Desembolso, credito.fecha_creacion) for credito in creditos],
+        sistema,
+    )
+
+
+def validar_cuenta(credito, sistema='frances'):
+    """ValidationError si el total a pagar del crédito no entra en SaldoCredito.total_pagar"""
+    if not credito.Numero_Cuotas or not 0 < credito.Numero_Cuotas <= MAX_CUOTAS:
+        return
+    if cronogramas_de([credito], sistema).totales()['total_pagar'][0] > MAX_SALDO_CENTAVOS:
+        raise ValidationError(
+            f"El total a pagar supera el máximo de la cuenta de pagos ({centavos_a_texto(MAX_SALDO_CENTAVOS)})"
+        )
+
+
+def abrir_cuentas(creditos, sistema='frances'):
+    """
+    Abrir la cuenta (SaldoCredito) de los créditos recién desembolsados, con un cálculo
+    vectorizado y un bulk_create. Los créditos que ya tienen cuenta se ignoran.
+
+    Returns:
+        Ids de los créditos omitidos porque su total a pagar no entra en total_pagar
+    """
+    creditos = [credito for credito in creditos if credito.Numero_Cuotas and 0 < credito.Numero_Cuotas <= MAX_CUOTAS]
+    if not creditos:
+        return []
+    cronogramas = cronogramas_de(creditos, sistema)
+    totales = cronogramas.totales()
+    omitidos = [credito.id for credito, total in zip(creditos, totales['total_pagar']) if total > MAX_SALDO_CENTAVOS]
+    SaldoCredito.objects.bulk_create([
+        SaldoCredito(
+            credito=credito,
+            empresa_id=credito.empresa_id,
+            moneda=credito.Moneda,
+            sistema=sistema,
+            total_pagar=centavos_a_texto(total),
+            saldo=centavos_a_texto(total),
+            proximo_vencimiento=cronogramas.fecha[inicio].item(),
+            monto_proxima_cuota=centavos_a_texto(cronogramas.cuota[inicio]),
+        )
+        for credito, total, inicio in zip(creditos, totales['total_pagar'], cronogramas.inicio)
+        if total <= MAX_SALDO_CENTAVOS
+    ], ignore_conflicts=True)
+    return omitidos
+
+
+def abrir_cuentas_pendientes(empresa_id=None, batch_size=1000, sistema='frances'):
+    """
+    Abrir por lotes las cuentas de los créditos desembolsados que no tienen SaldoCredito
+
+    Returns:
+        Dict con la cantidad de créditos procesados y los ids de los omitidos porque su
+        total a pagar no entra en total_pagar
+    """
+    creditos = (
+        Credito.objects
+        .filter(enum_estado='DESENBOLSADO', saldo__isnull=True, Numero_Cuotas__gt=0, Numero_Cuotas__lte=MAX_CUOTAS)
+        .only('id', 'empresa_id', 'Moneda', 'Monto_Solicitado', 'Tasa_Interes', 'Numero_Cuotas',
+              'Fecha_Desembolso', 'fecha_creacion')
+    )
+    if empresa_id is not None:
+        creditos = creditos.filter(empresa_id=empresa_id)
+
+    resultado = {'creditos': 0, 'omitidos': []}
+    ultimo_id = 0
+    while True:
+        lote = list(creditos.filter(id__gt=ultimo_id).order_by('id')[:batch_size])
+        if not lote:
+            break
+        with transaction.atomic():
+            resultado['omitidos'].extend(abrir_cuentas(lote, sistema))
+        resultado['creditos'] += len(lote)
+        ultimo_id = lote[-1].id
+    return resultado
+
+
+def avance_cronograma(cronogramas, pagado):
+    """(cuotas cubiertas, próximo vencimiento, monto pendiente de la próxima cuota) tras pagar `pagado` centavos"""
+    acumulado = np.cumsum(cronogramas.cuota)
+    cubiertas = int(np.searchsorted(acumulado, pagado, side='right'))
+    if cubiertas >= len(acumulado):
+        return len(acumulado), None, 0
+    return cubiertas, cronogramas.fecha[cubiertas].item(), int(acumulado[cubiertas] - pagado)
+
+
+def registrar_pago(credito, monto, usuario, fecha_pago=None, referencia=''):
+    """
+    Registrar un pago y actualizar el saldo del crédito
+
+    Raises:
+        ValidationError si el crédito no tiene cuenta abierta o el monto no es válido
+    """
+    fecha_pago = fecha_pago or timezone.now().date()
+    with transaction.atomic():
+        cuenta = SaldoCredito.objects.select_for_update().filter(credito=credito).first()
+        if cuenta is None:
+            raise ValidationError("El crédito no tiene una cuenta de pagos abierta (no fue desembolsado)")
+
+        centavos = a_centavos(monto)
+        saldo = a_centavos(cuenta.saldo)
+        if centavos <= 0:
+            raise ValidationError("El monto del pago debe ser mayor que 0")
+        if centavos > saldo:
+            raise ValidationError(f"El pago supera el saldo pendiente ({cuenta.saldo})")
+
+        pagado = a_centavos(cuenta.total_pagado) + centavos
+        cuotas_pagadas, proximo, pendiente = avance_cronograma(cronogramas_de([credito], cuenta.sistema), pagado)
+        if saldo == centavos:
+            cuotas_pagadas, proximo, pendiente = credito.Numero_Cuotas, None, 0
+
+        cuenta.total_pagado = centavos_a_texto(pagado)
+        cuenta.saldo = centavos_a_texto(saldo - centavos)
+        cuenta.cuotas_pagadas = cuotas_pagadas
+        cuenta.proximo_vencimiento = proximo
+        cuenta.monto_proxima_cuota = centavos_a_texto(pendiente)
+        cuenta.save(update_fields=[
+            'total_pagado', 'saldo', 'cuotas_pagadas', 'proximo_vencimiento', 'monto_proxima_cuota',
+            'fecha_actualizacion',
+        ])
+
+        pago = PagoCredito.objects.create(
+            credito=credito,
+            empresa_id=cuenta.empresa_id,
+            monto=centavos_a_texto(centavos),
+            fecha_pago=fecha_pago,
+            referencia=referencia,
+            saldo_resultante=cuenta.saldo,
+            cuotas_pagadas=cuotas_pagadas,
+            proximo_vencimiento=proximo,
+            usuario=usuario,
+        )
+
+        if saldo == centavos:
+            credito.enum_estado = 'FINALIZADO'
+            credito.Fecha_Finalizacion = fecha_pago
+            credito.save(update_fields=['enum_estado', 'Fecha_Finalizacion', 'fecha_actualizacion'])
+    return pago, cuenta
+
+
+def saldo_cartera(empresa_id):
+    """Saldo pendiente y créditos con saldo de la empresa, por moneda"""
+    return list(
+        SaldoCredito.objects
+        .filter(empresa_id=empresa_id, saldo__gt=0)
+        .values('moneda')
+        .annotate(creditos=Count('credito_id'), saldo_total=Sum('saldo'))
+        .order_by('moneda')
+    )
+
+
+def proximos_vencimientos(empresa_id, dias=7):
+    """Cuentas con saldo cuyo próximo vencimiento cae en los próximos `dias` días (incluye vencidas)"""
+    limite = timezone.now().date() + datetime.timedelta(days=dias)
+    return (
+        SaldoCredito.objects
+        .filter(empresa_id=empresa_id, saldo__gt=0, proximo_vencimiento__lte=limite)
+        .select_related('credito__cliente')
+        .order_by('proximo_vencimiento', 'credito_id')
+    )
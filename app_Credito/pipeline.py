@@ -0,0 +1,132 @@
+"""
+Contadores del pipeline de créditos por (empresa, fase, estado).
+
+Cada movimiento de un crédito (alta, baja, cambio de fase/estado/monto) se traduce en
+deltas de cantidad y monto que se aplican con UPDATE ... SET cantidad = cantidad + n
+sobre ResumenPipeline, dentro de la transacción del cambio. Leer los totales cuesta
+O(fases x estados) filas, sin importar el tamaño de la cartera.
+
+- Altas, bajas y save() de Credito: signals.py
+- cambiar_fase y transiciones masivas (UPDATE / bulk_update): llaman a mover/aplicar_deltas
+- `python manage.py recalcular_pipeline` reconstruye los contadores desde cero
+"""
+import logging
+from collections import defaultdict
+from decimal import Decimal
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from .models import Credito, ResumenPipeline
+
+
+logger = logging.getLogger(__name__)
+
+def nuevos_deltas():
+    return defaultdict(lambda: [0, Decimal('0')])
+
+
+def acumular(deltas, anterior=None, nueva=None):
+    """Sumar a `deltas` el paso de la clave `anterior` a `nueva` (ver models.pipeline_clave)"""
+    if anterior == nueva:
+        return deltas
+    if anterior is not None:
+        empresa_id, fase, estado, monto = anterior
+        deltas[(empresa_id, fase, estado)][0] -= 1
+        deltas[(empresa_id, fase, estado)][1] -= Decimal(str(monto))
+    if nueva is not None:
+        empresa_id, fase, estado, monto = nueva
+        deltas[(empresa_id, fase, estado)][0] += 1
+        deltas[(empresa_id, fase, estado)][1] += Decimal(str(monto))
+    return deltas
+
+
+def aplicar_deltas(deltas):
+    """Aplicar los deltas en orden de clave (evita bloqueos cruzados entre transacciones)"""
+    with transaction.atomic():
+        for (empresa_id, fase, estado), (cantidad, monto) in sorted(deltas.items()):
+            if cantidad == 0 and monto == 0:
+                continue
+            filtro = ResumenPipeline.objects.filter(empresa_id=empresa_id, fase=fase, estado=estado)
+            if filtro.update(cantidad=F('cantidad') + cantidad, monto_total=F('monto_total') + monto):
+                continue
+            if cantidad < 0:
+                # Descontar de una fila inexistente: los contadores ya no coinciden con los créditos
+                # (la baja en cascada de una empresa no llega aquí, ver signals.py)
+                logger.warning(
+                    "Pipeline desincronizado: empresa %s, %s/%s sin fila para descontar %s (%s). "
+                    "Ejecutar `python manage.py recalcular_pipeline --empresa %s`",
+                    empresa_id, fase, estado, -cantidad, -monto, empresa_id,
+                )
+                continue
+            try:
+                with transaction.atomic():
+                    ResumenPipeline.objects.create(
+                        empresa_id=empresa_id, fase=fase, estado=estado, cantidad=cantidad, monto_total=monto
+                    )
+            except IntegrityError:
+                # Otra transacción creó la fila en paralelo
+                filtro.update(cantidad=F('cantidad') + cantidad, monto_total=F('monto_total') + monto)
+
+
+def mover(anterior=None, nueva=None):
+    """Registrar el paso de un crédito de la clave `anterior` a `nueva` (None = alta/baja)"""
+    if anterior != nueva:
+        aplicar_deltas(acumular(nuevos_deltas(), anterior, nueva))
+
+
+def recalcular(empresa_id=None):
+    """Reconstruir los contadores desde la tabla de créditos (una agregación por grupo)"""
+    creditos = Credito.objects.all()
+    resumen = ResumenPipeline.objects.all()
+    if empresa_id is not None:
+        creditos = creditos.filter(empresa_id=empresa_id)
+        resumen = resumen.filter(empresa_id=empresa_id)
+
+    filas = (
+        creditos
+        .values('empresa_id', 'fase_actual', 'enum_estado')
+        .annotate(cantidad=Count('id'), monto_total=Sum('Monto_Solicitado'))
+        .order_by()
+    )
+    with transaction.atomic():
+        resumen.delete()
+        ResumenPipeline.objects.bulk_create([
+            ResumenPipeline(
+                empresa_id=fila['empresa_id'],
+                fase=fila['fase_actual'],
+                estado=fila['enum_estado'],
+                cantidad=fila['cantidad'],
+                monto_total=fila['monto_total'] or 0,
+            )
+            for fila in filas
+        ])
+
+
+def obtener_resumen(empresa_id):
+    """Filas con créditos de la empresa, totales por fase y total general (montos como texto)"""
+    filas = list(
+        ResumenPipeline.objects
+        .filter(empresa_id=empresa_id, cantidad__gt=0)
+        .order_by('fase', 'estado')
+        .values('fase', 'estado', 'cantidad', 'monto_total')
+    )
+    por_fase = {}
+    for fila in filas:
+        total = por_fase.setdefault(fila['fase'], {'cantidad': 0, 'monto_total': Decimal('0')})
+        total['cantidad'] += fila['cantidad']
+        total['monto_total'] += fila['monto_total']
+    total_general = {
+        'cantidad': sum(fila['cantidad'] for fila in filas),
+        'monto_total': sum((fila['monto_total'] for fila in filas), Decimal('0')),
+    }
+    for total in (*filas, *por_fase.values(), total_general):
+        total['monto_total'] = texto_monto(total['monto_total'])
+    return {
+        'detalle': filas,
+        'por_fase': por_fase,
+        'total': total_general,
+    }
+
+
+def texto_monto(monto):
+    """Monto con 2 decimales como texto, igual que el resto de los endpoints de montos"""
+    return str(Decimal(monto).quantize(Decimal('0.01')))
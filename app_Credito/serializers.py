@@ -1,12 +1,17 @@
 from rest_framework.serializers import ModelSerializer
-from .models import Credito, Tipo_Credito, HistoricoCredito
+from rest_framework import serializers
+from decimal import Decimal
+from .models import Credito, Tipo_Credito, HistoricoCredito, SaldoCredito, PagoCredito, ENUM_FASE_CREDITO
+from .amortizacion import SISTEMAS, MAX_CUOTAS
 
 
 class CreditoSerializer(ModelSerializer):
     class Meta:
         model = Credito
         fields = '__all__'
-        read_only_fields = ('empresa', 'usuario', 'fecha_creacion', 'fecha_actualizacion', 'fase_actual')
+        read_only_fields = ('empresa', 'usuario', 'fecha_creacion', 'fecha_actualizacion', 'fase_actual',
+                            'revisor_asignado', 'reserva_expira')
+        extra_kwargs = {'Numero_Cuotas': {'min_value': 1, 'max_value': MAX_CUOTAS}}
 
 
 class TipoCreditoSerializer(ModelSerializer):
@@ -28,6 +33,7 @@ class CreditoWorkflowSerializer(ModelSerializer):
     class Meta:
         model = Credito
         fields = ('Monto_Solicitado', 'Numero_Cuotas', 'Monto_Cuota', 'Tasa_Interes', 'Moneda', 'tipo_credito')
+        extra_kwargs = {'Numero_Cuotas': {'min_value': 1, 'max_value': MAX_CUOTAS}}
 
 
 class AgregarDocumentacionSerializer(ModelSerializer):
@@ -63,3 +69,97 @@ class RevisarCreditoSerializer(ModelSerializer):
     class Meta:
         model = Credito
         fields = ('razon_rechazo',)
+
+
+class BulkTransicionSerializer(serializers.Serializer):
+    """
+    Transición masiva de créditos
+    {"ids": [1, 2, 3], "transicion": "enviar-revision"} o {"ids": [...], "fase_destino": "FASE_6_REVISION"}
+    """
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=500
+    )
+    transicion = serializers.CharField(required=False)
+    fase_destino = serializers.ChoiceField(choices=ENUM_FASE_CREDITO, required=False)
+    razon = serializers.CharField(required=False, allow_blank=True, default='')
+    
+    def validate_ids(self, value):
+        """Eliminar ids duplicados conservando el orden"""
+        return list(dict.fromkeys(value))
+    
+    def validate(self, data):
+        if bool(data.get('transicion')) == bool(data.get('fase_destino')):
+            raise serializers.ValidationError("Indique 'transicion' o 'fase_destino' (solo uno)")
+        return data
+
+
+class ColaRevisionReclamarSerializer(serializers.Serializer):
+    """Cantidad de créditos a reservar de la cola de revisión"""
+    cantidad = serializers.IntegerField(min_value=1, max_value=50, default=1)
+
+
+class ColaRevisionIdsSerializer(serializers.Serializer):
+    """Créditos reservados sobre los que opera el analista"""
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        required=False,
+        max_length=500
+    )
+
+
+class SimularCreditoSerializer(serializers.Serializer):
+    """
+    Grilla de cotizaciones: todas las combinaciones de montos x cuotas x tasas
+    {"tipo_credito": 1, "montos": [1000, 5000], "cuotas": [6, 12, 24], "tasas": [10, 12.5]}
+    """
+    MAX_COMBINACIONES = 1000
+
+    tipo_credito = serializers.IntegerField(min_value=1)
+    montos = serializers.ListField(
+        child=serializers.DecimalField(max_digits=10, decimal_places=2, min_value=0),
+        allow_empty=False,
+        max_length=100
+    )
+    cuotas = serializers.ListField(
+        child=serializers.IntegerField(min_value=1, max_value=MAX_CUOTAS),
+        allow_empty=False,
+        max_length=100
+    )
+    tasas = serializers.ListField(
+        child=serializers.DecimalField(max_digits=5, decimal_places=2, min_value=0),
+        allow_empty=False,
+        max_length=100
+    )
+    sistema = serializers.ChoiceField(choices=SISTEMAS, default='frances')
+
+    def validate(self, data):
+        combinaciones = len(data['montos']) * len(data['cuotas']) * len(data['tasas'])
+        if combinaciones > self.MAX_COMBINACIONES:
+            raise serializers.ValidationError(
+                f"Demasiadas combinaciones ({combinaciones}); máximo {self.MAX_COMBINACIONES}"
+            )
+        return data
+
+
+class SaldoCreditoSerializer(ModelSerializer):
+    """Estado de cuenta de un crédito desembolsado"""
+    class Meta:
+        model = SaldoCredito
+        fields = '__all__'
+
+
+class PagoCreditoSerializer(ModelSerializer):
+    """Fila del libro de pagos"""
+    class Meta:
+        model = PagoCredito
+        fields = '__all__'
+
+
+class RegistrarPagoSerializer(serializers.Serializer):
+    """Pago de un crédito: {"monto": 150.00, "fecha_pago": "2026-10-16", "referencia": "REC-001"}"""
+    monto = serializers.DecimalField(max_digits=12, decimal_places=2, min_value=Decimal('0.01'))
+    fecha_pago = serializers.DateField(required=False)
+    referencia = serializers.CharField(max_length=100, required=False, allow_blank=True, default='')
+
@@ -0,0 +1,65 @@
+"""
+Señales para mantener los contadores del pipeline (ver pipeline.py) en altas, bajas
+y save() de créditos. Los cambios por UPDATE (cambiar_fase, transiciones masivas)
+ajustan los contadores explícitamente.
+
+Los receptores corren dentro de la transacción de quien guarda o elimina: las vistas
+envuelven el alta y la baja en transaction.atomic(), de modo que si falla el ajuste
+de los contadores tampoco se confirma el cambio del crédito.
+"""
+from django.db.models import QuerySet
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from app_Empresa.models import Empresa
+from app_Credito.models import Credito, pipeline_clave
+from app_Credito.pipeline import mover
+
+
+CAMPOS_PIPELINE = {'empresa', 'empresa_id', 'fase_actual', 'enum_estado', 'Monto_Solicitado'}
+
+
+@receiver(pre_save, sender=Credito)
+def leer_clave_pipeline(sender, instance, update_fields=None, **kwargs):
+    """
+    Antes de modificar un crédito que toca el pipeline, leer la clave guardada (una
+    consulta por clave primaria). Solo se paga al guardar, no en cada carga de créditos.
+    """
+    instance._pipeline_original = None
+    if instance._state.adding:
+        return
+    if update_fields is not None and not CAMPOS_PIPELINE.intersection(update_fields):
+        return
+    guardado = (
+        Credito.objects.filter(pk=instance.pk)
+        .values('empresa_id', 'fase_actual', 'enum_estado', 'Monto_Solicitado')
+        .first()
+    )
+    if guardado is not None:
+        instance._pipeline_original = pipeline_clave(guardado)
+
+
+@receiver(post_save, sender=Credito)
+def actualizar_pipeline_credito(sender, instance, created, update_fields=None, **kwargs):
+    """Alta: suma al pipeline. Modificación: mueve el crédito si cambió empresa, fase, estado o monto"""
+    if update_fields is not None and not CAMPOS_PIPELINE.intersection(update_fields):
+        return
+
+    nueva = pipeline_clave(instance.__dict__)
+    if created:
+        mover(None, nueva)
+    elif instance._pipeline_original is not None:
+        mover(instance._pipeline_original, nueva)
+
+
+def borrado_de_empresa(origin):
+    """La eliminación parte de una empresa: sus contadores se borran en la misma cascada"""
+    if isinstance(origin, QuerySet):
+        return origin.model is Empresa
+    return isinstance(origin, Empresa)
+
+
+@receiver(post_delete, sender=Credito)
+def descontar_pipeline_credito(sender, instance, origin=None, **kwargs):
+    if borrado_de_empresa(origin):
+        return
+    mover(pipeline_clave(instance.__dict__), None)
@@ -1,3 +1,550 @@
-from django.test import TestCase
+import warnings
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
+from django.contrib.auth.models import User
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DatabaseError
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+from app_Cliente.models import Cliente, Documentacion, Domicilio, Garante, Trabajo
+from app_Empresa.models import Empresa
+from app_User.models import Perfiluser
+from .archivo_historico import archivar_historico
+from .cola_revision import ReservaOcupada, SinReserva, reclamar, renovar
+from .ganancias import recalcular_ganancias
+from .amortizacion import SISTEMAS, calcular_cronogramas, cronograma_cartera, cronograma_credito
+from .maquina_estados import TABLA_TRANSICIONES, Transicion, compilar, ejecutar_transicion
+from .models import Credito, Ganancia_Credito, HistoricoCredito, HistoricoCreditoArchivo, SaldoCredito, Tipo_Credito
+from .pagos import abrir_cuentas, registrar_pago
+from .pipeline import aplicar_deltas, acumular, mover, nuevos_deltas, obtener_resumen, recalcular
+from .workflow import ConflictoFase, cambiar_fase, obtener_estado_actual
 
-# Create your tests here.
+
+URL_CREDITOS = '/api/Creditos/creditos/'
+
+
+class CreditoTestCase(TestCase):
+    """Empresa, usuario staff con token, cliente y tipo de crédito comunes a las pruebas"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.empresa = Empresa.objects.create(razon_social='Empresa', email_contacto='empresa@test.com')
+        cls.usuario = User.objects.create_user('staff', 'staff@test.com', 'clave123456', is_staff=True)
+        Perfiluser.objects.create(empresa=cls.empresa, usuario=cls.usuario)
+        cls.token = Token.objects.create(user=cls.usuario)
+        cls.tipo_credito = Tipo_Credito.objects.create(
+            nombre='Personal', descripcion='Personal', monto_minimo=100, monto_maximo=100000, empresa=cls.empresa
+        )
+        cls.cliente = Cliente.objects.create(nombre='Nombre', apellido='Apellido', telefono='1', empresa=cls.empresa)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+
+    def nuevo_credito(self, monto=1000, cuotas=12, **campos):
+        campos.setdefault('empresa', self.empresa)
+        return Credito.objects.create(
+            Monto_Solicitado=monto, Numero_Cuotas=cuotas, Monto_Cuota=100, Tasa_Interes=10, Monto_Pagar=1200,
+            usuario=self.usuario, cliente=self.cliente, tipo_credito=self.tipo_credito, **campos
+        )
+
+
+class PipelineTests(CreditoTestCase):
+
+    def datos_credito(self):
+        return {
+            'Monto_Solicitado': '500.00', 'Numero_Cuotas': 6, 'Monto_Cuota': '90.00', 'Tasa_Interes': '12.00',
+            'Monto_Pagar': '540.00', 'cliente': self.cliente.id, 'tipo_credito': self.tipo_credito.id,
+        }
+
+    def test_alta_y_baja_mueven_los_contadores(self):
+        respuesta = self.client.post(URL_CREDITOS, self.datos_credito(), format='json')
+        self.assertEqual(respuesta.status_code, 201)
+        self.assertEqual(obtener_resumen(self.empresa.id)['total'], {'cantidad': 1, 'monto_total': '500.00'})
+
+        respuesta = self.client.delete(f"{URL_CREDITOS}{respuesta.data['id']}/")
+        self.assertEqual(respuesta.status_code, 204)
+        self.assertEqual(obtener_resumen(self.empresa.id)['total'], {'cantidad': 0, 'monto_total': '0.00'})
+
+    def test_alta_revertida_no_altera_los_contadores(self):
+        self.nuevo_credito(monto=1000)
+        antes = obtener_resumen(self.empresa.id)
+
+        def mover_y_fallar(anterior, nueva):
+            mover(anterior, nueva)
+            raise DatabaseError('fallo al ajustar el pipeline')
+
+        with mock.patch('app_Credito.signals.mover', side_effect=mover_y_fallar):
+            with self.assertRaises(DatabaseError):
+                self.client.post(URL_CREDITOS, self.datos_credito(), format='json')
+
+        self.assertEqual(Credito.objects.count(), 1)
+        self.assertEqual(obtener_resumen(self.empresa.id), antes)
+
+    def test_save_de_un_credito_cargado_mueve_los_contadores(self):
+        credito = Credito.objects.get(pk=self.nuevo_credito(monto=1000).pk)
+        self.assertNotIn('_pipeline_original', vars(credito))
+
+        credito.Monto_Solicitado = Decimal('1500.00')
+        credito.enum_estado = 'Aprobado'
+        credito.save()
+        resumen = obtener_resumen(self.empresa.id)
+        self.assertEqual(resumen['total'], {'cantidad': 1, 'monto_total': '1500.00'})
+        self.assertEqual([fila['estado'] for fila in resumen['detalle']], ['Aprobado'])
+
+    def test_descuento_sin_fila_se_registra(self):
+        deltas = acumular(nuevos_deltas(), (self.empresa.id, 'FASE_3_LABORAL', 'SOLICITADO', 100), None)
+        with self.assertLogs('app_Credito.pipeline', level='WARNING') as registro:
+            aplicar_deltas(deltas)
+        self.assertIn(f'recalcular_pipeline --empresa {self.empresa.id}', registro.output[0])
+
+    def test_baja_de_la_empresa_no_descuenta(self):
+        empresa = Empresa.objects.create(razon_social='Otra', email_contacto='otra@test.com')
+        self.nuevo_credito(empresa=empresa)
+        with self.assertNoLogs('app_Credito.pipeline', level='WARNING'):
+            empresa.delete()
+        self.assertEqual(obtener_resumen(empresa.id)['total']['cantidad'], 0)
+
+
+class PagosTests(CreditoTestCase):
+
+    def credito_desembolsado(self, monto=1200, cuotas=12):
+        credito = self.nuevo_credito(monto=monto, cuotas=cuotas, enum_estado='DESENBOLSADO')
+        abrir_cuentas([credito])
+        return credito
+
+    def credito_fuera_de_rango(self, **campos):
+        """Su total a pagar (mayor tasa admitida, 360 cuotas) no entra en SaldoCredito.total_pagar"""
+        credito = self.nuevo_credito(monto=Decimal('99999999.99'), cuotas=360, **campos)
+        Credito.objects.filter(pk=credito.pk).update(Tasa_Interes=Decimal('999.99'))
+        credito.refresh_from_db()
+        return credito
+
+    def test_desembolso_rechazado_si_el_total_no_entra_en_la_cuenta(self):
+        credito = self.credito_fuera_de_rango(fase_actual='FASE_7_DESEMBOLSO', enum_estado='Aprobado')
+        respuesta = self.client.patch(
+            f'{URL_CREDITOS}{credito.id}/transicion/', {'transicion': 'desembolsar'}, format='json'
+        )
+        self.assertEqual(respuesta.status_code, 400, respuesta.data)
+        credito.refresh_from_db()
+        self.assertEqual((credito.fase_actual, credito.enum_estado), ('FASE_7_DESEMBOLSO', 'Aprobado'))
+
+        valido = self.nuevo_credito(fase_actual='FASE_7_DESEMBOLSO', enum_estado='Aprobado')
+        respuesta = self.client.post(
+            f'{URL_CREDITOS}bulk-transition/', {'ids': [credito.id, valido.id], 'transicion': 'desembolsar'},
+            format='json',
+        )
+        self.assertEqual([r['ok'] for r in respuesta.data['resultados']], [False, True])
+        self.assertEqual(list(SaldoCredito.objects.values_list('credito_id', flat=True)), [valido.id])
+
+    def test_abrir_cuentas_omite_los_totales_fuera_de_rango(self):
+        credito = self.credito_fuera_de_rango(enum_estado='DESENBOLSADO')
+        valido = self.nuevo_credito(enum_estado='DESENBOLSADO')
+        self.assertEqual(abrir_cuentas([credito, valido]), [credito.id])
+        self.assertEqual(list(SaldoCredito.objects.values_list('credito_id', flat=True)), [valido.id])
+
+    def test_saldo_corriente_y_cierre(self):
+        credito = self.credito_desembolsado(monto=1200, cuotas=12)
+        cuotas = cronograma_credito(credito)['cuotas']
+        cuenta = SaldoCredito.objects.get(credito=credito)
+        total = cuenta.total_pagar
+
+        # Una cuota y media: cubre la primera y deja pendiente la mitad de la segunda
+        primera = Decimal(cuotas[0]['cuota'])
+        pago, cuenta = registrar_pago(credito, primera + Decimal('50.00'), self.usuario, fecha_pago=date(2026, 1, 10))
+        pago.refresh_from_db()
+        cuenta.refresh_from_db()
+        self.assertEqual(cuenta.saldo, total - primera - Decimal('50.00'))
+        self.assertEqual(cuenta.cuotas_pagadas, 1)
+        self.assertEqual(str(cuenta.proximo_vencimiento), cuotas[1]['fecha_vencimiento'])
+        self.assertEqual(cuenta.monto_proxima_cuota, Decimal(cuotas[1]['cuota']) - Decimal('50.00'))
+        self.assertEqual(pago.saldo_resultante, cuenta.saldo)
+
+        with self.assertRaises(ValidationError):
+            registrar_pago(credito, cuenta.saldo + Decimal('0.01'), self.usuario)
+
+        _, cuenta = registrar_pago(credito, cuenta.saldo, self.usuario, fecha_pago=date(2026, 2, 10))
+        cuenta.refresh_from_db()
+        self.assertEqual((cuenta.saldo, cuenta.total_pagado), (Decimal('0'), total))
+        self.assertEqual((cuenta.cuotas_pagadas, cuenta.proximo_vencimiento), (12, None))
+        credito.refresh_from_db()
+        self.assertEqual((credito.enum_estado, credito.Fecha_Finalizacion), ('FINALIZADO', date(2026, 2, 10)))
+        self.assertEqual(
+            list(credito.pagos.order_by('id').values_list('saldo_resultante', flat=True)),
+            [total - primera - Decimal('50.00'), Decimal('0')],
+        )
+
+    def test_libro_de_pagos_paginado(self):
+        credito = self.credito_desembolsado()
+        fechas = [date(2026, 1, 10), date(2026, 2, 10), date(2026, 2, 10)]
+        pagos = [registrar_pago(credito, Decimal('10.00'), self.usuario, fecha_pago=fecha)[0] for fecha in fechas]
+        url = f'{URL_CREDITOS}{credito.id}/pagos/'
+
+        respuesta = self.client.get(url, {'page_size': 2})
+        self.assertEqual([pago['id'] for pago in respuesta.data['pagos']], [pagos[2].id, pagos[1].id])
+        self.assertIsNotNone(respuesta.data['cuenta'])
+        respuesta = self.client.get(respuesta.data['next'])
+        self.assertEqual([pago['id'] for pago in respuesta.data['pagos']], [pagos[0].id])
+        self.assertIsNone(respuesta.data['next'])
+
+    def test_registrar_pago_solo_administradores(self):
+        credito = self.credito_desembolsado()
+        analista = User.objects.create_user('analista', 'analista@test.com', 'clave123456')
+        Perfiluser.objects.create(empresa=self.empresa, usuario=analista)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + Token.objects.create(user=analista).key)
+        url = f'{URL_CREDITOS}{credito.id}/pagos/'
+
+        self.assertEqual(self.client.get(url).status_code, 200)
+        respuesta = self.client.post(url, {'monto': '100.00'}, format='json')
+        self.assertEqual(respuesta.status_code, 403)
+        self.assertFalse(credito.pagos.exists())
+
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+        self.assertEqual(self.client.post(url, {'monto': '100.00'}, format='json').status_code, 201)
+
+
+class GananciasTests(CreditoTestCase):
+
+    def test_omite_los_creditos_que_desbordan_ganacia_esperada(self):
+        normal = self.nuevo_credito(monto=1200, cuotas=12)
+        grande = self.nuevo_credito(monto='99999999.99', cuotas=360)
+        Credito.objects.filter(pk=grande.pk).update(Tasa_Interes=99)
+
+        resultado = recalcular_ganancias(self.empresa.id)
+        self.assertEqual(resultado['creditos'], 2)
+        self.assertEqual(resultado['creados'], 1)
+        self.assertEqual(resultado['omitidos'], [grande.id])
+        self.assertEqual(list(Ganancia_Credito.objects.values_list('Credito_id', flat=True)), [normal.id])
+
+
+class ArchivoHistoricoTests(CreditoTestCase):
+
+    def test_archiva_solo_creditos_finalizados(self):
+        finalizado = self.nuevo_credito(enum_estado='FINALIZADO', fase_actual='FASE_8_FINALIZADO')
+        rechazado = self.nuevo_credito(enum_estado='Rechazado', fase_actual='FASE_6_REVISION')
+        for credito in (finalizado, rechazado):
+            HistoricoCredito.objects.create(
+                credito=credito, fase_anterior='FASE_5_GARANTE', fase_nueva=credito.fase_actual,
+                usuario_cambio=self.usuario, descripcion='cambio',
+            )
+
+        # Ambos sin cambios desde ayer: con dias=0 los dos cumplen la antigüedad
+        Credito.objects.update(fecha_actualizacion=timezone.now() - timedelta(days=1))
+        archivar_historico(dias=0)
+
+        self.assertEqual(list(HistoricoCreditoArchivo.objects.values_list('credito_id', flat=True)), [finalizado.id])
+        self.assertEqual(list(HistoricoCredito.objects.values_list('credito_id', flat=True)), [rechazado.id])
+
+
+class CambiarFaseTests(CreditoTestCase):
+
+    def test_fase_desactualizada_lanza_conflicto(self):
+        credito = self.nuevo_credito(fase_actual='FASE_5_GARANTE')
+        # Otra operación ya avanzó el crédito; esta instancia quedó con la fase anterior
+        cambiar_fase(Credito.objects.get(pk=credito.pk), 'FASE_6_REVISION', self.usuario, 'primera')
+        antes = obtener_resumen(self.empresa.id)
+
+        with self.assertRaises(ConflictoFase):
+            cambiar_fase(credito, 'FASE_6_REVISION', self.usuario, 'segunda')
+
+        self.assertEqual(list(credito.historico.values_list('descripcion', flat=True)), ['primera'])
+        self.assertEqual(obtener_resumen(self.empresa.id), antes)
+
+
+class TransicionesMasivasTests(CreditoTestCase):
+    url = f'{URL_CREDITOS}bulk-transition/'
+
+    def test_ids_validos_e_invalidos_y_contadores_balanceados(self):
+        validos = [self.nuevo_credito(monto=1000 + i, fase_actual='FASE_5_GARANTE') for i in range(2)]
+        otra_fase = self.nuevo_credito(monto=700, fase_actual='FASE_1_SOLICITUD')
+        otra_empresa = Empresa.objects.create(razon_social='Otra', email_contacto='otra@test.com')
+        ajeno = self.nuevo_credito(fase_actual='FASE_5_GARANTE', empresa=otra_empresa)
+        ids = [validos[0].id, otra_fase.id, ajeno.id, 999999, validos[1].id]
+
+        respuesta = self.client.post(self.url, {'ids': ids, 'transicion': 'enviar-revision'}, format='json')
+        self.assertEqual(respuesta.status_code, 200, respuesta.data)
+        self.assertEqual((respuesta.data['aplicados'], respuesta.data['rechazados']), (2, 3))
+        self.assertEqual([r['id'] for r in respuesta.data['resultados']], ids)
+        self.assertEqual([r['ok'] for r in respuesta.data['resultados']], [True, False, False, False, True])
+
+        self.assertEqual(
+            sorted(Credito.objects.filter(fase_actual='FASE_6_REVISION').values_list('id', flat=True)),
+            [validos[0].id, validos[1].id],
+        )
+        self.assertEqual(HistoricoCredito.objects.count(), 2)
+
+        # Los deltas aplicados coinciden con reconstruir los contadores desde cero
+        incremental = obtener_resumen(self.empresa.id)
+        self.assertEqual(incremental['por_fase']['FASE_6_REVISION'], {'cantidad': 2, 'monto_total': '2001.00'})
+        recalcular()
+        self.assertEqual(obtener_resumen(self.empresa.id), incremental)
+
+
+class EstadoActualTests(CreditoTestCase):
+
+    def test_una_consulta_con_todas_las_relaciones(self):
+        Documentacion.objects.create(ci='123', id_cliente=self.cliente)
+        Trabajo.objects.create(cargo='Cajero', empresa='Banco', salario=3000, id_cliente=self.cliente)
+        domicilio = Domicilio.objects.create(
+            descripcion='Centro', es_propietario=True, numero_ref='1', id_cliente=self.cliente
+        )
+        Garante.objects.create(nombrecompleto='Garante', ci='456', telefono='2', id_domicilio=domicilio)
+        credito = self.nuevo_credito()
+
+        with self.assertNumQueries(1):
+            estado = obtener_estado_actual(credito)
+        self.assertEqual(estado['documentacion']['ci'], '123')
+        self.assertEqual(estado['laboral']['salario'], '3000.00')
+        self.assertEqual(estado['domicilio']['descripcion'], 'Centro')
+        self.assertEqual(estado['garante']['ci'], '456')
+
+    def test_una_consulta_sin_relaciones(self):
+        credito = self.nuevo_credito()
+        with self.assertNumQueries(1):
+            estado = obtener_estado_actual(credito)
+        self.assertEqual((estado['documentacion'], estado['garante']), ({}, {}))
+
+
+class MaquinaEstadosTests(CreditoTestCase):
+
+    def transicion(self, credito, nombre, **datos):
+        return self.client.patch(
+            f'{URL_CREDITOS}{credito.id}/transicion/', {'transicion': nombre, **datos}, format='json'
+        )
+
+    def verificar_sin_cambios(self, credito, respuesta):
+        self.assertEqual(respuesta.status_code, 400, respuesta.data)
+        fase, estado = credito.fase_actual, credito.enum_estado
+        credito.refresh_from_db()
+        self.assertEqual((credito.fase_actual, credito.enum_estado), (fase, estado))
+        self.assertFalse(credito.historico.exists())
+
+    def test_transicion_desde_otra_fase(self):
+        credito = self.nuevo_credito(fase_actual='FASE_1_SOLICITUD')
+        self.verificar_sin_cambios(credito, self.transicion(credito, 'desembolsar'))
+        laboral = {'cargo': 'Cajero', 'empresa': 'Banco', 'salario': 3000, 'extracto_url': 'http://test.com/x'}
+        self.verificar_sin_cambios(credito, self.transicion(credito, 'agregar-laboral', **laboral))
+
+    def test_estado_requerido(self):
+        credito = self.nuevo_credito(fase_actual='FASE_7_DESEMBOLSO', enum_estado='Rechazado')
+        respuesta = self.transicion(credito, 'desembolsar')
+        self.assertIn('El crédito debe estar aprobado para desembolsar', respuesta.data['error'])
+        self.verificar_sin_cambios(credito, respuesta)
+
+    def test_transicion_desconocida_o_sin_datos(self):
+        credito = self.nuevo_credito(fase_actual='FASE_1_SOLICITUD')
+        self.verificar_sin_cambios(credito, self.transicion(credito, 'saltar-a-desembolso'))
+        self.verificar_sin_cambios(credito, self.transicion(credito, 'agregar-documentacion', ci='123'))
+
+    def test_tabla_invalida(self):
+        desconocida = Transicion('saltar', 'FASE_1_SOLICITUD', 'FASE_9', descripcion='', mensaje='')
+        with self.assertRaises(ImproperlyConfigured):
+            compilar((*TABLA_TRANSICIONES, desconocida))
+        with self.assertRaises(ImproperlyConfigured):
+            compilar((*TABLA_TRANSICIONES, TABLA_TRANSICIONES[0]))
+
+
+class ColaRevisionTests(CreditoTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.creditos = [self.nuevo_credito(monto=1000 + i, fase_actual='FASE_6_REVISION') for i in range(3)]
+        self.otro = User.objects.create_user('otro', 'otro@test.com', 'clave123456')
+
+    def aprobar(self, credito, usuario):
+        ejecutar_transicion(Credito.objects.get(pk=credito.pk), 'aprobar', {}, usuario)
+
+    def test_reclamos_sin_solapamiento(self):
+        mios, expira = reclamar(self.empresa.id, self.usuario, 2)
+        self.assertEqual(mios, [credito.id for credito in self.creditos[:2]])
+        self.assertGreater(expira, timezone.now())
+
+        suyos, _ = reclamar(self.empresa.id, self.otro, 5)
+        self.assertEqual(suyos, [self.creditos[2].id])
+        self.assertEqual(reclamar(self.empresa.id, self.otro, 5)[0], [])
+
+    def test_reserva_vencida_vuelve_a_la_cola(self):
+        ids, _ = reclamar(self.empresa.id, self.usuario, 1)
+        Credito.objects.filter(pk__in=ids).update(reserva_expira=timezone.now() - timedelta(seconds=1))
+
+        self.assertEqual(renovar(self.empresa.id, self.usuario, ids), 0)
+        self.assertEqual(reclamar(self.empresa.id, self.otro, 1)[0], ids)
+
+    def test_solo_el_analista_con_la_reserva_revisa(self):
+        credito = self.creditos[0]
+        with self.assertRaises(SinReserva):
+            self.aprobar(credito, self.usuario)
+
+        reclamar(self.empresa.id, self.otro, 1)
+        with self.assertRaises(ReservaOcupada):
+            self.aprobar(credito, self.usuario)
+
+        self.aprobar(credito, self.otro)
+        credito.refresh_from_db()
+        self.assertEqual((credito.fase_actual, credito.revisor_asignado_id), ('FASE_7_DESEMBOLSO', None))
+
+    def test_endpoint_responde_409_sin_reserva(self):
+        url = f'{URL_CREDITOS}{self.creditos[0].id}/revisar/'
+        self.assertEqual(self.client.patch(url, {'aprobado': True}, format='json').status_code, 409)
+
+        reclamar(self.empresa.id, self.usuario, 1)
+        self.assertEqual(self.client.patch(url, {'aprobado': True}, format='json').status_code, 200)
+
+    @override_settings(CREDITO_COLA_REVISION={'REQUERIR_RESERVA': False})
+    def test_sin_requerir_reserva_solo_bloquea_reservas_ajenas(self):
+        self.aprobar(self.creditos[0], self.usuario)
+        reclamar(self.empresa.id, self.otro, 1)
+        with self.assertRaises(ReservaOcupada):
+            self.aprobar(self.creditos[1], self.usuario)
+
+
+class LineaTiempoTests(CreditoTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.credito = self.nuevo_credito()
+        self.url = f'{URL_CREDITOS}{self.credito.id}/linea-tiempo/'
+        base = timezone.now() - timedelta(days=1)
+        # Dos eventos con la misma fecha: el id desempata
+        fechas = [base, base + timedelta(hours=1), base + timedelta(hours=1)]
+        for i, fecha in enumerate(fechas):
+            evento = HistoricoCredito.objects.create(
+                credito=self.credito, fase_nueva='FASE_1_SOLICITUD', usuario_cambio=self.usuario,
+                descripcion=f'activo {i}',
+            )
+            HistoricoCredito.objects.filter(pk=evento.pk).update(fecha_cambio=fecha)
+        for i in range(2):
+            HistoricoCreditoArchivo.objects.create(
+                id=1000 + i, credito=self.credito, fase_nueva='FASE_1_SOLICITUD',
+                fecha_cambio=base - timedelta(hours=2 - i), descripcion=f'archivado {i}',
+            )
+        self.esperado = ['activo 2', 'activo 1', 'activo 0', 'archivado 1', 'archivado 0']
+
+    def test_paginas_keyset_sobre_ambas_tablas(self):
+        descripciones = []
+        respuesta = self.client.get(self.url, {'page_size': 2})
+        while True:
+            self.assertEqual(respuesta.status_code, 200)
+            self.assertLessEqual(len(respuesta.data['linea_tiempo']), 2)
+            descripciones += [evento['descripcion'] for evento in respuesta.data['linea_tiempo']]
+            if respuesta.data['next'] is None:
+                break
+            respuesta = self.client.get(respuesta.data['next'])
+        self.assertEqual(descripciones, self.esperado)
+
+    def test_sin_paginacion_devuelve_la_linea_completa(self):
+        respuesta = self.client.get(self.url)
+        self.assertEqual([evento['descripcion'] for evento in respuesta.data['linea_tiempo']], self.esperado)
+        self.assertEqual(respuesta.data['total_cambios'], 5)
+
+    def test_cursor_invalido(self):
+        self.assertEqual(self.client.get(self.url, {'cursor': 'no-es-un-cursor'}).status_code, 404)
+
+
+class AmortizacionTests(SimpleTestCase):
+
+    def test_cada_cronograma_suma_capital_mas_interes(self):
+        montos = [100000, 123456789, 99, 5000000]
+        tasas = [12, 35.5, 0, 99]
+        cuotas = [12, 360, 7, 1]
+        for sistema in SISTEMAS:
+            with self.subTest(sistema=sistema):
+                cronogramas = calcular_cronogramas(montos, tasas, cuotas, [date(2026, 1, 31)] * 4, sistema)
+                totales = cronogramas.totales()
+                fin = cronogramas.inicio + cronogramas.cuotas_por_credito - 1
+                for i, monto in enumerate(montos):
+                    cuotas_credito = slice(cronogramas.inicio[i], fin[i] + 1)
+                    self.assertEqual(cronogramas.capital[cuotas_credito].sum(), monto)
+                    self.assertEqual(totales['total_pagar'][i], monto + totales['total_interes'][i])
+                    self.assertEqual(cronogramas.saldo[fin[i]], 0)
+                    self.assertTrue((cronogramas.interes[cuotas_credito] >= 0).all())
+                # Sin tasa no hay interés
+                self.assertEqual(totales['total_interes'][2], 0)
+
+    def test_frances_ultima_cuota_cerca_de_la_cuota_fija(self):
+        # Monto chico a plazo largo, tasas altas y la mayor tasa que admite Tasa_Interes
+        casos = [(100000, 24, 360), (100000, 12, 360), (100000, 80, 240), (100000, 999.99, 360), (99, 50, 360)]
+        with warnings.catch_warnings():
+            warnings.simplefilter('error')
+            cronogramas = calcular_cronogramas(*zip(*casos), [date(2026, 1, 31)] * len(casos))
+        fin = cronogramas.inicio + cronogramas.cuotas_por_credito - 1
+        for i, (monto, tasa, cuotas) in enumerate(casos):
+            with self.subTest(tasa=tasa, cuotas=cuotas):
+                primera, ultima = cronogramas.cuota[cronogramas.inicio[i]], cronogramas.cuota[fin[i]]
+                self.assertGreaterEqual(ultima, 0)
+                self.assertLessEqual(abs(ultima - primera), cuotas / 2)
+                self.assertEqual(cronogramas.capital[cronogramas.inicio[i]:fin[i] + 1].sum(), monto)
+
+    def test_vencimientos_al_fin_de_mes(self):
+        cronogramas = calcular_cronogramas([30000], [10], [3], [date(2026, 1, 31)])
+        self.assertEqual(
+            [str(fecha) for fecha in cronogramas.fecha], ['2026-02-28', '2026-03-31', '2026-04-30']
+        )
+
+
+class CronogramaCarteraTests(CreditoTestCase):
+    url = f'{URL_CREDITOS}cronograma-cartera/'
+
+    def test_por_lotes_igual_que_en_una_pasada(self):
+        for i in range(5):
+            self.nuevo_credito(monto=1000 + 250 * i, cuotas=6 + 6 * i)
+        self.nuevo_credito(cuotas=0)
+        creditos = Credito.objects.filter(empresa=self.empresa)
+
+        completo = cronograma_cartera(creditos, detalle=True)
+        self.assertEqual(cronograma_cartera(creditos, detalle=True, batch_size=2), completo)
+        self.assertEqual((completo['creditos'], len(completo['omitidos'])), (5, 1))
+        self.assertEqual(completo['totales']['cuotas'], 6 + 12 + 18 + 24 + 30)
+
+    def test_detalle_acotado(self):
+        for _ in range(3):
+            self.nuevo_credito()
+        with mock.patch('app_Credito.api_rest.MAX_CREDITOS_DETALLE', 2):
+            self.assertEqual(self.client.get(self.url, {'detalle': 1}).status_code, 400)
+            self.assertEqual(self.client.get(self.url).status_code, 200)
+
+
+class SimuladorTests(CreditoTestCase):
+    url = '/api/Creditos/simular/'
+
+    def simular(self, **datos):
+        datos.setdefault('tipo_credito', self.tipo_credito.id)
+        datos.setdefault('montos', [5000, 1000])
+        datos.setdefault('cuotas', [12, 6])
+        datos.setdefault('tasas', [0, 12.5])
+        return self.client.post(self.url, datos, format='json')
+
+    def test_grilla_ordenada_y_coherente_con_el_cronograma(self):
+        respuesta = self.simular()
+        self.assertEqual(respuesta.status_code, 200, respuesta.data)
+        cotizaciones = respuesta.data['cotizaciones']
+        self.assertEqual(respuesta.data['cantidad'], 8)
+        self.assertEqual(
+            [(c['monto'], c['cuotas'], c['tasa_interes_anual']) for c in cotizaciones[:4]],
+            [('1000.00', 6, '0.00'), ('1000.00', 6, '12.50'), ('1000.00', 12, '0.00'), ('1000.00', 12, '12.50')],
+        )
+
+        sin_interes = cotizaciones[0]
+        self.assertEqual((sin_interes['total_interes'], sin_interes['total_pagar']), ('0.00', '1000.00'))
+
+        cotizacion = cotizaciones[-1]
+        totales = calcular_cronogramas([500000], [12.5], [12], [date(2026, 1, 1)]).totales()
+        self.assertEqual(Decimal(cotizacion['primera_cuota']), Decimal(int(totales['primera_cuota'][0])) / 100)
+        self.assertEqual(Decimal(cotizacion['total_pagar']), Decimal(int(totales['total_pagar'][0])) / 100)
+
+    def test_validaciones(self):
+        self.assertEqual(self.simular(montos=[50]).status_code, 400)
+        self.assertEqual(self.simular(cuotas=[361]).status_code, 400)
+        # 11 x 10 x 10 combinaciones, más que MAX_COMBINACIONES
+        grande = self.simular(montos=list(range(100, 1200, 100)), cuotas=list(range(1, 11)), tasas=list(range(10)))
+        self.assertEqual(grande.status_code, 400)
+
+        otra_empresa = Empresa.objects.create(razon_social='Otra', email_contacto='otra@test.com')
+        ajeno = Tipo_Credito.objects.create(
+            nombre='Ajeno', descripcion='', monto_minimo=0, monto_maximo=100000, empresa=otra_empresa
+        )
+        self.assertEqual(self.simular(tipo_credito=ajeno.id).status_code, 404)
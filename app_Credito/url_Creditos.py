@@ -1,7 +1,7 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .api_rest import CreditoViewSet, TipoCreditoViewSet
-from .api import HistorialCreditoView, HistorialCreditoCIView , EstadoCreditoCIView
+from .api import HistorialCreditoView, HistorialCreditoCIView , EstadoCreditoCIView, SimularCreditoView
 from .api_test import test_tipo_credito
 
 router = DefaultRouter()
@@ -13,5 +13,6 @@ urlpatterns = [
     path('historial/', HistorialCreditoView.as_view(), name='historial-credito'),
     path('historial/<str:ci>/', HistorialCreditoCIView.as_view(), name='historial-credito-ci'),
     path('estado-credito/<str:ci>/', EstadoCreditoCIView.as_view(), name='estado-credito-ci'),
+    path('simular/', SimularCreditoView.as_view(), name='simular-credito'),
     path('test/tipos/', test_tipo_credito, name='test-tipos-credito'),
 ]
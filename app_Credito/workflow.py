@@ -1,43 +1,92 @@
 """
 Servicios y funciones para manejar el workflow de créditos
 """
+from django.db import transaction
 from django.utils import timezone
-from .models import Credito, HistoricoCredito, ENUM_FASE_CREDITO
+from .models import Credito, HistoricoCredito, HistoricoCreditoArchivo, ENUM_FASE_CREDITO
+from .pipeline import mover
 from app_Cliente.models import Documentacion, Trabajo, Domicilio, Garante
-from rest_framework.exceptions import ValidationError
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
 
 
-def cambiar_fase(credito, fase_nueva, usuario, descripcion="", datos_agregados=None):
+# Secuencia de fases y posición de cada una (calculadas una vez al importar)
+SECUENCIA_FASES = tuple(fase for fase, _ in ENUM_FASE_CREDITO)
+POSICION_FASE = {fase: posicion for posicion, fase in enumerate(SECUENCIA_FASES)}
+
+
+class ConflictoFase(APIException):
+    """El crédito ya no está en la fase (o estado) esperada: otra operación lo modificó"""
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'El crédito fue modificado por otra operación. Recargue e intente nuevamente.'
+    default_code = 'conflicto_fase'
+
+
+def cambiar_fase(credito, fase_nueva, usuario, descripcion="", datos_agregados=None,
+                 campos=(), fase_esperada=None, estado_esperado=None):
     """
     Cambia el crédito a una nueva fase y registra en el histórico
     
+    El cambio es un único UPDATE condicional (WHERE fase_actual = fase esperada) que
+    escribe solo fase_actual, fecha_actualizacion y los `campos` indicados, junto con el
+    INSERT del histórico y el ajuste de los contadores del pipeline en la misma
+    transacción. Si otra operación ya movió el crédito, el UPDATE no afecta filas y se
+    lanza ConflictoFase en lugar de avanzar dos veces.
+    
     Args:
         credito: Objeto Credito
         fase_nueva: Nueva fase (debe ser una opción válida en ENUM_FASE_CREDITO)
         usuario: Usuario que realiza el cambio
         descripcion: Descripción del cambio
         datos_agregados: Dict con datos agregados en esta fase
+        campos: Otros campos del crédito (ya asignados en memoria) a persistir en el mismo UPDATE
+        fase_esperada: Fase que debe tener en base de datos (por defecto credito.fase_actual)
+        estado_esperado: enum_estado que debe tener en base de datos (obligatorio si
+            `campos` incluye enum_estado, para descontarlo del pipeline)
     
     Returns:
         HistoricoCredito creado
+    
+    Raises:
+        ConflictoFase si el crédito ya no está en la fase/estado esperados
     """
     if datos_agregados is None:
         datos_agregados = {}
+    if fase_esperada is None:
+        fase_esperada = credito.fase_actual
     
-    # Crear registro en histórico
-    historico = HistoricoCredito.objects.create(
-        credito=credito,
-        fase_anterior=credito.fase_actual,
-        fase_nueva=fase_nueva,
-        usuario_cambio=usuario,
-        descripcion=descripcion,
-        datos_agregados=datos_agregados
-    )
-    
-    # Actualizar la fase actual del crédito
-    credito.fase_actual = fase_nueva
-    credito.save()
+    filtros = {'pk': credito.pk, 'fase_actual': fase_esperada}
+    if estado_esperado is not None:
+        filtros['enum_estado'] = estado_esperado
+    
+    ahora = timezone.now()
+    valores = {campo: getattr(credito, campo) for campo in campos}
+    estado_anterior = estado_esperado if estado_esperado is not None else credito.enum_estado
     
+    with transaction.atomic():
+        actualizados = Credito.objects.filter(**filtros).update(
+            fase_actual=fase_nueva,
+            fecha_actualizacion=ahora,
+            **valores
+        )
+        if not actualizados:
+            raise ConflictoFase()
+        
+        # Crear registro en histórico
+        historico = HistoricoCredito.objects.create(
+            credito=credito,
+            fase_anterior=fase_esperada,
+            fase_nueva=fase_nueva,
+            usuario_cambio=usuario,
+            descripcion=descripcion,
+            datos_agregados=datos_agregados
+        )
+        
+        nueva = (credito.empresa_id, fase_nueva, credito.enum_estado, credito.Monto_Solicitado)
+        mover((credito.empresa_id, fase_esperada, estado_anterior, credito.Monto_Solicitado), nueva)
+    
+    credito.fase_actual = fase_nueva
+    credito.fecha_actualizacion = ahora
     return historico
 
 
@@ -52,19 +101,8 @@ def validar_fase_secuencial(fase_actual, fase_solicitada):
     Raises:
         ValidationError si no es válido
     """
-    secuencia_fases = [
-        'FASE_1_SOLICITUD',
-        'FASE_2_DOCUMENTACION',
-        'FASE_3_LABORAL',
-        'FASE_4_DOMICILIO',
-        'FASE_5_GARANTE',
-        'FASE_6_REVISION',
-        'FASE_7_DESEMBOLSO',
-        'FASE_8_FINALIZADO',
-    ]
-    
-    idx_actual = secuencia_fases.index(fase_actual)
-    idx_solicitada = secuencia_fases.index(fase_solicitada)
+    idx_actual = POSICION_FASE[fase_actual]
+    idx_solicitada = POSICION_FASE[fase_solicitada]
     
     # Solo permite avanzar a la siguiente fase o más adelante
     if idx_solicitada <= idx_actual:
@@ -74,58 +112,124 @@ def validar_fase_secuencial(fase_actual, fase_solicitada):
     
     if idx_solicitada > idx_actual + 1:
         raise ValidationError(
-            f"Debe completar las fases intermedias. Próxima fase: {secuencia_fases[idx_actual + 1]}"
+            f"Debe completar las fases intermedias. Próxima fase: {SECUENCIA_FASES[idx_actual + 1]}"
         )
 
 
-def obtener_linea_tiempo(credito):
+def consultas_linea_tiempo(credito, desde=None):
     """
-    Obtiene la línea de tiempo completa de un crédito
+    Histórico de un crédito con su usuario (JOIN), del más reciente al más antiguo,
+    en la tabla activa y en el archivo (ver archivo_historico.py)
     
     Args:
         credito: Objeto Credito
+        desde: Solo eventos posteriores a esta fecha (opcional)
     
     Returns:
-        Lista de dict con el histórico formateado
+        Tupla de QuerySets (activo, archivo) ordenados por (-fecha_cambio, -id), cada uno
+        cubierto por su índice (credito, fecha_cambio, id)
+    """
+    consultas = []
+    for modelo in (HistoricoCredito, HistoricoCreditoArchivo):
+        historico = modelo.objects.filter(credito=credito).select_related('usuario_cambio')
+        if desde is not None:
+            historico = historico.filter(fecha_cambio__gt=desde)
+        consultas.append(historico.order_by('-fecha_cambio', '-id'))
+    return tuple(consultas)
+
+
+def orden_evento(evento):
+    return (evento.fecha_cambio, evento.pk)
+
+
+def mezclar_eventos(*consultas):
+    """
+    Unir eventos de la tabla activa y del archivo, del más reciente al más antiguo.
+    Mientras un lote se archiva una fila puede leerse en ambas tablas (conserva su id):
+    se deja una sola.
     """
-    historico = HistoricoCredito.objects.filter(credito=credito)
+    eventos = {}
+    for consulta in consultas:
+        for evento in consulta:
+            eventos.setdefault(evento.pk, evento)
+    return sorted(eventos.values(), key=orden_evento, reverse=True)
+
+
+def formatear_evento(evento):
+    return {
+        'fase_anterior': evento.fase_anterior,
+        'fase_nueva': evento.fase_nueva,
+        'fecha_cambio': evento.fecha_cambio,
+        'usuario': evento.usuario_cambio.username if evento.usuario_cambio else 'Sistema',
+        'descripcion': evento.descripcion,
+        'datos_agregados': evento.datos_agregados,
+    }
+
+
+def obtener_linea_tiempo(credito, desde=None):
+    """
+    Obtiene la línea de tiempo completa de un crédito
     
-    linea_tiempo = []
-    for evento in historico:
-        linea_tiempo.append({
-            'fase_anterior': evento.fase_anterior,
-            'fase_nueva': evento.fase_nueva,
-            'fecha_cambio': evento.fecha_cambio,
-            'usuario': evento.usuario_cambio.username if evento.usuario_cambio else 'Sistema',
-            'descripcion': evento.descripcion,
-            'datos_agregados': evento.datos_agregados,
-        })
+    Args:
+        credito: Objeto Credito
+        desde: Solo eventos posteriores a esta fecha (opcional)
     
-    return linea_tiempo
+    Returns:
+        Lista de dict con el histórico formateado
+    """
+    return [formatear_evento(evento) for evento in mezclar_eventos(*consultas_linea_tiempo(credito, desde))]
+
+
+# Relaciones que necesita el estado actual, cargadas con un único JOIN
+RELACIONES_ESTADO = (
+    'cliente',
+    'cliente__documentacion',
+    'cliente__trabajo',
+    'cliente__domicilio__garante',
+)
 
 
 def obtener_estado_actual(credito):
     """
     Obtiene el estado actual del crédito con información detallada
     
+    Recarga el crédito con cliente, documentación, trabajo, domicilio y garante en
+    una sola consulta (los datos pudieron cambiar en la misma petición).
+    
     Args:
         credito: Objeto Credito
     
     Returns:
         Dict con el estado actual
     """
+    credito = Credito.objects.select_related(*RELACIONES_ESTADO).get(pk=credito.pk)
+    return construir_estado_actual(credito)
+
+
+def construir_estado_actual(credito):
+    """
+    Arma el dict de estado a partir de un crédito cargado con select_related(*RELACIONES_ESTADO)
+    
+    Args:
+        credito: Objeto Credito con las relaciones ya cargadas
+    
+    Returns:
+        Dict con el estado actual
+    """
+    cliente = credito.cliente
+    
     # Información del cliente
     cliente_info = {
-        'id': credito.cliente.id,
-        'nombre': credito.cliente.nombre,
-        'apellido': credito.cliente.apellido,
-        'telefono': credito.cliente.telefono,
+        'id': cliente.id,
+        'nombre': cliente.nombre,
+        'apellido': cliente.apellido,
+        'telefono': cliente.telefono,
     }
     
     # Información de documentación
     documentacion_info = {}
     try:
-        doc = Documentacion.objects.get(id_cliente=credito.cliente)
+        doc = cliente.documentacion
         documentacion_info = {
             'ci': doc.ci,
             'documento_url': doc.documento_url,
@@ -136,7 +240,7 @@ def obtener_estado_actual(credito):
     # Información laboral
     laboral_info = {}
     try:
-        trabajo = Trabajo.objects.get(id_cliente=credito.cliente)
+        trabajo = cliente.trabajo
         laboral_info = {
             'cargo': trabajo.cargo,
             'empresa': trabajo.empresa,
@@ -146,30 +250,23 @@ def obtener_estado_actual(credito):
     except Trabajo.DoesNotExist:
         pass
     
-    # Información de domicilio
+    # Información de domicilio y garante (el garante cuelga del domicilio)
     domicilio_info = {}
+    garante_info = {}
     try:
-        domicilio = Domicilio.objects.get(id_cliente=credito.cliente)
+        domicilio = cliente.domicilio
         domicilio_info = {
             'descripcion': domicilio.descripcion,
             'es_propietario': domicilio.es_propietario,
             'croquis_url': domicilio.croquis_url,
             'numero_ref': domicilio.numero_ref,
         }
-    except Domicilio.DoesNotExist:
-        pass
-    
-    # Información de garante
-    garante_info = {}
-    try:
-        if domicilio_info:
-            domicilio = Domicilio.objects.get(id_cliente=credito.cliente)
-            garante = Garante.objects.get(id_domicilio=domicilio)
-            garante_info = {
-                'nombrecompleto': garante.nombrecompleto,
-                'ci': garante.ci,
-                'telefono': garante.telefono,
-            }
+        garante = domicilio.garante
+        garante_info = {
+            'nombrecompleto': garante.nombrecompleto,
+            'ci': garante.ci,
+            'telefono': garante.telefono,
+        }
     except (Domicilio.DoesNotExist, Garante.DoesNotExist):
         pass
     
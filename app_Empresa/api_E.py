@@ -1,10 +1,13 @@
-from app_Empresa.serializers import EmpresaSerializer, RegisterEmpresaUserSerializer, LoginSerializer, LogoutSerializer, SuscripcionSerializer , OnPremiseSerializer , ConfiguracionSerializer
+from app_Empresa.serializers import EmpresaSerializer, RegisterEmpresaUserSerializer, LoginSerializer, LogoutSerializer, SuscripcionSerializer , OnPremiseSerializer , ConfiguracionSerializer, RefreshAccessSerializer
 from rest_framework import viewsets, permissions, status
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework.parsers import JSONParser, FormParser, MultiPartParser
 from app_Empresa.models import Empresa, Suscripcion , on_premise , Configuracion
 from app_User.models import Perfiluser
+from app_User.tenant import get_tenant_perfil
+from app_User.signed_tokens import signed_tokens_enabled
+from app_User.throttling import LoginIPThrottle, LoginEmailThrottle, RegistroIPThrottle, RegistroEmailThrottle
 from .s3_utils import upload_empresa_logo, upload_user_avatar
 import traceback
 
@@ -14,9 +17,8 @@ class ConfiguracionViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         """Filtrar configuraciones por empresa del usuario"""
-        user = self.request.user
         try:
-            perfil = Perfiluser.objects.get(usuario=user)
+            perfil = get_tenant_perfil(self.request)
             return Configuracion.objects.filter(empresa=perfil.empresa)
         except Perfiluser.DoesNotExist:
             return Configuracion.objects.none()
@@ -24,7 +26,7 @@ class ConfiguracionViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         """Auto-asignar empresa al crear configuración"""
         try:
-            perfil = Perfiluser.objects.get(usuario=self.request.user)
+            perfil = get_tenant_perfil(self.request)
             serializer.save(empresa=perfil.empresa)
         except Perfiluser.DoesNotExist:
             pass
@@ -65,9 +67,8 @@ class SuscripcionViewSet(viewsets.ModelViewSet):
     
     def get_queryset(self):
         """Filtrar suscripciones por empresa del usuario"""
-        user = self.request.user
         try:
-            perfil = Perfiluser.objects.get(usuario=user)
+            perfil = get_tenant_perfil(self.request)
             return Suscripcion.objects.filter(empresa=perfil.empresa)
         except Perfiluser.DoesNotExist:
             return Suscripcion.objects.none()
@@ -75,7 +76,7 @@ class SuscripcionViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         """Auto-asignar empresa al crear suscripción"""
         try:
-            perfil = Perfiluser.objects.get(usuario=self.request.user)
+            perfil = get_tenant_perfil(self.request)
             serializer.save(empresa=perfil.empresa)
         except Perfiluser.DoesNotExist:
             pass
@@ -87,6 +88,7 @@ class RegisterView(APIView):
     """
     permission_classes = [permissions.AllowAny]
     parser_classes = [JSONParser, FormParser, MultiPartParser]
+    throttle_classes = [RegistroIPThrottle, RegistroEmailThrottle]
     
     def post(self, request):
         serializer = RegisterEmpresaUserSerializer(data=request.data)
@@ -147,9 +149,10 @@ class LoginView(APIView):
     """
     permission_classes = [permissions.AllowAny]
     parser_classes = [JSONParser, FormParser, MultiPartParser]
+    throttle_classes = [LoginIPThrottle, LoginEmailThrottle]  # Se rechaza antes de hashear la contraseña
     
     def post(self, request):
-        serializer = LoginSerializer(data=request.data)
+        serializer = LoginSerializer(data=request.data, context={'request': request})
         
         if serializer.is_valid():
             try:
@@ -170,6 +173,10 @@ class LoginView(APIView):
                     }
                 }
                 
+                if 'access_token' in result:
+                    response_data['access_token'] = result['access_token']
+                    response_data['expires_in'] = result['expires_in']
+                
                 return Response(response_data, status=status.HTTP_200_OK)
                 
             except Exception as e:
@@ -184,6 +191,34 @@ class LoginView(APIView):
             )
 
 
+class RefreshAccessView(APIView):
+    """
+    API para renovar el token de acceso firmado usando el token de login (ancla)
+    Solo disponible si SIGNED_ACCESS_TOKENS['ENABLED'] está activo
+    """
+    permission_classes = [permissions.AllowAny]
+    parser_classes = [JSONParser, FormParser, MultiPartParser]
+    throttle_classes = [LoginIPThrottle]  # Mismo límite por IP que el login: evita probar tokens sin freno
+    
+    def post(self, request):
+        if not signed_tokens_enabled():
+            return Response(
+                {'error': 'Los tokens de acceso firmados no están habilitados'}, 
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        serializer = RefreshAccessSerializer(data=request.data)
+        
+        if serializer.is_valid():
+            result = serializer.save()
+            return Response(result, status=status.HTTP_200_OK)
+        else:
+            return Response(
+                {'errors': serializer.errors}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+
 class LogoutView(APIView):
     """
     API para logout, elimina el token
@@ -224,6 +259,7 @@ class RegisterEmpresaUserAPIView(APIView):
     parser_classes = (MultiPartParser, FormParser, JSONParser)
     permission_classes = [permissions.AllowAny]  # Público para permitir registros
     authentication_classes = []  # Sin autenticación requerida
+    throttle_classes = [RegistroIPThrottle, RegistroEmailThrottle]
     
     def dispatch(self, request, *args, **kwargs):
         """Override dispatch para capturar errores de parsing y debugging"""
@@ -0,0 +1,67 @@
+"""
+Benchmark del login: compara el flujo anterior (get por email + authenticate +
+get_or_create del token + perfil + empresa) con LoginSerializer.
+
+Uso:
+    python manage.py benchmark_login --email admin@empresa.com --password secreto --iteraciones 50
+"""
+import time
+from django.contrib.auth import authenticate
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from app_Empresa.serializers import LoginSerializer
+from app_User.models import Perfiluser
+
+
+def login_anterior(email, password):
+    """Reproducción del flujo de login previo, solo para comparar"""
+    user = User.objects.get(email=email)
+    user = authenticate(username=user.username, password=password)
+    token, created = Token.objects.get_or_create(user=user)
+    try:
+        perfil_user = Perfiluser.objects.get(usuario=user)
+        empresa_nombre = perfil_user.empresa.razon_social
+    except Perfiluser.DoesNotExist:
+        empresa_nombre = None
+    return token.key, empresa_nombre
+
+
+def login_actual(email, password):
+    serializer = LoginSerializer(data={'email': email, 'password': password})
+    serializer.is_valid(raise_exception=True)
+    return serializer.save()
+
+
+class Command(BaseCommand):
+    help = 'Mide logins/segundo y consultas por login (flujo anterior vs. actual)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--email', required=True)
+        parser.add_argument('--password', required=True)
+        parser.add_argument('--iteraciones', type=int, default=20)
+
+    def medir(self, nombre, funcion, email, password, iteraciones):
+        with CaptureQueriesContext(connection) as consultas:
+            funcion(email, password)
+        total_consultas = len(consultas)
+
+        inicio = time.perf_counter()
+        for _ in range(iteraciones):
+            funcion(email, password)
+            reset_queries()
+        duracion = time.perf_counter() - inicio
+        self.stdout.write(
+            f"{nombre:<10} {iteraciones / duracion:10.2f} logins/s  "
+            f"{duracion / iteraciones * 1000:8.2f} ms/login  {total_consultas} consultas/login"
+        )
+
+    def handle(self, *args, **options):
+        email, password = options['email'], options['password']
+        if not User.objects.filter(email=email).exists():
+            raise CommandError(f"No existe un usuario con email {email}")
+
+        self.medir('anterior', login_anterior, email, password, options['iteraciones'])
+        self.medir('actual', login_actual, email, password, options['iteraciones'])
@@ -6,6 +6,7 @@ from botocore.exceptions import ClientError
 from django.conf import settings
 import os
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 
@@ -21,13 +22,14 @@ def get_s3_client():
     )
 
 
-def upload_file_to_s3(file, folder='uploads'):
+def upload_file_to_s3(file, folder='uploads', s3_client=None):
     """
     Subir un archivo a S3 y retornar la URL
     
     Args:
         file: Archivo de Django (InMemoryUploadedFile o TemporaryUploadedFile)
         folder: Carpeta dentro del bucket donde se guardará (default: 'uploads')
+        s3_client: Cliente de S3 a reutilizar (opcional, se crea uno si no se pasa)
     
     Returns:
         str: URL del archivo en S3, o None si falla
@@ -36,7 +38,7 @@ def upload_file_to_s3(file, folder='uploads'):
         return None
     
     try:
-        s3_client = get_s3_client()
+        s3_client = s3_client or get_s3_client()
         
         # Generar nombre único para el archivo
         timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
@@ -86,6 +88,29 @@ def upload_user_avatar(file):
     return upload_file_to_s3(file, folder='usuarios/avatars')
 
 
+def upload_user_avatars(files, max_workers=8):
+    """
+    Subir varios avatares de usuario a S3 en paralelo
+    
+    Args:
+        files: Lista de archivos (los elementos None se ignoran)
+        max_workers: Número máximo de subidas simultáneas
+    
+    Returns:
+        list: URLs en el mismo orden que files (None si no había archivo o falló)
+    """
+    if not any(files):
+        return [None] * len(files)
+    
+    # Un solo cliente compartido: los clientes de boto3 son seguros entre hilos, la sesión no
+    s3_client = get_s3_client()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(
+            lambda file: upload_file_to_s3(file, folder='usuarios/avatars', s3_client=s3_client),
+            files
+        ))
+
+
 def upload_client_document(file):
     """
     Subir documento de cliente a S3 en la carpeta 'clientes/documentos'
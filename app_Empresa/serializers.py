@@ -2,15 +2,19 @@ from rest_framework.serializers import ModelSerializer, Serializer
 from rest_framework import serializers
 from app_Empresa.models import Empresa, Suscripcion , on_premise
 from django.contrib.auth.models import User
+from django.contrib.auth.signals import user_login_failed
 from app_User.models import Perfiluser
 from django.contrib.auth.hashers import make_password
 from rest_framework.authtoken.models import Token
 from django.db import transaction
-from django.contrib.auth import authenticate
+from django.db.models import F
 from datetime import timedelta
 from django.utils import timezone
 from .models import Configuracion
 from .s3_utils import upload_empresa_logo, upload_user_avatar 
+from app_User.token_cache import invalidate_token
+from app_User.signed_tokens import signed_tokens_enabled, issue_access_token
+from app_User.token_expiry import token_expirado
 
 class ConfiguracionSerializer(ModelSerializer):
     class Meta:
@@ -98,7 +102,7 @@ class RegisterEmpresaUserSerializer(Serializer):
         return value
     
     def validate_email(self, value):
-        if User.objects.filter(email=value).exists():
+        if User.objects.filter(email__iexact=value).exists():
             raise serializers.ValidationError("El email ya está registrado")
         return value
     
@@ -178,23 +182,36 @@ class LoginSerializer(Serializer):
         password = data.get('password')
         
         if email and password:
-            # Buscar usuario por email
-            try:
-                user = User.objects.get(email=email)
-                username = user.username
-            except User.DoesNotExist:
-                raise serializers.ValidationError("Credenciales inválidas")
-            
-            # Autenticar con username y password
-            user = authenticate(username=username, password=password)
+            # Una sola consulta: usuario por email (índice UPPER(email)) + token + perfil + empresa
+            user = (
+                User.objects
+                .filter(email__iexact=email)
+                .annotate(
+                    token_key=F('auth_token__key'),
+                    token_created=F('auth_token__created'),
+                    perfil_empresa_id=F('perfiluser__empresa_id'),
+                    perfil_empresa_nombre=F('perfiluser__empresa__razon_social'),
+                )
+                .order_by('id')
+                .first()
+            )
             
-            if user:
-                if user.is_active:
-                    data['user'] = user
-                else:
-                    raise serializers.ValidationError("Usuario inactivo")
-            else:
+            # Verificar la contraseña sobre el usuario ya cargado (authenticate() volvería a consultarlo)
+            if user is None:
+                # Como ModelBackend: calcular un hash igualmente para que el tiempo de respuesta
+                # no revele si el email está registrado
+                User().set_password(password)
+            # Un usuario inactivo recibe el mismo error genérico (como authenticate()), para
+            # no revelar que la cuenta existe y está deshabilitada
+            if user is None or not user.check_password(password) or not user.is_active:
+                user_login_failed.send(
+                    sender=__name__,
+                    credentials={'email': email, 'password': '********'},
+                    request=self.context.get('request'),
+                )
                 raise serializers.ValidationError("Credenciales inválidas")
+            
+            data['user'] = user
         else:
             raise serializers.ValidationError("Email y password son requeridos")
             
@@ -203,20 +220,23 @@ class LoginSerializer(Serializer):
     def create(self, validated_data):
         user = validated_data['user']
         
-        # Crear o obtener token
-        token, created = Token.objects.get_or_create(user=user)
+        # Reutilizar el token cargado junto al usuario; solo se inserta si no existe o venció
+        if user.token_key and not token_expirado(user.token_created):
+            token = Token(key=user.token_key, user=user, created=user.token_created)
+        else:
+            # Dos logins simultáneos pueden rotar el mismo token vencido: get_or_create
+            # reutiliza el token que haya creado el otro en lugar de fallar por user_id único
+            with transaction.atomic():
+                if user.token_key:
+                    invalidate_token(user.token_key)
+                    Token.objects.filter(key=user.token_key).delete()
+                token, created = Token.objects.get_or_create(user=user)
         
-        # Obtener perfil de usuario y empresa
-        try:
-            perfil_user = Perfiluser.objects.get(usuario=user)
-            empresa = perfil_user.empresa
-            empresa_id = empresa.id
-            empresa_nombre = empresa.razon_social
-        except Perfiluser.DoesNotExist:
-            empresa_id = None
-            empresa_nombre = None
+        # Perfil de usuario y empresa (ya vienen en la consulta de validate)
+        empresa_id = user.perfil_empresa_id
+        empresa_nombre = user.perfil_empresa_nombre
         
-        return {
+        result = {
             'token': token.key,
             'user_id': user.id,
             'username': user.username,
@@ -227,6 +247,34 @@ class LoginSerializer(Serializer):
             'empresa_id': empresa_id,
             'empresa_nombre': empresa_nombre
         }
+        
+        # Modo opcional: token de acceso firmado de vida corta (el token anterior sirve para renovarlo)
+        if signed_tokens_enabled():
+            result.update(issue_access_token(token, empresa_id))
+        
+        return result
+
+
+class RefreshAccessSerializer(Serializer):
+    """Emite un nuevo token de acceso firmado a partir del token de authtoken (ancla)"""
+    token = serializers.CharField()
+    
+    def validate_token(self, value):
+        try:
+            token = Token.objects.select_related('user').get(key=value)
+        except Token.DoesNotExist:
+            raise serializers.ValidationError("Token inválido")
+        if not token.user.is_active:
+            raise serializers.ValidationError("Usuario inactivo")
+        if token_expirado(token.created):
+            raise serializers.ValidationError("Token expirado")
+        return token
+    
+    def create(self, validated_data):
+        token = validated_data['token']
+        perfil_user = Perfiluser.objects.filter(usuario=token.user).only('empresa_id').first()
+        empresa_id = perfil_user.empresa_id if perfil_user else None
+        return issue_access_token(token, empresa_id)
 
 
 class LogoutSerializer(Serializer):
@@ -241,6 +289,7 @@ class LogoutSerializer(Serializer):
     
     def create(self, validated_data):
         token = validated_data['token']
+        invalidate_token(token.key)
         token.delete()
         return {'message': 'Logout exitoso'}
 
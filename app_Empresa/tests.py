@@ -1,3 +1,120 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.exceptions import ValidationError
+from rest_framework.test import APIClient
+from app_User.throttling import AuthRateThrottle, LoginIPThrottle, get_throttle_cache, obtener_metricas
+from .serializers import LoginSerializer, RegisterEmpresaUserSerializer
 
-# Create your tests here.
+
+@override_settings(AUTH_TOKEN_EXPIRY={'TTL': 3600})
+class LoginTokenTests(TestCase):
+
+    def setUp(self):
+        self.usuario = User.objects.create_user('ana', 'ana@test.com', 'clave123456')
+        self.vencido = Token.objects.create(user=self.usuario)
+        Token.objects.filter(pk=self.vencido.pk).update(created=timezone.now() - timedelta(hours=2))
+
+    def login(self):
+        serializer = LoginSerializer(data={'email': 'ana@test.com', 'password': 'clave123456'})
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        return serializer
+
+    def test_rota_el_token_vencido(self):
+        resultado = self.login().save()
+        self.assertNotEqual(resultado['token'], self.vencido.key)
+        self.assertEqual(Token.objects.get(user=self.usuario).key, resultado['token'])
+
+    def test_rotacion_concurrente_reutiliza_el_token_nuevo(self):
+        # Ambos logins leyeron el token vencido; el otro ya lo rotó antes de este create()
+        serializer = self.login()
+        otro = self.login().save()
+
+        resultado = serializer.save()
+        self.assertEqual(resultado['token'], otro['token'])
+        self.assertEqual(Token.objects.filter(user=self.usuario).count(), 1)
+
+
+class LoginValidacionTests(TestCase):
+
+    def setUp(self):
+        self.usuario = User.objects.create_user('ana', 'Ana@Test.com', 'clave123456')
+
+    def test_email_sin_distinguir_mayusculas(self):
+        serializer = LoginSerializer(data={'email': 'ana@test.com', 'password': 'clave123456'})
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+
+    def test_usuario_inactivo_recibe_el_error_generico(self):
+        User.objects.filter(pk=self.usuario.pk).update(is_active=False)
+        serializer = LoginSerializer(data={'email': 'ana@test.com', 'password': 'clave123456'})
+        self.assertFalse(serializer.is_valid())
+        self.assertEqual(serializer.errors['non_field_errors'], ['Credenciales inválidas'])
+
+    def test_registro_rechaza_email_que_difiere_en_mayusculas(self):
+        serializer = RegisterEmpresaUserSerializer()
+        with self.assertRaisesMessage(ValidationError, 'El email ya está registrado'):
+            serializer.validate_email('ANA@test.com')
+
+
+@mock.patch.object(AuthRateThrottle, 'THROTTLE_RATES', {'login_ip': '3/min', 'login_email': '2/min'})
+class LoginThrottleTests(TestCase):
+    url = '/api/auth/login/'
+
+    def setUp(self):
+        get_throttle_cache().clear()
+        self.addCleanup(get_throttle_cache().clear)
+        self.cliente = APIClient()
+
+    def login(self, email, ip='10.0.0.1'):
+        return self.cliente.post(self.url, {'email': email, 'password': 'incorrecta'}, format='json', REMOTE_ADDR=ip)
+
+    def test_limite_por_email_entre_ips(self):
+        codigos = [self.login('Ana@Test.com', ip=f'10.0.0.{i}').status_code for i in range(1, 4)]
+        self.assertEqual(codigos, [400, 400, 429])
+        self.assertEqual(self.login('otro@test.com', ip='10.0.0.9').status_code, 400)
+        self.assertEqual(obtener_metricas()['login_email'], 1)
+
+    def test_limite_por_ip_entre_emails(self):
+        codigos = [self.login(f'usuario{i}@test.com').status_code for i in range(4)]
+        self.assertEqual(codigos, [400, 400, 400, 429])
+        self.assertEqual(self.login('usuario9@test.com', ip='10.0.0.2').status_code, 400)
+        self.assertEqual(obtener_metricas()['login_ip'], 1)
+
+    def test_x_forwarded_for_falso_no_evade_el_limite_por_ip(self):
+        codigos = [
+            self.cliente.post(
+                self.url, {'email': f'usuario{i}@test.com', 'password': 'incorrecta'}, format='json',
+                REMOTE_ADDR='10.0.0.1', HTTP_X_FORWARDED_FOR=f'192.168.0.{i}',
+            ).status_code
+            for i in range(4)
+        ]
+        self.assertEqual(codigos, [400, 400, 400, 429])
+
+    def test_rechazo_no_llega_al_serializer(self):
+        for _ in range(2):
+            self.login('ana@test.com')
+        # El serializer es el que hashea la contraseña
+        with mock.patch('app_Empresa.api_E.LoginSerializer') as serializer:
+            self.assertEqual(self.login('ana@test.com').status_code, 429)
+        serializer.assert_not_called()
+
+
+@override_settings(SIGNED_ACCESS_TOKENS={'ENABLED': True, 'LIFETIME': 900})
+class RefreshThrottleTests(TestCase):
+
+    def setUp(self):
+        get_throttle_cache().clear()
+        self.addCleanup(get_throttle_cache().clear)
+
+    @mock.patch.object(LoginIPThrottle, 'THROTTLE_RATES', {'login_ip': '2/min'})
+    def test_refresh_comparte_el_limite_por_ip_del_login(self):
+        cliente = APIClient()
+        codigos = [
+            cliente.post('/api/auth/refresh/', {'token': f'token{i}'}, format='json').status_code for i in range(3)
+        ]
+        self.assertEqual(codigos, [400, 400, 429])
+        respuesta = cliente.post('/api/auth/login/', {'email': 'a@test.com', 'password': 'x'}, format='json')
+        self.assertEqual(respuesta.status_code, 429)
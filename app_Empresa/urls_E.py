@@ -6,6 +6,7 @@ from app_Empresa.api_E import (
     RegisterView, 
     LoginView, 
     LogoutView, 
+    RefreshAccessView,
     OnPremiseViewSet, 
     ConfiguracionViewSet,
     RegisterEmpresaUserAPIView
@@ -29,5 +30,7 @@ urlpatterns = [
 
     path('auth/login/', LoginView.as_view(), name='login'),
  
+    path('auth/refresh/', RefreshAccessView.as_view(), name='refresh-access'),
+
     path('auth/logout/', LogoutView.as_view(), name='logout'),
 ]
\ No newline at end of file
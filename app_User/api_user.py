@@ -3,15 +3,28 @@ from django.contrib.contenttypes.models import ContentType
 from django.contrib.admin.models import LogEntry
 from .serializers import (
     UserSerializers , GroupSerializers , PermissionSerializers , ContentTypeSerializers,
-    AdminLogSerializer, PerfilUserSerializer, UserGroupSerializer
+    AdminLogSerializer, PerfilUserSerializer, UserGroupSerializer, UserGroupBulkSerializer,
+    BulkCreateUserSerializer
 )
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import F, Q, Value, CharField
+from django.utils.http import parse_etags
 from rest_framework import viewsets , permissions, status
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from rest_framework.pagination import CursorPagination
 from rest_framework.parsers import JSONParser, FormParser, MultiPartParser
 from rest_framework.authtoken.models import Token
 from rest_framework.exceptions import ValidationError
-from app_User.models import Perfiluser
+from app_User.models import Perfiluser, GroupDescripcion
+from app_User.tenant import get_tenant_perfil
+from app_User.throttling import obtener_metricas
+from app_User.permisos import get_permisos_snapshot, invalidar_usuarios
+from app_User.pagination import KeysetPagination
 from app_Empresa.models import Empresa
 from .models import Perfiluser
 
@@ -33,7 +46,7 @@ class UserViewSer(viewsets.ModelViewSet):
     def get_queryset(self):
         """Filtrar usuarios por empresa del usuario autenticado (multitenancy)"""
         try:
-            perfil = Perfiluser.objects.get(usuario=self.request.user)
+            perfil = get_tenant_perfil(self.request)
             # Retornar solo los usuarios de la empresa del usuario
             return User.objects.filter(
                 perfiluser__empresa=perfil.empresa
@@ -45,7 +58,7 @@ class UserViewSer(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         """Auto-asignar la empresa al crear usuario"""
         try:
-            perfil = Perfiluser.objects.get(usuario=self.request.user)
+            perfil = get_tenant_perfil(self.request)
             serializer.save(empresa=perfil.empresa)
         except Perfiluser.DoesNotExist:
             raise ValidationError("Usuario no tiene perfil asociado")
@@ -58,11 +71,11 @@ class GroupViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         """Filtrar grupos por empresa del usuario autenticado (multitenancy)"""
         try:
-            perfil = Perfiluser.objects.get(usuario=self.request.user)
+            perfil = get_tenant_perfil(self.request)
             # Retornar solo los grupos de la empresa del usuario
             return Group.objects.filter(
                 descripcion_obj__empresa=perfil.empresa
-            ).order_by("id")
+            ).select_related('descripcion_obj').prefetch_related('permissions').order_by("id")
         except Perfiluser.DoesNotExist:
             # Si no tiene perfil, retornar vacío
             return Group.objects.none()
@@ -71,7 +84,7 @@ class GroupViewSet(viewsets.ModelViewSet):
         """Crear grupo asociado a la empresa del usuario autenticado"""
         try:
             # Verificar que el usuario tiene perfil
-            perfil = Perfiluser.objects.get(usuario=request.user)
+            perfil = get_tenant_perfil(request)
             
             # Hacer una copia mutable del request.data si es necesario
             if hasattr(request.data, '_mutable'):
@@ -106,11 +119,35 @@ class ContentTypeViewSer(viewsets.ModelViewSet):
 class AdminLogViewSet(viewsets.ReadOnlyModelViewSet):
     """API read-only que expone las entradas del log de administrador en el formato solicitado.
 
-    GET /api/User/admin-log/  -> lista paginada por defecto (si DRF lo aplica)
+    GET /api/User/admin-log/  -> solo entradas de usuarios de la empresa, paginadas por
+    keyset sobre (action_time, id). Filtros opcionales: ?user=<id>&content_type=<id>
     """
-    queryset = LogEntry.objects.select_related('user', 'content_type').order_by('-action_time')
     serializer_class = AdminLogSerializer
-    permission_classes = [permissions.AllowAny]
+    permission_classes = [permissions.IsAdminUser]
+    pagination_class = KeysetPagination
+
+    def get_queryset(self):
+        """Filtrar el log por los usuarios de la empresa del usuario autenticado (multitenancy)"""
+        try:
+            perfil = get_tenant_perfil(self.request)
+        except Perfiluser.DoesNotExist:
+            return LogEntry.objects.none()
+
+        queryset = LogEntry.objects.select_related('user', 'content_type').filter(
+            user_id__in=Perfiluser.objects.filter(empresa_id=perfil.empresa_id).values('usuario_id')
+        )
+
+        try:
+            user_id = self.request.query_params.get('user')
+            if user_id:
+                queryset = queryset.filter(user_id=int(user_id))
+            content_type_id = self.request.query_params.get('content_type')
+            if content_type_id:
+                queryset = queryset.filter(content_type_id=int(content_type_id))
+        except ValueError:
+            raise ValidationError('user y content_type deben ser numéricos')
+
+        return queryset.order_by('-action_time', '-id')
 
 
 class CreateUserView(APIView):
@@ -128,7 +165,7 @@ class CreateUserView(APIView):
 
         # Obtener empresa del admin (perfil)
         try:
-            admin_perfil = Perfiluser.objects.get(usuario=request.user)
+            admin_perfil = get_tenant_perfil(request)
         except Perfiluser.DoesNotExist:
             return Response({'error': 'Administrador no tiene perfil asociado'}, status=status.HTTP_403_FORBIDDEN)
 
@@ -157,7 +194,7 @@ class CreateUserView(APIView):
         if User.objects.filter(username=username).exists():
             return Response({'error': 'El username ya existe'}, status=status.HTTP_400_BAD_REQUEST)
 
-        if User.objects.filter(email=email).exists():
+        if User.objects.filter(email__iexact=email).exists():
             return Response({'error': 'El email ya está registrado'}, status=status.HTTP_400_BAD_REQUEST)
 
         try:
@@ -209,6 +246,106 @@ class CreateUserView(APIView):
         except Exception as e:
             return Response({'error': f'Error al crear usuario: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+class BulkCreateUserView(APIView):
+    """
+    API para dar de alta muchos usuarios de la empresa del administrador en una sola petición.
+    
+    POST /api/User/create-user/bulk/
+    JSON: {"usuarios": [{"username", "password", "email", "first_name", "last_name", "imagen_url"}, ...]}
+    multipart: campo 'usuarios' con el mismo JSON y archivos opcionales 'imagen_perfil_<indice>'
+    
+    - username/email se normalizan como en create_user y se validan contra la base de datos
+      en una sola consulta (el email sin distinguir mayúsculas)
+    - las contraseñas se hashean en paralelo (PBKDF2 libera el GIL)
+    - usuarios, perfiles y tokens se insertan con bulk_create en una transacción
+    - los avatares se suben a S3 de forma concurrente; si el alta falla, se eliminan
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    parser_classes = [JSONParser, FormParser, MultiPartParser]
+    
+    def post(self, request):
+        # Solo administradores pueden crear usuarios normales
+        if not request.user.is_staff:
+            return Response({'error': 'No autorizado'}, status=status.HTTP_403_FORBIDDEN)
+        
+        try:
+            admin_perfil = get_tenant_perfil(request)
+        except Perfiluser.DoesNotExist:
+            return Response({'error': 'Administrador no tiene perfil asociado'}, status=status.HTTP_403_FORBIDDEN)
+        
+        usuarios = request.data.get('usuarios')
+        if isinstance(usuarios, str):
+            try:
+                usuarios = json.loads(usuarios)
+            except ValueError:
+                return Response({'error': "El campo 'usuarios' no es un JSON válido"}, status=status.HTTP_400_BAD_REQUEST)
+        
+        serializer = BulkCreateUserSerializer(data={'usuarios': usuarios})
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        datos = serializer.validated_data['usuarios']
+        
+        from app_Empresa.s3_utils import upload_user_avatars, delete_file_from_s3
+        avatares = []
+        try:
+            # Subir avatares en paralelo (antes de la transacción, como en CreateUserView)
+            archivos = [request.FILES.get(f'imagen_perfil_{i}') for i in range(len(datos))]
+            avatares = upload_user_avatars(archivos)
+            
+            # Hashear contraseñas en un pool de hilos
+            workers = min(len(datos), os.cpu_count() or 1)
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                hashes = list(executor.map(make_password, [d['password'] for d in datos]))
+            
+            with transaction.atomic():
+                users = User.objects.bulk_create([
+                    User(
+                        username=d['username'],
+                        password=password_hash,
+                        email=d['email'],
+                        first_name=d['first_name'],
+                        last_name=d['last_name'],
+                    )
+                    for d, password_hash in zip(datos, hashes)
+                ])
+                Perfiluser.objects.bulk_create([
+                    Perfiluser(empresa_id=admin_perfil.empresa_id, usuario=user, imagen_url=avatar or d['imagen_url'])
+                    for user, d, avatar in zip(users, datos, avatares)
+                ])
+                tokens = Token.objects.bulk_create([
+                    Token(key=Token.generate_key(), user=user) for user in users
+                ])
+            
+            creados = [
+                {
+                    'id': user.id,
+                    'username': user.username,
+                    'email': user.email,
+                    'first_name': user.first_name,
+                    'last_name': user.last_name,
+                    'is_staff': user.is_staff,
+                    'is_superuser': user.is_superuser,
+                    'empresa_id': admin_perfil.empresa_id,
+                    'empresa_nombre': admin_perfil.empresa.razon_social,
+                    'imagen_url': avatar or d['imagen_url'],
+                    'token': token.key,
+                }
+                for user, d, avatar, token in zip(users, datos, avatares, tokens)
+            ]
+            
+            return Response({
+                'message': f'{len(creados)} usuarios creados exitosamente',
+                'usuarios': creados,
+            }, status=status.HTTP_201_CREATED)
+        
+        except Exception as e:
+            # Las filas no se confirmaron: los avatares ya subidos quedarían huérfanos en S3
+            for avatar in avatares:
+                if avatar:
+                    delete_file_from_s3(avatar)
+            return Response({'error': f'Error al crear usuarios: {str(e)}'}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
 class PerfilUserViewSet(viewsets.ModelViewSet):
     queryset = Perfiluser.objects.all()
     serializer_class = PerfilUserSerializer
@@ -236,6 +373,13 @@ class PerfilUserViewSet(viewsets.ModelViewSet):
         return super().update(request, *args, **kwargs)
 
 
+def etag_coincide(request, etag):
+    """Comparación débil de If-None-Match contra el ETag actual"""
+    valores = parse_etags(request.headers.get('If-None-Match', ''))
+    actual = etag.removeprefix('W/')
+    return any(valor == '*' or valor.removeprefix('W/') == actual for valor in valores)
+
+
 class MeView(APIView):
     """
     API para obtener información completa del usuario autenticado:
@@ -246,15 +390,27 @@ class MeView(APIView):
     - Perfil del usuario
     
     GET /api/User/me/
+    
+    Responde con un ETag débil derivado de la versión del usuario guardada en la base
+    de datos (VersionPermisos: cambia al modificar usuario, perfil, empresa o grupos,
+    y es la misma en todos los workers); si el cliente envía
+    If-None-Match con ese valor se devuelve 304 sin construir la respuesta.
     """
     permission_classes = [permissions.IsAuthenticated]
     
     def get(self, request):
         user = request.user
+        snapshot = get_permisos_snapshot(user)
+        etag = f'W/"me-{user.pk}-{snapshot["version"]}"'
+        
+        if etag_coincide(request, etag):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+            response['ETag'] = etag
+            return response
         
         # Obtener perfil y empresa
         try:
-            perfil = Perfiluser.objects.get(usuario=user)
+            perfil = get_tenant_perfil(request)
             empresa_data = {
                 'id': perfil.empresa.id,
                 'razon_social': perfil.empresa.razon_social,
@@ -269,21 +425,8 @@ class MeView(APIView):
             empresa_data = None
             perfil_data = None
         
-        # Obtener grupos del usuario
-        grupos = []
-        for group in user.groups.all():
-            grupo_info = {
-                'id': group.id,
-                'nombre': group.name,
-            }
-            
-            # Intentar obtener la descripción del grupo
-            try:
-                grupo_info['descripcion'] = group.descripcion_obj.descripcion
-            except:
-                grupo_info['descripcion'] = None
-            
-            grupos.append(grupo_info)
+        # Grupos del usuario (snapshot precalculado, se invalida al cambiar grupos/permisos)
+        grupos = [dict(grupo) for grupo in snapshot['grupos']]
         
         # Construir respuesta completa
         response_data = {
@@ -303,45 +446,85 @@ class MeView(APIView):
             'perfil': perfil_data,
         }
         
-        return Response(response_data, status=status.HTTP_200_OK)
+        response = Response(response_data, status=status.HTTP_200_OK)
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+
+class UserGroupCursorPagination(CursorPagination):
+    """Paginación por cursor sobre el id de auth_user_groups"""
+    ordering = 'id'
+    page_size = 100
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
 
 
 class UserGroupView(APIView):
     """
     API CRUD para gestionar la relación entre usuarios y grupos (auth_user_groups)
     
-    GET /api/User/user-groups/ - Lista todas las relaciones usuario-grupo
+    GET /api/User/user-groups/ - Lista las relaciones usuario-grupo (filtrable, paginable por cursor)
     POST /api/User/user-groups/ - Asignar un usuario a un grupo
     DELETE /api/User/user-groups/ - Quitar un usuario de un grupo
     """
     permission_classes = [permissions.IsAuthenticated]
     
     def get(self, request):
-        """Listar todas las relaciones usuario-grupo (filtradas por empresa en multitenancy)"""
+        """
+        Listar las relaciones usuario-grupo de la empresa (multitenancy) con una sola consulta
+        sobre auth_user_groups.
+        
+        Filtros opcionales: ?user_id=<id>&group_id=<id>
+        Paginación por cursor si se envía ?page_size=<n> (máximo 1000; luego ?cursor=...):
+        {"next", "previous", "results"}. Sin esos parámetros se devuelve la lista completa como antes.
+        """
         try:
             # Filtrar por empresa del usuario autenticado
-            perfil = Perfiluser.objects.get(usuario=request.user)
-            
-            # Obtener todos los usuarios de la misma empresa
-            usuarios_empresa = User.objects.filter(perfiluser__empresa=perfil.empresa)
-            
-            # Construir lista de relaciones
-            relaciones = []
-            for user in usuarios_empresa:
-                for group in user.groups.all():
-                    relaciones.append({
-                        'id': f"{user.id}_{group.id}",
-                        'user_id': user.id,
-                        'group_id': group.id,
-                        'username': user.username,
-                        'user_email': user.email,
-                        'group_name': group.name,
-                    })
-            
-            return Response(relaciones, status=status.HTTP_200_OK)
-            
+            perfil = get_tenant_perfil(request)
         except Perfiluser.DoesNotExist:
             return Response({'error': 'Usuario no tiene perfil asociado'}, status=status.HTTP_403_FORBIDDEN)
+        
+        relaciones = (
+            User.groups.through.objects
+            .filter(user_id__in=Perfiluser.objects.filter(empresa_id=perfil.empresa_id).values('usuario_id'))
+            .values(
+                'id', 'user_id', 'group_id',
+                username=F('user__username'),
+                user_email=F('user__email'),
+                group_name=F('group__name'),
+            )
+            .order_by('id')
+        )
+        
+        user_id = request.query_params.get('user_id')
+        group_id = request.query_params.get('group_id')
+        try:
+            if user_id:
+                relaciones = relaciones.filter(user_id=int(user_id))
+            if group_id:
+                relaciones = relaciones.filter(group_id=int(group_id))
+        except ValueError:
+            return Response({'error': 'user_id y group_id deben ser numéricos'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if 'cursor' not in request.query_params and 'page_size' not in request.query_params:
+            return Response([self.formatear_relacion(r) for r in relaciones], status=status.HTTP_200_OK)
+        
+        paginator = UserGroupCursorPagination()
+        pagina = paginator.paginate_queryset(relaciones, request, view=self)
+        return paginator.get_paginated_response([self.formatear_relacion(r) for r in pagina])
+    
+    @staticmethod
+    def formatear_relacion(relacion):
+        """Mantener el formato histórico: id compuesto '<user_id>_<group_id>'"""
+        return {
+            'id': f"{relacion['user_id']}_{relacion['group_id']}",
+            'user_id': relacion['user_id'],
+            'group_id': relacion['group_id'],
+            'username': relacion['username'],
+            'user_email': relacion['user_email'],
+            'group_name': relacion['group_name'],
+        }
     
     def post(self, request):
         """Asignar un usuario a un grupo"""
@@ -350,12 +533,12 @@ class UserGroupView(APIView):
         if serializer.is_valid():
             try:
                 # Validar que el usuario pertenece a la misma empresa (multitenancy)
-                perfil_request = Perfiluser.objects.get(usuario=request.user)
+                perfil_request = get_tenant_perfil(request)
                 user_id = serializer.validated_data['user_id']
                 
                 try:
                     perfil_target = Perfiluser.objects.get(usuario_id=user_id)
-                    if perfil_target.empresa.id != perfil_request.empresa.id:
+                    if perfil_target.empresa_id != perfil_request.empresa_id:
                         return Response(
                             {'error': 'No puedes asignar grupos a usuarios de otras empresas'}, 
                             status=status.HTTP_403_FORBIDDEN
@@ -394,11 +577,11 @@ class UserGroupView(APIView):
         
         try:
             # Validar que el usuario pertenece a la misma empresa (multitenancy)
-            perfil_request = Perfiluser.objects.get(usuario=request.user)
+            perfil_request = get_tenant_perfil(request)
             
             try:
                 perfil_target = Perfiluser.objects.get(usuario_id=user_id)
-                if perfil_target.empresa.id != perfil_request.empresa.id:
+                if perfil_target.empresa_id != perfil_request.empresa_id:
                     return Response(
                         {'error': 'No puedes modificar grupos de usuarios de otras empresas'}, 
                         status=status.HTTP_403_FORBIDDEN
@@ -439,4 +622,93 @@ class UserGroupView(APIView):
             return Response(
                 {'error': f'Error al remover usuario del grupo: {str(e)}'}, 
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
\ No newline at end of file
+            )
+
+class UserGroupBulkView(APIView):
+    """
+    Asignar o quitar muchos pares usuario-grupo en una sola operación
+    
+    POST /api/User/user-groups/bulk/
+    {"accion": "asignar" | "quitar", "relaciones": [{"user_id": 1, "group_id": 2}, ...]}
+    
+    La pertenencia a la empresa de todos los usuarios y grupos se valida en una sola
+    consulta y la escritura es un único INSERT/DELETE sobre auth_user_groups en una
+    transacción.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def post(self, request):
+        serializer = UserGroupBulkSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            perfil = get_tenant_perfil(request)
+        except Perfiluser.DoesNotExist:
+            return Response({'error': 'Usuario no tiene perfil asociado'}, status=status.HTTP_403_FORBIDDEN)
+        
+        accion = serializer.validated_data['accion']
+        pares = serializer.validated_data['relaciones']
+        user_ids = {user_id for user_id, _ in pares}
+        group_ids = {group_id for _, group_id in pares}
+        
+        # Validar multitenancy de usuarios y grupos en una sola consulta (UNION)
+        usuarios = (
+            Perfiluser.objects
+            .filter(empresa_id=perfil.empresa_id, usuario_id__in=user_ids)
+            .annotate(tipo=Value('usuario', output_field=CharField()))
+            .values_list('usuario_id', 'tipo')
+        )
+        grupos = (
+            GroupDescripcion.objects
+            .filter(empresa_id=perfil.empresa_id, group_id__in=group_ids)
+            .annotate(tipo=Value('grupo', output_field=CharField()))
+            .values_list('group_id', 'tipo')
+        )
+        validos = set(usuarios.union(grupos))
+        
+        usuarios_invalidos = sorted(u for u in user_ids if (u, 'usuario') not in validos)
+        grupos_invalidos = sorted(g for g in group_ids if (g, 'grupo') not in validos)
+        if usuarios_invalidos or grupos_invalidos:
+            return Response({
+                'error': 'Usuarios o grupos inexistentes o de otra empresa',
+                'usuarios_invalidos': usuarios_invalidos,
+                'grupos_invalidos': grupos_invalidos,
+            }, status=status.HTTP_403_FORBIDDEN)
+        
+        UserGroup = User.groups.through
+        filtro_pares = Q()
+        for user_id, group_id in pares:
+            filtro_pares |= Q(user_id=user_id, group_id=group_id)
+        
+        with transaction.atomic():
+            if accion == 'asignar':
+                existentes = set(UserGroup.objects.filter(filtro_pares).values_list('user_id', 'group_id'))
+                nuevas = [
+                    UserGroup(user_id=user_id, group_id=group_id)
+                    for user_id, group_id in pares
+                    if (user_id, group_id) not in existentes
+                ]
+                UserGroup.objects.bulk_create(nuevas, ignore_conflicts=True)
+                resultado = {'creadas': len(nuevas), 'existentes': len(existentes)}
+            else:
+                eliminadas, _ = UserGroup.objects.filter(filtro_pares).delete()
+                resultado = {'eliminadas': eliminadas}
+            
+            # bulk_create/delete sobre la tabla intermedia no emiten m2m_changed; la versión
+            # se incrementa en la misma transacción que el cambio
+            invalidar_usuarios(user_ids)
+        
+        return Response({'accion': accion, 'procesadas': len(pares), **resultado}, status=status.HTTP_200_OK)
+
+
+class ThrottleMetricsView(APIView):
+    """
+    Métricas de intentos de login/registro rechazados por throttling
+    
+    GET /api/User/throttle-metrics/
+    """
+    permission_classes = [permissions.IsAdminUser]
+    
+    def get(self, request):
+        return Response({'rechazos': obtener_metricas()}, status=status.HTTP_200_OK)
@@ -0,0 +1,150 @@
+"""
+Autenticación por token que además resuelve el tenant (Perfiluser + Empresa)
+en la misma consulta, para que las vistas no vuelvan a buscar el perfil.
+El resultado se guarda en la caché de tokens (ver token_cache.py).
+"""
+from django.contrib.auth.models import User
+from django.core import signing
+from django.db.models import F
+from rest_framework import exceptions
+from rest_framework.authentication import BaseAuthentication, TokenAuthentication, get_authorization_header
+from rest_framework.authtoken.models import Token
+from app_User.models import Perfiluser
+from app_User.signed_tokens import fingerprint, read_access_token, signed_tokens_enabled
+from app_User.tenant import set_tenant_perfil
+from app_User.token_cache import get_token_cache, signed_cache_key
+from app_User.token_expiry import token_expirado
+
+
+class TenantTokenAuthentication(TokenAuthentication):
+    """
+    Igual que TokenAuthentication (header `Authorization: Token <key>`), pero carga
+    token + usuario + perfil + empresa con un único JOIN y lo adjunta al request.
+    """
+
+    def authenticate(self, request):
+        result = super().authenticate(request)
+        if result is not None:
+            user, token = result
+            set_tenant_perfil(request, getattr(user, '_tenant_perfil', None))
+        return result
+
+    def authenticate_credentials(self, key):
+        cache = get_token_cache()
+        cached = cache.get(key)
+        if cached is not None:
+            user, created = cached
+            token = Token(key=key, user=user, created=created)
+        else:
+            user, token = self.load_credentials(key)
+            cache.set(key, (user, token.created))
+
+        # La fecha de creación ya viene en la consulta o en la caché: sin consulta extra
+        if token_expirado(token.created):
+            cache.delete(key)
+            raise exceptions.AuthenticationFailed('Token expirado.')
+        return (user, token)
+
+    def load_credentials(self, key):
+        """Consultar token + usuario + perfil + empresa en la base de datos"""
+        perfil = (
+            Perfiluser.objects
+            .select_related('usuario', 'empresa')
+            .annotate(token_created=F('usuario__auth_token__created'))
+            .filter(usuario__auth_token__key=key)
+            .first()
+        )
+
+        if perfil is None:
+            # Token inválido o usuario sin perfil (p. ej. superusuario creado por consola)
+            user, token = super().authenticate_credentials(key)
+            user._tenant_perfil = None
+            return (user, token)
+
+        user = perfil.usuario
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed('User inactive or deleted.')
+
+        user._tenant_perfil = perfil
+        token = Token(key=key, user=user, created=perfil.token_created)
+        return (user, token)
+
+
+class SignedTokenAuthentication(BaseAuthentication):
+    """
+    Autenticación con tokens de acceso firmados (`Authorization: Bearer <access_token>`).
+
+    La firma y la vigencia se verifican sin consultar la base de datos. El usuario y su
+    tenant se toman de la caché de tokens; solo si no están se cargan por clave primaria
+    (nunca se consulta authtoken_token por clave), comprobando además que el token ancla
+    siga existiendo para respetar los logouts.
+
+    Si SIGNED_ACCESS_TOKENS['ENABLED'] está desactivado no autentica (los tokens
+    emitidos mientras estuvo activo dejan de aceptarse).
+    """
+    keyword = 'Bearer'
+
+    def authenticate(self, request):
+        if not signed_tokens_enabled():
+            return None
+
+        auth = get_authorization_header(request).split()
+        if not auth or auth[0].lower() != self.keyword.lower().encode():
+            return None
+
+        if len(auth) != 2:
+            raise exceptions.AuthenticationFailed('Header de token de acceso inválido.')
+
+        try:
+            payload = read_access_token(auth[1].decode())
+        except signing.SignatureExpired:
+            raise exceptions.AuthenticationFailed('Token de acceso expirado.')
+        except (signing.BadSignature, UnicodeError):
+            raise exceptions.AuthenticationFailed('Token de acceso inválido.')
+
+        cache = get_token_cache()
+        cache_key = signed_cache_key(payload['fp'])
+        user = cache.get(cache_key)
+        if user is None:
+            user = self.load_user(payload)
+            cache.set(cache_key, user)
+
+        set_tenant_perfil(request, user._tenant_perfil)
+        return (user, payload)
+
+    def authenticate_header(self, request):
+        return self.keyword
+
+    def load_user(self, payload):
+        """Cargar usuario + perfil + empresa por id y validar el token ancla"""
+        perfil = None
+        if payload['eid'] is not None:
+            perfil = (
+                Perfiluser.objects
+                .select_related('usuario', 'empresa')
+                .annotate(token_key=F('usuario__auth_token__key'), token_created=F('usuario__auth_token__created'))
+                .filter(usuario_id=payload['uid'], empresa_id=payload['eid'])
+                .first()
+            )
+
+        if perfil is not None:
+            user = perfil.usuario
+            token_key = perfil.token_key
+        else:
+            user = (
+                User.objects
+                .annotate(token_key=F('auth_token__key'), token_created=F('auth_token__created'))
+                .filter(pk=payload['uid'])
+                .first()
+            )
+            token_key = user.token_key if user else None
+
+        if user is None or token_key is None or fingerprint(token_key) != payload['fp']:
+            raise exceptions.AuthenticationFailed('Token de acceso revocado.')
+        if token_expirado((perfil or user).token_created):
+            raise exceptions.AuthenticationFailed('Token expirado.')
+        if not user.is_active:
+            raise exceptions.AuthenticationFailed('User inactive or deleted.')
+
+        user._tenant_perfil = perfil
+        return user
@@ -0,0 +1,22 @@
+"""
+Backend de autenticación que resuelve los permisos desde el snapshot cacheado
+"""
+from django.contrib.auth.backends import ModelBackend
+from app_User.permisos import get_permisos_snapshot
+
+
+class SnapshotModelBackend(ModelBackend):
+    """
+    ModelBackend (login por username/password sin cambios) cuyos chequeos de permisos
+    leen el snapshot precalculado en lugar de recorrer grupos -> permisos en la base de datos.
+    """
+
+    def get_user_permissions(self, user_obj, obj=None):
+        if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
+            return set()
+        return set(get_permisos_snapshot(user_obj)['permisos_usuario'])
+
+    def get_group_permissions(self, user_obj, obj=None):
+        if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
+            return set()
+        return set(get_permisos_snapshot(user_obj)['permisos_grupo'])
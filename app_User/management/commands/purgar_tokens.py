@@ -0,0 +1,32 @@
+"""
+Elimina por lotes los tokens de authtoken vencidos (ver settings.AUTH_TOKEN_EXPIRY).
+
+Uso (p. ej. desde cron):
+    python manage.py purgar_tokens --batch-size 1000 --incluir-inactivos
+"""
+from django.core.management.base import BaseCommand, CommandError
+from app_User.token_expiry import fecha_corte, purgar_tokens
+
+
+class Command(BaseCommand):
+    help = 'Elimina por lotes los tokens vencidos y, opcionalmente, los de usuarios inactivos'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument('--incluir-inactivos', action='store_true')
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] is not None and options['batch_size'] <= 0:
+            raise CommandError('--batch-size debe ser mayor que 0')
+        if fecha_corte() is None and not options['incluir_inactivos']:
+            self.stdout.write("AUTH_TOKEN_EXPIRY['TTL'] es 0: no hay tokens vencidos")
+            return
+
+        total = purgar_tokens(
+            batch_size=options['batch_size'],
+            incluir_inactivos=options['incluir_inactivos'],
+            dry_run=options['dry_run'],
+        )
+        accion = 'a eliminar' if options['dry_run'] else 'eliminados'
+        self.stdout.write(self.style.SUCCESS(f"Tokens {accion}: {total}"))
@@ -0,0 +1,33 @@
+# Índice case-insensitive sobre auth_user.email para el login por email
+
+from django.db import migrations, models
+from django.db.models.functions import Upper
+
+
+INDEX_NAME = 'auth_user_email_upper_idx'
+
+
+def _index():
+    return models.Index(Upper('email'), name=INDEX_NAME)
+
+
+def crear_indice(apps, schema_editor):
+    User = apps.get_model('auth', 'User')
+    schema_editor.add_index(User, _index())
+
+
+def eliminar_indice(apps, schema_editor):
+    User = apps.get_model('auth', 'User')
+    schema_editor.remove_index(User, _index())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('app_User', '0005_groupdescripcion_empresa'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indice, eliminar_indice),
+    ]
@@ -0,0 +1,35 @@
+# Índices para paginar django_admin_log por (action_time, id) filtrando por usuario o tipo de contenido
+
+from django.db import migrations, models
+
+
+def _indices():
+    return [
+        models.Index(fields=['-action_time', '-id'], name='admin_log_time_id_idx'),
+        models.Index(fields=['user', '-action_time', '-id'], name='admin_log_user_time_idx'),
+        models.Index(fields=['content_type', '-action_time', '-id'], name='admin_log_ct_time_idx'),
+    ]
+
+
+def crear_indices(apps, schema_editor):
+    LogEntry = apps.get_model('admin', 'LogEntry')
+    for index in _indices():
+        schema_editor.add_index(LogEntry, index)
+
+
+def eliminar_indices(apps, schema_editor):
+    LogEntry = apps.get_model('admin', 'LogEntry')
+    for index in _indices():
+        schema_editor.remove_index(LogEntry, index)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('admin', '0003_logentry_add_action_flag_choices'),
+        ('app_User', '0006_auth_user_email_upper_idx'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indices, eliminar_indices),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-16 20:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_Empresa', '0002_alter_on_premise_fecha_de_compra'),
+        ('app_User', '0007_admin_logentry_keyset_idx'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SecuenciaGrupo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ultimo_valor', models.PositiveIntegerField(default=0)),
+                ('empresa', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='secuencia_grupo', to='app_Empresa.empresa')),
+            ],
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Índice sobre authtoken_token.created para la purga por lotes de tokens vencidos
+
+from django.db import migrations, models
+
+
+INDEX_NAME = 'authtoken_created_idx'
+
+
+def _index():
+    return models.Index(fields=['created'], name=INDEX_NAME)
+
+
+def crear_indice(apps, schema_editor):
+    Token = apps.get_model('authtoken', 'Token')
+    schema_editor.add_index(Token, _index())
+
+
+def eliminar_indice(apps, schema_editor):
+    Token = apps.get_model('authtoken', 'Token')
+    schema_editor.remove_index(Token, _index())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('authtoken', '0004_alter_tokenproxy_options'),
+        ('app_User', '0008_secuenciagrupo'),
+    ]
+
+    operations = [
+        migrations.RunPython(crear_indice, eliminar_indice),
+    ]
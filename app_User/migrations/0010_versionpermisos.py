@@ -0,0 +1,35 @@
+# Generated by Django 5.2.7 on 2026-10-16 21:03
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def crear_versiones(apps, schema_editor):
+    """Una fila por usuario existente (los nuevos la crean en signals.py)"""
+    User = apps.get_model('auth', 'User')
+    VersionPermisos = apps.get_model('app_User', 'VersionPermisos')
+    VersionPermisos.objects.bulk_create(
+        [VersionPermisos(usuario_id=user_id) for user_id in User.objects.values_list('id', flat=True)],
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_User', '0009_authtoken_created_idx'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VersionPermisos',
+            fields=[
+                ('usuario', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='version_permisos', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('version', models.PositiveBigIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(crear_versiones, migrations.RunPython.noop),
+    ]
@@ -1,9 +1,8 @@
 """
 Mixin para multitenancy: Filtra automáticamente todos los querysets por empresa del usuario
 """
-from rest_framework import viewsets, permissions, status
-from rest_framework.response import Response
 from app_User.models import Perfiluser
+from app_User.tenant import get_tenant_perfil, get_tenant_empresa
 
 
 class TenantFilterMixin:
@@ -21,7 +20,8 @@ class TenantFilterMixin:
             return queryset.none()
         
         try:
-            perfil = Perfiluser.objects.get(usuario=self.request.user)
+            # Perfil y empresa ya resueltos por la autenticación (una sola consulta por request)
+            perfil = get_tenant_perfil(self.request)
             # Filtrar por empresa del usuario
             return queryset.filter(empresa=perfil.empresa)
         except Perfiluser.DoesNotExist:
@@ -30,11 +30,7 @@ class TenantFilterMixin:
     
     def get_tenant_empresa(self):
         """Obtener la empresa del usuario actual"""
-        try:
-            perfil = Perfiluser.objects.get(usuario=self.request.user)
-            return perfil.empresa
-        except Perfiluser.DoesNotExist:
-            return None
+        return get_tenant_empresa(self.request)
     
     def perform_create(self, serializer):
         """Auto-asignar empresa al crear objetos"""
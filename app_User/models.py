@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from app_Empresa.models import Empresa
 from django.contrib.auth.models import User, Group
 
@@ -23,3 +23,38 @@ class GroupDescripcion(models.Model):
     def __str__(self):
         empresa_name = self.empresa.razon_social if self.empresa else "Sin empresa"
         return f"{self.group.name} - {empresa_name}"
+
+
+
+class SecuenciaGrupo(models.Model):
+    """Secuencia por empresa para numerar los grupos creados sin nombre"""
+    empresa = models.OneToOneField(Empresa, on_delete=models.CASCADE, related_name='secuencia_grupo')
+    ultimo_valor = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.empresa_id} - {self.ultimo_valor}"
+
+    @classmethod
+    def siguiente(cls, empresa_id):
+        """Reservar el siguiente número de la empresa (bloquea solo la fila del tenant)"""
+        with transaction.atomic():
+            secuencia, _ = cls.objects.select_for_update().get_or_create(empresa_id=empresa_id)
+            secuencia.ultimo_valor += 1
+            secuencia.save(update_fields=['ultimo_valor'])
+            return secuencia.ultimo_valor
+
+
+class VersionPermisos(models.Model):
+    """
+    Versión de los datos de acceso de un usuario (grupos, permisos, perfil, empresa).
+    Se incrementa en la base de datos desde signals.py (y UserGroupBulkView, que escribe
+    la tabla intermedia en bloque), en la misma transacción del cambio; el snapshot
+    cacheado (permisos.py) y el ETag de MeView se derivan de ella, por lo que todos los
+    workers ven el cambio aunque usen cachés locales.
+    """
+    usuario = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='version_permisos')
+    version = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.usuario_id} - v{self.version}"
+
@@ -0,0 +1,100 @@
+"""
+Paginación keyset (seek) sobre un par de columnas ordenadas en forma descendente
+"""
+import base64
+import json
+from urllib import parse
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+
+
+class KeysetPagination(BasePagination):
+    """
+    Ordena por (-campo, -id) y continúa desde la última fila vista con
+    WHERE campo < t OR (campo = t AND id < id_t), sin OFFSET ni COUNT(*).
+    """
+    campo = 'action_time'
+    page_size = 50
+    max_page_size = 500
+    page_size_query_param = 'page_size'
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Cursor inválido'
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def decode_cursor(self, request):
+        valor = request.query_params.get(self.cursor_query_param)
+        if not valor:
+            return None
+        try:
+            datos = json.loads(base64.urlsafe_b64decode(valor.encode()).decode())
+            momento = self.leer_valor(datos['t'])
+            if momento is None:
+                raise ValueError
+            return momento, int(datos['id'])
+        except (ValueError, KeyError, TypeError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def leer_valor(self, valor):
+        """Valor de `campo` guardado en el cursor (ISO 8601); None si no es válido"""
+        return parse_datetime(valor)
+
+    def encode_cursor(self, instance):
+        datos = {'t': getattr(instance, self.campo).isoformat(), 'id': instance.pk}
+        valor = base64.urlsafe_b64encode(json.dumps(datos).encode()).decode()
+        url = self.request.build_absolute_uri()
+        partes = parse.urlsplit(url)
+        query = dict(parse.parse_qsl(partes.query, keep_blank_values=True))
+        query[self.cursor_query_param] = valor
+        return parse.urlunsplit(partes._replace(query=parse.urlencode(query)))
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        page_size = self.get_page_size(request)
+        queryset = queryset.order_by(f'-{self.campo}', '-pk')
+
+        queryset = self.aplicar_cursor(queryset, self.decode_cursor(request))
+
+        # Se pide una fila extra para saber si hay página siguiente
+        filas = list(queryset[:page_size + 1])
+        self.has_next = len(filas) > page_size
+        self.page = filas[:page_size]
+        return self.page
+
+    def aplicar_cursor(self, queryset, cursor):
+        """Filtrar las filas posteriores (en el orden descendente) a la posición del cursor"""
+        if cursor is None:
+            return queryset
+        momento, pk = cursor
+        return queryset.filter(
+            Q(**{f'{self.campo}__lt': momento}) | Q(**{self.campo: momento, 'pk__lt': pk})
+        )
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1])
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
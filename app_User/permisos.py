@@ -0,0 +1,112 @@
+"""
+Snapshot precalculado de grupos y permisos por usuario.
+
+Se construye una vez (grupos con su descripción + permisos de usuario y de grupo),
+se guarda en la caché de Django y se reutiliza en MeView y en los chequeos de
+permisos (ver backends.SnapshotModelBackend).
+
+La clave de caché incluye la versión del usuario guardada en la base de datos
+(VersionPermisos). signals.py la incrementa cuando cambian los grupos de un usuario,
+los permisos de un grupo o el propio grupo, y también al modificar el usuario, su
+perfil o su empresa. Así un cambio hecho en un worker deja obsoleto el snapshot en
+todos los demás aunque la caché sea local (LocMem): cada request lee la versión
+(una consulta por clave primaria) y, si cambió, reconstruye el snapshot. MeView usa
+esa misma versión como ETag.
+"""
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db.models import F
+from app_User.models import VersionPermisos
+
+
+DEFAULTS = {
+    'ALIAS': 'default',
+    'TIMEOUT': 3600,
+}
+SNAPSHOT_ATTR = '_permisos_snapshot'
+
+
+def _config():
+    return {**DEFAULTS, **getattr(settings, 'PERMISOS_CACHE', {})}
+
+
+def _cache():
+    return caches[_config()['ALIAS']]
+
+
+def _key(user_id, version):
+    return f"permisos_usuario:{user_id}:{version}"
+
+
+def version_permisos(user_id):
+    """Versión actual del usuario en la base de datos (crea la fila si falta)"""
+    version = VersionPermisos.objects.filter(usuario_id=user_id).values_list('version', flat=True).first()
+    if version is None:
+        VersionPermisos.objects.bulk_create([VersionPermisos(usuario_id=user_id)], ignore_conflicts=True)
+        version = 0
+    return version
+
+
+def construir_snapshot(user, version):
+    """Consultar grupos (con descripción) y permisos del usuario"""
+    grupos = [
+        {
+            'id': grupo['id'],
+            'nombre': grupo['name'],
+            'descripcion': grupo['descripcion_obj__descripcion'],
+        }
+        for grupo in user.groups.order_by('id').values('id', 'name', 'descripcion_obj__descripcion')
+    ]
+    backend = ModelBackend()
+    # Instancia nueva para no reutilizar cachés de permisos ya adjuntas al usuario
+    usuario = User(pk=user.pk, is_active=True, is_superuser=user.is_superuser)
+    return {
+        'version': version,
+        'grupos': grupos,
+        'permisos_usuario': frozenset(backend.get_user_permissions(usuario)),
+        'permisos_grupo': frozenset(backend.get_group_permissions(usuario)),
+    }
+
+
+def get_permisos_snapshot(user):
+    """
+    Obtener el snapshot del usuario (caché del request -> caché de Django para la
+    versión vigente -> base de datos)
+    """
+    snapshot = getattr(user, SNAPSHOT_ATTR, None)
+    if snapshot is not None:
+        return snapshot
+
+    version = version_permisos(user.pk)
+    cache = _cache()
+    snapshot = cache.get(_key(user.pk, version))
+    if snapshot is None:
+        snapshot = construir_snapshot(user, version)
+        cache.set(_key(user.pk, version), snapshot, _config()['TIMEOUT'])
+
+    setattr(user, SNAPSHOT_ATTR, snapshot)
+    return snapshot
+
+
+def invalidar_usuarios(user_ids):
+    """
+    Incrementar la versión de los usuarios indicados: el snapshot anterior deja de
+    usarse en todos los workers (la entrada vieja expira sola por TIMEOUT)
+    """
+    user_ids = list(user_ids)
+    if user_ids:
+        VersionPermisos.objects.filter(usuario_id__in=user_ids).update(version=F('version') + 1)
+
+
+def invalidar_empresa(empresa_id):
+    """Descartar el snapshot de todos los usuarios de una empresa (un único UPDATE)"""
+    VersionPermisos.objects.filter(usuario__perfiluser__empresa_id=empresa_id).update(version=F('version') + 1)
+
+
+def invalidar_grupo(group_id):
+    """Descartar el snapshot de todos los miembros de un grupo"""
+    user_ids = list(User.groups.through.objects.filter(group_id=group_id).values_list('user_id', flat=True))
+    if user_ids:
+        invalidar_usuarios(user_ids)
@@ -1,8 +1,12 @@
+import uuid
+
 from rest_framework.serializers import ModelSerializer
 from rest_framework import serializers
+from django.db.models import Q
+from django.db.models.functions import Upper
 from django.contrib.auth.models import User  , Group , Permission 
 from django.contrib.contenttypes.models import ContentType
-from .models import Perfiluser
+from .models import Perfiluser, GroupDescripcion, SecuenciaGrupo
 
 class UserSerializers(ModelSerializer): 
     password = serializers.CharField(write_only=True, required=False)
@@ -57,19 +61,14 @@ class GroupSerializers(ModelSerializer):
         # Asegurar que el nombre del grupo se devuelve en 'nombre'
         if 'nombre' not in data or not data['nombre']:
             data['nombre'] = instance.name
-        # Obtener descripción del modelo relacionado
-        try:
-            desc = instance.descripcion_obj.descripcion
-            data['descripcion'] = desc
-        except:
-            data['descripcion'] = None
+        # 'descripcion' ya viene de get_descripcion (una sola lectura de descripcion_obj)
         return data
     
     def get_descripcion(self, obj):
-        """Obtener descripción del grupo"""
+        """Obtener descripción del grupo (descripcion_obj viene con select_related en el listado)"""
         try:
             return obj.descripcion_obj.descripcion
-        except:
+        except GroupDescripcion.DoesNotExist:
             return None
         
     def create(self, validated_data):
@@ -81,9 +80,15 @@ class GroupSerializers(ModelSerializer):
         name = self.initial_data.get('nombre', '') or self.initial_data.get('name', '')
         name = name.strip() if name else ''
         
-        # Si name viene vacío o no viene, generar uno de la descripción
+        # Si name viene vacío o no viene, generar uno de la descripción o de la secuencia de la empresa
         if not name:
-            name = descripcion[:150].strip() if descripcion else f'Grupo {Group.objects.count() + 1}'
+            if descripcion:
+                name = descripcion[:150].strip()
+            elif empresa_id:
+                # auth_group.name es único entre empresas: el número es de la empresa y el sufijo evita choques
+                name = f'Grupo {SecuenciaGrupo.siguiente(empresa_id)} (empresa {empresa_id})'
+            else:
+                name = f'Grupo {uuid.uuid4().hex[:8]}'
         
         print(f"📝 Creando grupo con nombre: '{name}', descripcion: '{descripcion}', empresa_id: {empresa_id}")
         
@@ -273,3 +278,94 @@ class UserGroupSerializer(serializers.Serializer):
         else:
             # Cuando viene de una query normal
             return super().to_representation(instance)
+
+
+
+class UserGroupPairSerializer(serializers.Serializer):
+    """Par usuario-grupo para operaciones masivas"""
+    user_id = serializers.IntegerField(min_value=1)
+    group_id = serializers.IntegerField(min_value=1)
+
+
+class UserGroupBulkSerializer(serializers.Serializer):
+    """
+    Asignación o remoción masiva de usuarios a grupos
+    {"accion": "asignar" | "quitar", "relaciones": [{"user_id": 1, "group_id": 2}, ...]}
+    """
+    accion = serializers.ChoiceField(choices=['asignar', 'quitar'])
+    relaciones = serializers.ListField(
+        child=UserGroupPairSerializer(),
+        allow_empty=False,
+        max_length=1000
+    )
+    
+    def validate_relaciones(self, value):
+        """Eliminar pares duplicados conservando el orden"""
+        pares = []
+        vistos = set()
+        for relacion in value:
+            par = (relacion['user_id'], relacion['group_id'])
+            if par not in vistos:
+                vistos.add(par)
+                pares.append(par)
+        return pares
+
+
+
+class BulkUserItemSerializer(serializers.Serializer):
+    """Datos de un usuario dentro del alta masiva"""
+    username = serializers.CharField(max_length=150)
+    password = serializers.CharField(write_only=True)
+    email = serializers.EmailField()
+    first_name = serializers.CharField(max_length=150, required=False, allow_blank=True, default='')
+    last_name = serializers.CharField(max_length=150, required=False, allow_blank=True, default='')
+    imagen_url = serializers.URLField(required=False, allow_blank=True, default='')
+    
+    # Misma normalización que User.objects.create_user (se insertan con bulk_create)
+    def validate_username(self, value):
+        return User.normalize_username(value)
+    
+    def validate_email(self, value):
+        return User.objects.normalize_email(value)
+
+
+class BulkCreateUserSerializer(serializers.Serializer):
+    """
+    Alta masiva de usuarios: {"usuarios": [{username, password, email, ...}, ...]}
+    Los duplicados dentro del lote y contra la base de datos se validan en una sola consulta;
+    los emails se comparan sin distinguir mayúsculas, igual que en el login.
+    """
+    usuarios = BulkUserItemSerializer(many=True, allow_empty=False, max_length=200)
+    
+    def validate_usuarios(self, value):
+        usernames = [u['username'] for u in value]
+        emails = [u['email'].upper() for u in value]
+        
+        errores = {}
+        vistos_username, vistos_email = set(), set()
+        for i, (u, email) in enumerate(zip(value, emails)):
+            if u['username'] in vistos_username:
+                errores.setdefault(i, []).append(f"username '{u['username']}' repetido en el lote")
+            if email in vistos_email:
+                errores.setdefault(i, []).append(f"email '{u['email']}' repetido en el lote")
+            vistos_username.add(u['username'])
+            vistos_email.add(email)
+        
+        # UPPER(email) usa el índice auth_user_email_upper_idx
+        existentes = User.objects.annotate(email_upper=Upper('email')).filter(
+            Q(username__in=usernames) | Q(email_upper__in=emails)
+        ).values_list('username', 'email_upper')
+        usernames_existentes, emails_existentes = set(), set()
+        for username, email in existentes:
+            usernames_existentes.add(username)
+            emails_existentes.add(email)
+        
+        for i, (u, email) in enumerate(zip(value, emails)):
+            if u['username'] in usernames_existentes:
+                errores.setdefault(i, []).append('El username ya existe')
+            if email in emails_existentes:
+                errores.setdefault(i, []).append('El email ya está registrado')
+        
+        if errores:
+            raise serializers.ValidationError(errores)
+        return value
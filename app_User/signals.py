@@ -0,0 +1,122 @@
+"""
+Señales para mantener coherentes la caché de autenticación por token
+y el snapshot de grupos/permisos por usuario
+"""
+from django.contrib.auth.models import User, Group
+from django.db.models.signals import pre_save, post_save, post_delete, pre_delete, m2m_changed
+from django.dispatch import receiver
+from app_Empresa.models import Empresa
+from app_User.models import Perfiluser, GroupDescripcion, VersionPermisos
+from app_User.permisos import invalidar_usuarios, invalidar_grupo, invalidar_empresa
+from app_User.token_cache import invalidate_user_tokens, invalidate_empresa_tokens
+
+
+# Campos de User que deciden si puede autenticarse o que viajan en la caché de tokens y en
+# la respuesta de MeView (last_login no: se guarda en cada login)
+CAMPOS_CACHEADOS = (
+    'is_active', 'password', 'email', 'username', 'is_staff', 'is_superuser', 'first_name', 'last_name',
+)
+
+
+@receiver(pre_save, sender=User)
+def detectar_cambios_usuario(sender, instance, update_fields=None, **kwargs):
+    """
+    Marcar si el guardado modifica alguno de esos campos. Los guardados parciales que no
+    los tocan (last_login en cada login) no invalidan nada; tampoco la actualización del
+    hash de la contraseña al cambiar de hasher (check_password la guarda sin _password).
+    """
+    if instance._state.adding:
+        instance._invalidar_caches = False
+        return
+    if update_fields is not None:
+        campos = set(update_fields) & set(CAMPOS_CACHEADOS)
+        if campos == {'password'} and instance._password is None:
+            campos = set()
+        instance._invalidar_caches = bool(campos)
+        return
+    anteriores = User.objects.filter(pk=instance.pk).values(*CAMPOS_CACHEADOS).first()
+    instance._invalidar_caches = anteriores is None or any(
+        anteriores[campo] != getattr(instance, campo) for campo in CAMPOS_CACHEADOS
+    )
+
+
+@receiver(post_save, sender=User)
+def invalidar_cache_usuario(sender, instance, created, **kwargs):
+    """Al desactivar o modificar un usuario, sus tokens cacheados dejan de ser válidos"""
+    if created:
+        VersionPermisos.objects.bulk_create([VersionPermisos(usuario=instance)], ignore_conflicts=True)
+    elif getattr(instance, '_invalidar_caches', True):
+        invalidate_user_tokens(instance.pk)
+        invalidar_usuarios([instance.pk])
+
+
+@receiver(pre_delete, sender=User)
+def invalidar_cache_usuario_eliminado(sender, instance, **kwargs):
+    """Antes de que el borrado en cascada elimine el token, se descarta de la caché"""
+    invalidate_user_tokens(instance.pk)
+
+
+@receiver(post_save, sender=Perfiluser)
+@receiver(post_delete, sender=Perfiluser)
+def invalidar_cache_perfil(sender, instance, **kwargs):
+    """El perfil (y su empresa) viaja en la caché junto al usuario"""
+    invalidate_user_tokens(instance.usuario_id)
+    invalidar_usuarios([instance.usuario_id])
+
+
+@receiver(post_save, sender=Empresa)
+def invalidar_cache_empresa(sender, instance, created, **kwargs):
+    """Los datos de la empresa viajan en la caché de tokens y en el ETag de MeView"""
+    if created:
+        return
+    invalidate_empresa_tokens(instance.pk)
+    invalidar_empresa(instance.pk)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+def invalidar_permisos_membresia(sender, instance, action, reverse, pk_set, **kwargs):
+    """Alta/baja de usuarios en grupos (user.groups.add/remove o group.user_set...)"""
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        invalidar_usuarios([instance.pk])
+    elif action == 'pre_clear':
+        invalidar_grupo(instance.pk)
+    else:
+        invalidar_usuarios(pk_set)
+
+
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def invalidar_permisos_usuario(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        invalidar_usuarios([instance.pk])
+    elif action == 'pre_clear':
+        invalidar_usuarios(instance.user_set.values_list('pk', flat=True))
+    else:
+        invalidar_usuarios(pk_set)
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def invalidar_permisos_grupo(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+    if not reverse:
+        invalidar_grupo(instance.pk)
+    else:
+        grupos = pk_set if action != 'pre_clear' else instance.group_set.values_list('pk', flat=True)
+        for group_id in grupos:
+            invalidar_grupo(group_id)
+
+
+@receiver(post_save, sender=Group)
+@receiver(pre_delete, sender=Group)
+def invalidar_grupo_modificado(sender, instance, **kwargs):
+    """Cambio de nombre (GroupSerializers.update) o eliminación del grupo"""
+    invalidar_grupo(instance.pk)
+
+
+@receiver(post_save, sender=GroupDescripcion)
+def invalidar_descripcion_grupo(sender, instance, **kwargs):
+    invalidar_grupo(instance.group_id)
@@ -0,0 +1,61 @@
+"""
+Tokens de acceso firmados (HMAC) y de vida corta, opcionales.
+
+El token de acceso lleva el id de usuario, el id de empresa y una huella del token
+de rest_framework.authtoken que lo emitió. La firma se verifica sin consultar la base
+de datos; el token de authtoken sigue siendo el ancla para renovar y revocar (logout).
+
+Header: `Authorization: Bearer <access_token>`
+"""
+import hashlib
+from django.conf import settings
+from django.core import signing
+
+
+SALT = 'app_User.signed_tokens'
+
+DEFAULTS = {
+    'ENABLED': False,
+    'LIFETIME': 900,  # segundos
+}
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'SIGNED_ACCESS_TOKENS', {})}
+
+
+def signed_tokens_enabled():
+    return get_config()['ENABLED']
+
+
+def fingerprint(token_key):
+    """Huella del token ancla: permite detectar revocación sin exponer la clave"""
+    return hashlib.sha256(token_key.encode()).hexdigest()[:16]
+
+
+def issue_access_token(token, empresa_id):
+    """
+    Emitir un token de acceso firmado a partir de un Token de authtoken
+
+    Returns:
+        Dict con access_token y expires_in (segundos)
+    """
+    payload = {
+        'uid': token.user_id,
+        'eid': empresa_id,
+        'fp': fingerprint(token.key),
+    }
+    return {
+        'access_token': signing.dumps(payload, salt=SALT, compress=True),
+        'expires_in': get_config()['LIFETIME'],
+    }
+
+
+def read_access_token(value):
+    """
+    Verificar firma y vigencia de un token de acceso
+
+    Raises:
+        signing.SignatureExpired si venció, signing.BadSignature si fue alterado
+    """
+    return signing.loads(value, salt=SALT, max_age=get_config()['LIFETIME'])
@@ -0,0 +1,58 @@
+"""
+Contexto de tenant por request: resuelve Perfiluser + Empresa una sola vez por request
+y lo deja adjunto al HttpRequest para que mixins y vistas lo reutilicen.
+"""
+from app_User.models import Perfiluser
+
+
+# Atributo donde se guarda el perfil resuelto en el HttpRequest subyacente
+TENANT_ATTR = '_tenant_perfil'
+_NO_RESUELTO = object()
+
+
+def _http_request(request):
+    """Obtener el HttpRequest de Django (DRF envuelve el original en request._request)"""
+    return getattr(request, '_request', request)
+
+
+def set_tenant_perfil(request, perfil):
+    """Adjuntar al request el perfil ya resuelto (o None si el usuario no tiene perfil)"""
+    setattr(_http_request(request), TENANT_ATTR, perfil)
+
+
+def get_tenant_perfil(request):
+    """
+    Obtener el Perfiluser (con empresa precargada) del usuario autenticado.
+
+    Si la autenticación ya lo resolvió se reutiliza; si no, se consulta una sola vez
+    con select_related y se memoriza en el request.
+
+    Raises:
+        Perfiluser.DoesNotExist si el usuario no está autenticado o no tiene perfil
+    """
+    http_request = _http_request(request)
+    perfil = getattr(http_request, TENANT_ATTR, _NO_RESUELTO)
+
+    if perfil is _NO_RESUELTO:
+        user = getattr(request, 'user', None)
+        perfil = None
+        if user is not None and user.is_authenticated:
+            perfil = (
+                Perfiluser.objects
+                .select_related('usuario', 'empresa')
+                .filter(usuario=user)
+                .first()
+            )
+        setattr(http_request, TENANT_ATTR, perfil)
+
+    if perfil is None:
+        raise Perfiluser.DoesNotExist("Usuario no tiene perfil asociado")
+    return perfil
+
+
+def get_tenant_empresa(request):
+    """Obtener la empresa del usuario autenticado, o None si no tiene perfil"""
+    try:
+        return get_tenant_perfil(request).empresa
+    except Perfiluser.DoesNotExist:
+        return None
@@ -1,3 +1,393 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+from django.contrib.admin.models import ADDITION, LogEntry
+from django.contrib.auth.models import Group, Permission, User, update_last_login
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.db import DatabaseError, connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from app_Empresa.models import Empresa
+from .models import GroupDescripcion, Perfiluser
+from .permisos import version_permisos
+from .serializers import GroupSerializers
+from .signed_tokens import issue_access_token
+from .tenant import get_tenant_perfil
+from .token_cache import get_token_cache, reset_token_cache
 
-# Create your tests here.
+
+class UsuarioTestCase(TestCase):
+    """Empresa y administrador (is_staff) con perfil y token"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.empresa = Empresa.objects.create(razon_social='Empresa', email_contacto='empresa@test.com')
+        cls.admin = User.objects.create_user('admin', 'admin@test.com', 'clave123456', is_staff=True)
+        Perfiluser.objects.create(empresa=cls.empresa, usuario=cls.admin)
+        cls.token = Token.objects.create(user=cls.admin)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + self.token.key)
+
+
+class BulkCreateUserTests(UsuarioTestCase):
+    url = '/api/User/create-user/bulk/'
+
+    def test_normaliza_como_create_user(self):
+        respuesta = self.client.post(self.url, {'usuarios': [
+            {'username': 'ｊuan', 'password': 'clave123456', 'email': 'Juan@EXAMPLE.COM'},
+        ]}, format='json')
+        self.assertEqual(respuesta.status_code, 201, respuesta.data)
+        usuario = User.objects.get(id=respuesta.data['usuarios'][0]['id'])
+        self.assertEqual(usuario.username, 'juan')
+        self.assertEqual(usuario.email, 'Juan@example.com')
+
+    def test_emails_duplicados_sin_distinguir_mayusculas(self):
+        respuesta = self.client.post(self.url, {'usuarios': [
+            {'username': 'uno', 'password': 'clave123456', 'email': 'uno@test.com'},
+            {'username': 'dos', 'password': 'clave123456', 'email': 'UNO@test.com'},
+            {'username': 'tres', 'password': 'clave123456', 'email': 'ADMIN@TEST.COM'},
+        ]}, format='json')
+        self.assertEqual(respuesta.status_code, 400)
+        errores = respuesta.data['usuarios']
+        self.assertEqual(sorted(errores), [1, 2])
+        self.assertIn('El email ya está registrado', errores[2])
+        self.assertFalse(User.objects.filter(username__in=['uno', 'dos', 'tres']).exists())
+
+    def test_alta_fallida_elimina_los_avatares_subidos(self):
+        urls = ['https://bucket/usuarios/avatars/a.png', None]
+        usuarios = [
+            {'username': f'usuario{i}', 'password': 'clave123456', 'email': f'usuario{i}@test.com'} for i in range(2)
+        ]
+        with mock.patch('app_Empresa.s3_utils.upload_user_avatars', return_value=urls), \
+                mock.patch('app_Empresa.s3_utils.delete_file_from_s3') as eliminar, \
+                mock.patch.object(Token.objects, 'bulk_create', side_effect=DatabaseError('fallo')):
+            respuesta = self.client.post(self.url, {'usuarios': usuarios}, format='json')
+
+        self.assertEqual(respuesta.status_code, 500)
+        eliminar.assert_called_once_with(urls[0])
+        self.assertFalse(User.objects.filter(username__startswith='usuario').exists())
+
+
+class UserGroupBulkTests(UsuarioTestCase):
+    url = '/api/User/user-groups/bulk/'
+
+    def test_incrementa_la_version_en_la_misma_transaccion(self):
+        grupo = Group.objects.create(name='Analistas')
+        GroupDescripcion.objects.create(group=grupo, empresa=self.empresa)
+        antes = version_permisos(self.admin.id)
+
+        # Sin esperar a on_commit: TestCase nunca confirma la transacción
+        relaciones = [{'user_id': self.admin.id, 'group_id': grupo.id}]
+        respuesta = self.client.post(self.url, {'accion': 'asignar', 'relaciones': relaciones}, format='json')
+        self.assertEqual(respuesta.status_code, 200, respuesta.data)
+        self.assertEqual(version_permisos(self.admin.id), antes + 1)
+
+        respuesta = self.client.post(self.url, {'accion': 'quitar', 'relaciones': relaciones}, format='json')
+        self.assertEqual(respuesta.status_code, 200, respuesta.data)
+        self.assertEqual(version_permisos(self.admin.id), antes + 2)
+
+
+class UserGroupListTests(UsuarioTestCase):
+    url = '/api/User/user-groups/'
+
+    def setUp(self):
+        super().setUp()
+        self.admin.groups.add(*Group.objects.bulk_create([Group(name=f'Grupo {i}') for i in range(3)]))
+
+    def test_sin_paginacion_devuelve_la_lista(self):
+        respuesta = self.client.get(self.url)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual([r['group_name'] for r in respuesta.data], ['Grupo 0', 'Grupo 1', 'Grupo 2'])
+        self.assertEqual(respuesta.data[0]['id'], f"{self.admin.id}_{respuesta.data[0]['group_id']}")
+
+    def test_paginado_por_cursor(self):
+        respuesta = self.client.get(self.url, {'page_size': 2})
+        self.assertEqual([r['group_name'] for r in respuesta.data['results']], ['Grupo 0', 'Grupo 1'])
+        self.assertIsNotNone(respuesta.data['next'])
+
+        respuesta = self.client.get(respuesta.data['next'])
+        self.assertEqual([r['group_name'] for r in respuesta.data['results']], ['Grupo 2'])
+        self.assertIsNone(respuesta.data['next'])
+
+
+class TokenCacheTests(UsuarioTestCase):
+    url = '/api/User/me/'
+
+    def setUp(self):
+        super().setUp()
+        reset_token_cache()
+        self.addCleanup(reset_token_cache)
+
+    def autenticar(self):
+        """Un request autenticado deja el token en la caché"""
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        self.assertIsNotNone(get_token_cache().get(self.token.key))
+
+    def test_logout_invalida_la_cache(self):
+        self.autenticar()
+        respuesta = self.client.post('/api/auth/logout/', {'token': self.token.key}, format='json')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertIsNone(get_token_cache().get(self.token.key))
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_desactivar_usuario_invalida_la_cache(self):
+        self.autenticar()
+        self.admin.is_active = False
+        self.admin.save()
+        self.assertIsNone(get_token_cache().get(self.token.key))
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_logout_en_un_worker_invalida_en_los_demas(self):
+        self.autenticar()
+        # Otro worker construye su propia instancia sobre la misma caché de Django
+        otro_worker = get_token_cache()
+        reset_token_cache()
+        self.client.post('/api/auth/logout/', {'token': self.token.key}, format='json')
+        self.assertIsNone(otro_worker.get(self.token.key))
+
+
+class TenantTests(UsuarioTestCase):
+
+    def test_get_tenant_perfil_consulta_una_vez_por_request(self):
+        request = RequestFactory().get('/')
+        request.user = self.admin
+        with self.assertNumQueries(1):
+            self.assertEqual(get_tenant_perfil(request).empresa, self.empresa)
+            self.assertEqual(get_tenant_perfil(request).empresa, self.empresa)
+
+    @override_settings(TOKEN_AUTH_CACHE={'BACKEND': 'none'})
+    def test_la_autenticacion_resuelve_el_perfil(self):
+        reset_token_cache()
+        self.addCleanup(reset_token_cache)
+        tabla = Perfiluser._meta.db_table
+        with CaptureQueriesContext(connection) as consultas:
+            self.assertEqual(self.client.get('/api/Creditos/creditos/').status_code, 200)
+        # Solo el JOIN de la autenticación (token + usuario + perfil + empresa) lee el perfil
+        self.assertEqual(sum(1 for consulta in consultas if tabla in consulta['sql']), 1)
+
+
+@override_settings(SIGNED_ACCESS_TOKENS={'ENABLED': True, 'LIFETIME': 900})
+class SignedTokenTests(UsuarioTestCase):
+    url = '/api/Creditos/creditos/'
+
+    def setUp(self):
+        super().setUp()
+        reset_token_cache()
+        self.addCleanup(reset_token_cache)
+        self.acceso = issue_access_token(self.token, self.empresa.id)['access_token']
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + self.acceso)
+
+    def test_acceso_firmado_valido(self):
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+
+    def test_firma_alterada(self):
+        alterado = self.acceso[:-1] + ('a' if self.acceso[-1] != 'a' else 'b')
+        self.client.credentials(HTTP_AUTHORIZATION='Bearer ' + alterado)
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_logout_del_token_ancla_revoca_el_acceso(self):
+        self.assertEqual(self.client.get(self.url).status_code, 200)
+        respuesta = APIClient().post('/api/auth/logout/', {'token': self.token.key}, format='json')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+
+    def test_deshabilitado_no_acepta_tokens_emitidos(self):
+        with override_settings(SIGNED_ACCESS_TOKENS={'ENABLED': False}):
+            self.assertEqual(self.client.get(self.url).status_code, 401)
+
+
+class InvalidacionUsuarioTests(UsuarioTestCase):
+
+    def setUp(self):
+        super().setUp()
+        reset_token_cache()
+        self.addCleanup(reset_token_cache)
+        self.assertEqual(self.client.get('/api/User/me/').status_code, 200)
+        self.version = version_permisos(self.admin.id)
+
+    def test_last_login_no_invalida(self):
+        update_last_login(None, User.objects.get(pk=self.admin.pk))
+        self.assertIsNotNone(get_token_cache().get(self.token.key))
+        self.assertEqual(version_permisos(self.admin.id), self.version)
+
+    def test_guardado_completo_sin_cambios_no_invalida(self):
+        User.objects.get(pk=self.admin.pk).save()
+        self.assertIsNotNone(get_token_cache().get(self.token.key))
+        self.assertEqual(version_permisos(self.admin.id), self.version)
+
+    def test_cambio_de_email_invalida(self):
+        usuario = User.objects.get(pk=self.admin.pk)
+        usuario.email = 'nuevo@test.com'
+        usuario.save(update_fields=['email'])
+        self.assertIsNone(get_token_cache().get(self.token.key))
+        self.assertEqual(version_permisos(self.admin.id), self.version + 1)
+
+    def test_guardar_empresa_invalida_a_todos_sus_usuarios_en_bloque(self):
+        tokens = [self.token]
+        for i in range(3):
+            usuario = User.objects.create_user(f'usuario{i}', f'usuario{i}@test.com', 'clave123456')
+            Perfiluser.objects.create(empresa=self.empresa, usuario=usuario)
+            tokens.append(Token.objects.create(user=usuario))
+            APIClient(HTTP_AUTHORIZATION='Token ' + tokens[-1].key).get('/api/User/me/')
+        versiones = [version_permisos(token.user_id) for token in tokens]
+        self.assertTrue(all(get_token_cache().get(token.key) for token in tokens))
+
+        # UPDATE de la empresa + tokens de sus usuarios + versiones en un único UPDATE
+        with self.assertNumQueries(3):
+            self.empresa.save()
+        self.assertTrue(all(get_token_cache().get(token.key) is None for token in tokens))
+        self.assertEqual([version_permisos(token.user_id) for token in tokens], [v + 1 for v in versiones])
+
+
+class MeViewETagTests(UsuarioTestCase):
+    url = '/api/User/me/'
+
+    def test_304_con_el_etag_vigente(self):
+        respuesta = self.client.get(self.url)
+        self.assertEqual(respuesta.status_code, 200)
+        etag = respuesta['ETag']
+        self.assertTrue(etag.startswith('W/'))
+
+        respuesta = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 304)
+        self.assertEqual(respuesta['ETag'], etag)
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=etag.removeprefix('W/')).status_code, 304)
+
+    def test_cambio_de_grupos_invalida_el_etag(self):
+        etag = self.client.get(self.url)['ETag']
+        self.admin.groups.add(Group.objects.create(name='Analistas'))
+
+        respuesta = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertNotEqual(respuesta['ETag'], etag)
+        self.assertEqual([grupo['nombre'] for grupo in respuesta.data['grupos']], ['Analistas'])
+
+
+class AdminLogTests(UsuarioTestCase):
+    url = '/api/User/admin-log/'
+
+    def registrar(self, usuario, objeto):
+        return LogEntry.objects.create(
+            user=usuario, content_type=ContentType.objects.get_for_model(User),
+            object_id='1', object_repr=objeto, action_flag=ADDITION,
+        )
+
+    def test_solo_entradas_de_la_empresa(self):
+        otra_empresa = Empresa.objects.create(razon_social='Otra', email_contacto='otra@test.com')
+        ajeno = User.objects.create_user('ajeno', 'ajeno@test.com', 'clave123456', is_staff=True)
+        Perfiluser.objects.create(empresa=otra_empresa, usuario=ajeno)
+        propia = self.registrar(self.admin, 'propio')
+        self.registrar(ajeno, 'ajeno')
+
+        respuesta = self.client.get(self.url)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual([r['id'] for r in respuesta.data['results']], [propia.id])
+        self.assertEqual(respuesta.data['results'][0]['accion'], 'Adición')
+
+    def test_paginas_keyset(self):
+        entradas = [self.registrar(self.admin, f'objeto {i}') for i in range(3)]
+        esperados = [entrada.id for entrada in reversed(entradas)]
+
+        respuesta = self.client.get(self.url, {'page_size': 2})
+        self.assertEqual([r['id'] for r in respuesta.data['results']], esperados[:2])
+        respuesta = self.client.get(respuesta.data['next'])
+        self.assertEqual([r['id'] for r in respuesta.data['results']], esperados[2:])
+        self.assertIsNone(respuesta.data['next'])
+
+
+class GroupViewSetTests(UsuarioTestCase):
+    url = '/api/User/group/'
+
+    def test_nombre_generado_con_la_secuencia_de_la_empresa(self):
+        nombres = [self.client.post(self.url, {}, format='json').data['nombre'] for _ in range(2)]
+        self.assertEqual(nombres, [f'Grupo 1 (empresa {self.empresa.id})', f'Grupo 2 (empresa {self.empresa.id})'])
+
+        otra_empresa = Empresa.objects.create(razon_social='Otra', email_contacto='otra@test.com')
+        otro_admin = User.objects.create_user('otro', 'otro@test.com', 'clave123456', is_staff=True)
+        Perfiluser.objects.create(empresa=otra_empresa, usuario=otro_admin)
+        self.client.credentials(HTTP_AUTHORIZATION='Token ' + Token.objects.create(user=otro_admin).key)
+        respuesta = self.client.post(self.url, {}, format='json')
+        self.assertEqual(respuesta.status_code, 201, respuesta.data)
+        # Cada empresa numera desde 1, sin depender de los grupos de las demás
+        self.assertEqual(respuesta.data['nombre'], f'Grupo 1 (empresa {otra_empresa.id})')
+
+    def test_nombre_generado_no_depende_de_los_grupos_existentes(self):
+        self.client.post(self.url, {}, format='json')
+        with CaptureQueriesContext(connection) as vacio:
+            self.client.post(self.url, {}, format='json')
+        Group.objects.bulk_create([Group(name=f'Grupo {i}') for i in range(200)])
+        with self.assertNumQueries(len(vacio)):
+            respuesta = self.client.post(self.url, {}, format='json')
+        self.assertEqual(respuesta.data['nombre'], f'Grupo 3 (empresa {self.empresa.id})')
+
+    def test_nombre_generado_sin_empresa(self):
+        serializer = GroupSerializers(data={})
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        grupo = serializer.save()
+        self.assertTrue(grupo.name.startswith('Grupo '))
+        self.assertIsNone(grupo.descripcion_obj.empresa)
+
+    def crear_grupos(self, cantidad):
+        permiso = Permission.objects.first()
+        for grupo in Group.objects.bulk_create([Group(name=f'Grupo {i}') for i in range(cantidad)]):
+            GroupDescripcion.objects.create(group=grupo, empresa=self.empresa, descripcion=grupo.name)
+            grupo.permissions.add(permiso)
+
+    def test_listado_sin_consultas_por_grupo(self):
+        self.crear_grupos(5)
+        self.client.get(self.url)  # Deja el token en la caché de autenticación
+
+        # Grupos con su descripción (JOIN) + permisos de todos los grupos (prefetch)
+        with self.assertNumQueries(2):
+            respuesta = self.client.get(self.url)
+        self.assertEqual(len(respuesta.data), 5)
+        self.assertTrue(all(grupo['descripcion'] and grupo['permisos'] for grupo in respuesta.data))
+
+
+@override_settings(AUTH_TOKEN_EXPIRY={'TTL': 3600, 'BATCH_SIZE': 2})
+class TokenExpiryTests(UsuarioTestCase):
+
+    def setUp(self):
+        super().setUp()
+        reset_token_cache()
+        self.addCleanup(reset_token_cache)
+
+    def vencer(self, *tokens):
+        Token.objects.filter(pk__in=[token.pk for token in tokens]).update(
+            created=timezone.now() - timedelta(hours=2)
+        )
+
+    def test_token_vencido_rechazado(self):
+        self.vencer(self.token)
+        self.assertEqual(self.client.get('/api/User/me/').status_code, 401)
+
+    def test_token_en_cache_vence_con_el_tiempo(self):
+        self.assertEqual(self.client.get('/api/User/me/').status_code, 200)
+        self.assertIsNotNone(get_token_cache().get(self.token.key))
+
+        mas_tarde = timezone.now() + timedelta(hours=2)
+        with mock.patch('app_User.token_expiry.timezone.now', return_value=mas_tarde):
+            self.assertEqual(self.client.get('/api/User/me/').status_code, 401)
+
+    def test_purgar_tokens_por_lotes(self):
+        usuarios = [User.objects.create_user(f'usuario{i}', password='clave123456') for i in range(4)]
+        tokens = [Token.objects.create(user=usuario) for usuario in usuarios]
+        self.vencer(*tokens[:3])
+        User.objects.filter(pk=usuarios[3].pk).update(is_active=False)
+
+        salida = StringIO()
+        call_command('purgar_tokens', '--dry-run', stdout=salida)
+        self.assertIn('Tokens a eliminar: 3', salida.getvalue())
+        self.assertEqual(Token.objects.count(), 5)
+
+        call_command('purgar_tokens', stdout=StringIO())
+        self.assertEqual(set(Token.objects.values_list('user_id', flat=True)), {self.admin.id, usuarios[3].id})
+
+        call_command('purgar_tokens', '--incluir-inactivos', stdout=StringIO())
+        self.assertEqual(list(Token.objects.values_list('user_id', flat=True)), [self.admin.id])
@@ -0,0 +1,93 @@
+"""
+Throttling de login y registro por IP y por email (ventana deslizante).
+
+Se evalúa en APIView.initial(), antes de ejecutar el serializer, por lo que las
+peticiones rechazadas nunca llegan al hash de contraseñas (PBKDF2).
+
+El almacén es la caché de Django indicada en settings.AUTH_THROTTLE_CACHE_ALIAS:
+por defecto LocMemCache (en memoria, por proceso); con Redis/Memcached en CACHES
+los límites y las métricas se comparten entre workers.
+Tasas configurables en REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']. La IP sale de
+get_ident(), que solo confía en X-Forwarded-For según REST_FRAMEWORK['NUM_PROXIES'].
+"""
+import logging
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import SimpleRateThrottle
+
+
+logger = logging.getLogger(__name__)
+
+METRICAS_PREFIX = 'throttle_rechazos'
+SCOPES = ('login_ip', 'login_email', 'registro_ip', 'registro_email')
+
+
+def get_throttle_cache():
+    return caches[getattr(settings, 'AUTH_THROTTLE_CACHE_ALIAS', 'default')]
+
+
+def registrar_rechazo(scope):
+    """Incrementar el contador de intentos rechazados para un scope"""
+    cache = get_throttle_cache()
+    key = f"{METRICAS_PREFIX}:{scope}"
+    # add() no pisa un valor existente; incr() es atómico en backends compartidos
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+
+
+def obtener_metricas():
+    """Intentos rechazados por scope desde el último reinicio del almacén"""
+    cache = get_throttle_cache()
+    valores = cache.get_many([f"{METRICAS_PREFIX}:{scope}" for scope in SCOPES])
+    return {scope: valores.get(f"{METRICAS_PREFIX}:{scope}", 0) for scope in SCOPES}
+
+
+class AuthRateThrottle(SimpleRateThrottle):
+    """Base: usa el almacén configurable y registra métricas de rechazo"""
+
+    @property
+    def cache(self):
+        return get_throttle_cache()
+
+    def throttle_failure(self):
+        registrar_rechazo(self.scope)
+        logger.warning("Throttle %s: intento rechazado (%s)", self.scope, self.key)
+        return super().throttle_failure()
+
+
+class IPThrottle(AuthRateThrottle):
+    def get_cache_key(self, request, view):
+        return self.cache_format % {
+            'scope': self.scope,
+            'ident': self.get_ident(request),
+        }
+
+
+class EmailThrottle(AuthRateThrottle):
+    def get_cache_key(self, request, view):
+        email = request.data.get('email') if hasattr(request.data, 'get') else None
+        if not email or not isinstance(email, str):
+            return None
+        return self.cache_format % {
+            'scope': self.scope,
+            'ident': email.strip().lower(),
+        }
+
+
+class LoginIPThrottle(IPThrottle):
+    scope = 'login_ip'
+
+
+class LoginEmailThrottle(EmailThrottle):
+    scope = 'login_email'
+
+
+class RegistroIPThrottle(IPThrottle):
+    scope = 'registro_ip'
+
+
+class RegistroEmailThrottle(EmailThrottle):
+    scope = 'registro_email'
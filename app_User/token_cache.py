@@ -0,0 +1,172 @@
+"""
+Caché token -> (usuario + tenant) para la autenticación por token.
+
+Backends (settings.TOKEN_AUTH_CACHE['BACKEND']):
+- 'shared': caché de Django configurada en settings.CACHES (p. ej. Redis), compartida entre
+            workers: el logout o la desactivación se aplican en todos a la vez (por defecto)
+- 'local':  LRU con TTL en memoria del proceso; un token revocado sigue siendo válido en
+            los demás workers hasta TIMEOUT
+- 'none':   sin caché, cada request consulta la base de datos
+"""
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.authtoken.models import Token
+from app_User.signed_tokens import fingerprint
+
+
+DEFAULTS = {
+    'BACKEND': 'shared',
+    'ALIAS': 'default',
+    'TIMEOUT': 300,
+    'MAX_ENTRIES': 10000,
+    'KEY_PREFIX': 'authtoken',
+}
+
+
+class LocalTokenCache:
+    """LRU acotado con expiración por TTL, seguro entre hilos"""
+
+    def __init__(self, timeout, max_entries):
+        self.timeout = timeout
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expira, valor = item
+            if expira < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+        # Se guarda serializado para que cada request reciba sus propias instancias
+        return pickle.loads(valor)
+
+    def set(self, key, value):
+        valor = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.timeout, valor)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def delete_many(self, keys):
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+
+
+class SharedTokenCache:
+    """Adaptador sobre una caché de Django para compartir entradas entre procesos"""
+
+    def __init__(self, alias, timeout, key_prefix):
+        self.cache = caches[alias]
+        self.timeout = timeout
+        self.key_prefix = key_prefix
+
+    def _key(self, key):
+        return f"{self.key_prefix}:{key}"
+
+    def get(self, key):
+        return self.cache.get(self._key(key))
+
+    def set(self, key, value):
+        self.cache.set(self._key(key), value, self.timeout)
+
+    def delete(self, key):
+        self.cache.delete(self._key(key))
+
+    def delete_many(self, keys):
+        self.cache.delete_many([self._key(key) for key in keys])
+
+
+class NullTokenCache:
+    """Caché deshabilitada"""
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value):
+        pass
+
+    def delete(self, key):
+        pass
+
+    def delete_many(self, keys):
+        pass
+
+
+_token_cache = None
+_token_cache_lock = threading.Lock()
+
+
+def get_token_cache():
+    """Obtener (y construir una sola vez) la caché configurada en settings"""
+    global _token_cache
+    if _token_cache is None:
+        with _token_cache_lock:
+            if _token_cache is None:
+                config = {**DEFAULTS, **getattr(settings, 'TOKEN_AUTH_CACHE', {})}
+                backend = config['BACKEND']
+                if backend == 'local':
+                    _token_cache = LocalTokenCache(config['TIMEOUT'], config['MAX_ENTRIES'])
+                elif backend == 'shared':
+                    _token_cache = SharedTokenCache(config['ALIAS'], config['TIMEOUT'], config['KEY_PREFIX'])
+                elif backend == 'none':
+                    _token_cache = NullTokenCache()
+                else:
+                    raise ValueError(f"TOKEN_AUTH_CACHE['BACKEND'] inválido: {backend}")
+    return _token_cache
+
+
+def reset_token_cache():
+    """Descartar la caché construida (p. ej. al cambiar settings en pruebas)"""
+    global _token_cache
+    with _token_cache_lock:
+        _token_cache = None
+
+
+def signed_cache_key(token_fingerprint):
+    """Clave de caché del usuario materializado para tokens de acceso firmados"""
+    return f"firmado:{token_fingerprint}"
+
+
+def invalidate_token(key):
+    """Eliminar de la caché un token (logout), incluidos los accesos firmados que ancla"""
+    cache = get_token_cache()
+    cache.delete(key)
+    cache.delete(signed_cache_key(fingerprint(key)))
+
+
+def invalidate_tokens(tokens):
+    """
+    Eliminar de la caché los tokens de un QuerySet de Token (una consulta y un único
+    delete_many, incluidos los accesos firmados que anclan)
+    """
+    cache = get_token_cache()
+    if isinstance(cache, NullTokenCache):
+        return
+    keys = list(tokens.values_list('key', flat=True))
+    if keys:
+        cache.delete_many(keys + [signed_cache_key(fingerprint(key)) for key in keys])
+
+
+def invalidate_user_tokens(user_id):
+    """Eliminar de la caché los tokens de un usuario (desactivación, cambios de perfil)"""
+    invalidate_tokens(Token.objects.filter(user_id=user_id))
+
+
+def invalidate_empresa_tokens(empresa_id):
+    """Eliminar de la caché los tokens de todos los usuarios de una empresa"""
+    invalidate_tokens(Token.objects.filter(user__perfiluser__empresa_id=empresa_id))
@@ -0,0 +1,71 @@
+"""
+Expiración de los tokens de rest_framework.authtoken.
+
+Un token vence cuando `created` supera settings.AUTH_TOKEN_EXPIRY['TTL'] (segundos;
+0 deshabilita la expiración). La autenticación compara la fecha que ya trae la
+consulta o la caché de tokens, sin consultas adicionales; el login rota el token
+vencido y el comando `purgar_tokens` los elimina por lotes.
+"""
+from datetime import timedelta
+from django.conf import settings
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from app_User.token_cache import invalidate_token
+
+
+DEFAULTS = {
+    'TTL': 0,  # segundos, 0 = sin expiración
+    'BATCH_SIZE': 1000,
+}
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'AUTH_TOKEN_EXPIRY', {})}
+
+
+def fecha_corte(now=None):
+    """Tokens creados antes de esta fecha están vencidos (None si no hay TTL)"""
+    ttl = get_config()['TTL']
+    if not ttl:
+        return None
+    return (now or timezone.now()) - timedelta(seconds=ttl)
+
+
+def token_expirado(created, now=None):
+    corte = fecha_corte(now)
+    return corte is not None and created is not None and created < corte
+
+
+def purgar_tokens(batch_size=None, incluir_inactivos=False, dry_run=False):
+    """
+    Eliminar tokens vencidos (y opcionalmente los de usuarios inactivos) por lotes
+
+    Cada lote selecciona a lo sumo `batch_size` claves y las borra por clave primaria,
+    para no bloquear authtoken_token con un único DELETE grande.
+
+    Returns:
+        Cantidad de tokens eliminados (o que se eliminarían con dry_run)
+    """
+    batch_size = batch_size or get_config()['BATCH_SIZE']
+    corte = fecha_corte()
+    if corte is None and not incluir_inactivos:
+        return 0
+
+    condiciones = Token.objects.none()
+    if corte is not None:
+        condiciones = condiciones | Token.objects.filter(created__lt=corte)
+    if incluir_inactivos:
+        condiciones = condiciones | Token.objects.filter(user__is_active=False)
+
+    if dry_run:
+        return condiciones.count()
+
+    total = 0
+    while True:
+        claves = list(condiciones.values_list('key', flat=True)[:batch_size])
+        if not claves:
+            return total
+        Token.objects.filter(key__in=claves).delete()
+        for clave in claves:
+            invalidate_token(clave)
+        total += len(claves)
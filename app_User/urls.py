@@ -1,6 +1,6 @@
 from django.urls import include, path
 from rest_framework import routers
-from .api_user import UserViewSer, GroupViewSet, PermissionViewSer, ContentTypeViewSer, AdminLogViewSet, CreateUserView , PerfilUserViewSet, MeView, UserGroupView
+from .api_user import UserViewSer, GroupViewSet, PermissionViewSer, ContentTypeViewSer, AdminLogViewSet, CreateUserView , BulkCreateUserView, PerfilUserViewSet, MeView, UserGroupView, UserGroupBulkView, ThrottleMetricsView
 
 
 router = routers.DefaultRouter()
@@ -14,6 +14,9 @@ router.register(r'perfil-user', PerfilUserViewSet, basename='perfil-user')
 urlpatterns = [
     path('', include(router.urls)),
     path('create-user/', CreateUserView.as_view(), name='create-user'),
+    path('create-user/bulk/', BulkCreateUserView.as_view(), name='create-user-bulk'),
     path('me/', MeView.as_view(), name='me'),
     path('user-groups/', UserGroupView.as_view(), name='user-groups'),
+    path('user-groups/bulk/', UserGroupBulkView.as_view(), name='user-groups-bulk'),
+    path('throttle-metrics/', ThrottleMetricsView.as_view(), name='throttle-metrics'),
 ]
\ No newline at end of file